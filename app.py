@@ -1,9 +1,27 @@
 from shiny import reactive
 from shiny.express import input, render, ui
+from shiny.types import SafeException
 import shinyswatch
 from shinywidgets import render_plotly
-from src.Functions import estimate_bam_size_from_nreads,file_size_converter, plot_cummulative_cost_over_years, reads_to_bases, estimate_fastqz_size_from_nreads,plot_incremental_reads, calculate_bam_cram_estimates_for_dragen
+from src.Functions import estimate_bam_size_from_nreads,file_size_converter, plot_cummulative_cost_over_years, cumulative_cost_series, reads_to_bases, estimate_fastqz_size_from_nreads, calculate_bam_cram_estimates_for_dragen, default_compression_ratio_model, plot_sensitivity_heatmap, reads_for_coverage, to_bases
+from src.BenchmarkArtifacts import load_dragen_estimates, load_incremental_reads_figure
+from src.AppCache import debounce, round_sig, shared_cache
+from src.AppJobs import JOB_WORKERS, progress_reporter, run_job
+from src.Metrics import METRICS_ENABLED, dump_json, snapshot, timed
+from src.seqstoreestimator.costs import STORAGE_TIERS, PriceTable, cheapest_policy
+from src.seqstoreestimator.inverse import max_reads_for_budget
+from src.seqstoreestimator.projection import intake_cohorts, project_storage
+from src.seqstoreestimator.references import list_references
+from src.seqstoreestimator.sensitivity import SWEEP_OUTPUTS, SWEEP_PARAMETERS, merge_sweeps, parameter_grid, sobol_indices, split_grid, sweep, tornado
+from src.seqstoreestimator.uncertainty import default_distributions, simulate_sizes
 from faicons import icon_svg
+import os
+import numpy as np
+
+# Optional FileIndex (.sqlite) or exported dataset from `python -m src.seqstoreestimator.scanner`
+OBSERVED_SIZES_PATH = os.environ.get("SEQSTOREESTIMATOR_OBSERVED_SIZES")
+PROJECTION_YEARS = 5
+DEBOUNCE_SECONDS = 0.5
 
 
 
@@ -22,21 +40,82 @@ with ui.navset_tab(id="tabs"):
         with ui.layout_sidebar():
             with ui.sidebar(title=ui.span(icon_svg("gears"), "Parameters")):
 
-                ui.input_numeric(
-                        id="num_reads",
-                        label="Number of Reads",
-                        min=0,
-                        max=6_000_000_000,
-                        value=3_771_780_000_000,
-                        step=1_000_000,
-                    )
+                ui.input_radio_buttons(
+                    id="planning_mode",
+                    label="Plan From",
+                    choices={"reads": "Number of Reads", "coverage": "Coverage", "budget": "Budget"},
+                    selected="reads",
+                    inline=True)
+
+                with ui.panel_conditional("input.planning_mode === 'reads'"):
+                    ui.input_numeric(
+                            id="num_reads",
+                            label="Number of Reads",
+                            min=0,
+                            max=6_000_000_000,
+                            value=3_771_780_000_000,
+                            step=1_000_000,
+                        )
+
+                with ui.panel_conditional("input.planning_mode === 'coverage'"):
+                    with ui.card():
+                        ui.input_select(
+                            id="coverage_reference",
+                            label="Genome or Panel",
+                            choices={r.name: f"{r.name} ({to_bases(r.size_bp, 'Mb'):,.1f} Mb)" for r in list_references()},
+                            selected="GRCh38")
+                        ui.input_numeric(
+                            id="coverage",
+                            label="Target Coverage (x)",
+                            min=0,
+                            value=30,
+                            step=1)
+                        ui.input_numeric(
+                            id="duplicate_rate",
+                            label="Duplicate Rate",
+                            min=0,
+                            max=0.99,
+                            value=0.1,
+                            step=0.01)
+                        @render.text
+                        def coverage_note():
+                            return params()["planning_note"] or ""
+
+                with ui.panel_conditional("input.planning_mode === 'budget'"):
+                    with ui.card():
+                        ui.input_select(
+                            id="budget_unit",
+                            label="Budget In",
+                            choices={"dollars": "Dollars over Retention", "gb": "GB of Storage"},
+                            selected="dollars")
+                        ui.input_numeric(
+                            id="budget_amount",
+                            label="Budget",
+                            min=0,
+                            value=10_000,
+                            step=100)
+                        ui.input_numeric(
+                            id="budget_samples",
+                            label="Number of Samples",
+                            min=1,
+                            value=100,
+                            step=1)
+                        ui.input_numeric(
+                            id="budget_retention_months",
+                            label="Retention (months)",
+                            min=1,
+                            value=PROJECTION_YEARS * 12,
+                            step=1)
+                        @render.text
+                        def budget_note():
+                            return params()["planning_note"] or ""
 
                 with ui.card():
                     ui.input_numeric(
                         id="read_length",
                         label="Read Length",
                         min=0,
-                        max=800,
+                        max=1_000_000,
                         value=150,
                         step=1,
                     )
@@ -77,6 +156,12 @@ with ui.navset_tab(id="tabs"):
                         max=1.0,
                         value=0.25)
 
+                    ui.input_switch(
+                        id="use_fitted_compression",
+                        label="Use Fitted BAM/CRAM Ratios",
+                        value=False
+                    )
+
                     ui.input_select(
                         id="output_format",
                         label="Output Format",
@@ -97,6 +182,38 @@ with ui.navset_tab(id="tabs"):
                         value=True
                     )
 
+                    ui.input_numeric(
+                        id="egress_per_gb",
+                        label="Egress per GB ($)",
+                        value=0.09,
+                        step=0.01
+                    )
+
+                    ui.input_numeric(
+                        id="access_per_month",
+                        label="Data Downloaded per Month (fraction)",
+                        min=0,
+                        max=1,
+                        value=0.01,
+                        step=0.01
+                    )
+
+                    ui.input_numeric(
+                        id="samples_per_month",
+                        label="New Samples per Month",
+                        min=0,
+                        value=0,
+                        step=1
+                    )
+
+                    ui.input_numeric(
+                        id="fastqz_retention_months",
+                        label="Delete FASTQ.gz After (months, 0 = never)",
+                        min=0,
+                        value=0,
+                        step=1
+                    )
+
             with ui.layout_column_wrap(fill=True):
 
                 with ui.card(full_screen=True):
@@ -110,6 +227,10 @@ with ui.navset_tab(id="tabs"):
                             def estimated_bam_size():
                                 bam_size_string = file_size_converter(estimated_bam_size_bytes())
                                 return f"{bam_size_string}"
+                            @render.text
+                            def estimated_bam_size_interval():
+                                interval = size_intervals()["bam_bytes"]
+                                return f"P5–P95: {file_size_converter(interval['p5'])} – {file_size_converter(interval['p95'])}"
                             
                         with ui.value_box(theme="success", showcase=icon_svg("file", style="solid")):
                             "Estimated FASTQ.gz File Size"
@@ -117,22 +238,34 @@ with ui.navset_tab(id="tabs"):
                             def estimated_fastqz_size():
                                 fastqz_size_string = file_size_converter(estimated_fastqz_size_bytes())
                                 return f"{fastqz_size_string}"
+                            @render.text
+                            def estimated_fastqz_size_interval():
+                                interval = size_intervals()["fastqz_bytes"]
+                                return f"P5–P95: {file_size_converter(interval['p5'])} – {file_size_converter(interval['p95'])}"
 
                     #with ui.layout_column_wrap(fill=False):
                     with ui.card(full_screen=True):
                         ui.h2(icon_svg("info", style="solid"), "Inputs")
                         with ui.value_box(showcase_layout="top right", theme="info"):
-                            "Number of Reads"
+                            @render.text
+                            def num_reads_title():
+                                if params()["planning_note"]:
+                                    return "Number of Reads"
+                                if params()["planning_mode"] == "budget":
+                                    return "Maximum Reads per Sample"
+                                if params()["planning_mode"] == "coverage":
+                                    return "Reads for Target Coverage"
+                                return "Number of Reads"
                             @render.text
                             def num_reads_display():
-                                return f"{input.num_reads()}"
+                                return f"{params()['num_reads']}"
 
 
                         with ui.value_box(showcase_layout="top right",  theme="info"):
                             "Number of Bases"
                             @render.text
                             def num_bases_display():
-                                num_bases = reads_to_bases(input.num_reads(), input.read_length())
+                                num_bases = reads_to_bases(params()["num_reads"], params()["read_len"])
                                 return f"{num_bases} bases"
 
                         with ui.value_box(showcase_layout="top right",  theme="info"):
@@ -148,49 +281,432 @@ with ui.navset_tab(id="tabs"):
                         @render.text
                         def estimated_monthly_cost_display():
                             return f"${estimated_monthly_cost():.2f} per month"
+                        @render.text
+                        def estimated_monthly_cost_interval():
+                            interval = size_intervals()["monthly_cost"]
+                            return f"P5–P95: ${interval['p5']:.2f} – ${interval['p95']:.2f}"
                         
+                    with ui.value_box(theme="warning", showcase=icon_svg("layer-group", style="solid")):
+                        "Cheapest Tier Placement"
+                        @render.text
+                        def cheapest_tier_placement_display():
+                            policy = cheapest_tier_placement()
+                            return f"${policy['total']:,.2f} over {PROJECTION_YEARS} years (all hot: ${policy['hot_only_total']:,.2f})"
+                        @render.text
+                        def cheapest_tier_placement_detail():
+                            policy = cheapest_tier_placement()
+                            return "; ".join(
+                                f"{name}: {policy[f'{key}_hot_months']} hot / {policy[f'{key}_cool_months']} cool / "
+                                f"{policy[f'{key}_archive_months']} archive months"
+                                for key, name in (("alignment", input.output_format()), ("fastqz", "FASTQ.gz"))
+                                if f"{key}_hot_months" in policy
+                            )
+
                     with ui.card(full_screen=True):
                         @render_plotly
+                        @timed("app.render.cummulative_cost_chart")
                         def cummulative_cost_chart():
-                            return plot_cummulative_cost_over_years(
-                                monthly_cost=estimated_monthly_cost(),
-                                years=5
-                            )
+                            # built once per session; cost_chart_updates patches the trace data
+                            with reactive.isolate():
+                                return plot_cummulative_cost_over_years(
+                                    monthly_cost=projected_storage()["monthly_cost"],
+                                    years=PROJECTION_YEARS,
+                                    monthly_cost_interval=projected_cost_interval()
+                                )
+    with ui.nav_panel("Sensitivity", value="Sensitivity"):
+        with ui.layout_sidebar():
+            with ui.sidebar(title=ui.span(icon_svg("sliders"), "Sweep")):
+                ui.input_select(
+                    id="sweep_x",
+                    label="X Axis",
+                    choices=list(SWEEP_PARAMETERS),
+                    selected="read_len")
+                ui.input_select(
+                    id="sweep_y",
+                    label="Y Axis",
+                    choices=list(SWEEP_PARAMETERS),
+                    selected="bam_compression_ratio")
+                ui.input_select(
+                    id="sweep_output",
+                    label="Output",
+                    choices=list(SWEEP_OUTPUTS),
+                    selected="total_bytes")
+                ui.input_slider(
+                    id="sweep_points",
+                    label="Points per Parameter",
+                    min=3,
+                    max=15,
+                    value=11)
+                ui.input_numeric(
+                    id="sweep_spread",
+                    label="Range (+/- fraction of the App inputs)",
+                    min=0.05,
+                    max=1.0,
+                    value=0.5,
+                    step=0.05)
+                ui.input_task_button(
+                    id="run_sweep",
+                    label="Run Sweep")
+                ui.input_action_button(
+                    id="cancel_sweep",
+                    label="Cancel")
+                @render.text
+                def sweep_status():
+                    done, total = sweep_progress()
+                    status = sweep_job.status()
+                    if status == "running":
+                        return f"Running: {done} of {total} chunks"
+                    if status == "cancelled":
+                        return "Cancelled"
+                    if status == "error":
+                        return "Sweep failed"
+                    return "Done" if status == "success" else ""
+
+            with ui.card(full_screen=True):
+                @render_plotly
+                @timed("app.render.sensitivity_heatmap")
+                def sensitivity_heatmap():
+                    if input.sweep_x() == input.sweep_y():
+                        raise SafeException("Choose two different parameters for the X and Y axes")
+                    return plot_sensitivity_heatmap(sensitivity_sweep(), input.sweep_x(), input.sweep_y(),
+                                                    input.sweep_output())
+            with ui.card(full_screen=True):
+                ui.h2("Sensitivity Indices")
+                @render.data_frame
+                @timed("app.render.sensitivity_table")
+                def sensitivity_table():
+                    import pandas as pd
+
+                    result = sensitivity_sweep()
+                    indices = sobol_indices(result, input.sweep_output())
+                    return pd.DataFrame([
+                        {"parameter": bar["parameter"],
+                         "first_order_sobol": round(indices[bar["parameter"]]["first_order"], 4),
+                         "total_sobol": round(indices[bar["parameter"]]["total"], 4),
+                         "range": f"{bar['low_value']:g} – {bar['high_value']:g}",
+                         "tornado_low": file_size_converter(bar["low"]),
+                         "tornado_high": file_size_converter(bar["high"])}
+                        for bar in tornado(result, input.sweep_output(), baseline=result["baseline"])
+                    ])
+    if METRICS_ENABLED:
+        with ui.nav_panel("Metrics", value="Metrics"):
+            with ui.card(full_screen=True):
+                ui.h2("Timings for this worker process")
+                @render.download(filename="seqstoreestimator-metrics.json")
+                def metrics_json():
+                    yield dump_json()
+                @render.data_frame
+                def metrics_table():
+                    import pandas as pd
+
+                    reactive.invalidate_later(2)
+                    return pd.DataFrame([
+                        {"timer": name,
+                         "count": stats["count"],
+                         "total_ms": round(stats["total_s"] * 1000, 2),
+                         "mean_ms": round(stats["mean_s"] * 1000, 3),
+                         "p50_ms (<=)": round(stats["p50_s"] * 1000, 3),
+                         "p95_ms (<=)": round(stats["p95_s"] * 1000, 3),
+                         "max_ms": round(stats["max_s"] * 1000, 3)}
+                        for name, stats in snapshot().items()
+                    ])
     with ui.nav_panel("Benchmarks", value="Benchmarks"): 
         with ui.card(full_screen=True):
             @render_plotly
+            @timed("app.render.incremental_reads_chart")
             def incremental_reads_chart():
-                return plot_incremental_reads()
+                return load_incremental_reads_figure()
         with ui.card(full_screen=True):
             ui.h2("Estimated vs Observed BAM/CRAM Sizes [Dragen Dataset]")
             @render.data_frame
+            @timed("app.render.dragen_bam_cram_estimates_table")
             def dragen_bam_cram_estimates_table():
-                df = calculate_bam_cram_estimates_for_dragen()
+                if not OBSERVED_SIZES_PATH:
+                    return load_dragen_estimates()
+                from src.seqstoreestimator.scanner import load_observed_sizes, observed_bam_cram_records
+                records = observed_bam_cram_records(load_observed_sizes(OBSERVED_SIZES_PATH))
+                df = calculate_bam_cram_estimates_for_dragen(records)
                 return df
  
 ## calculations
+@debounce(DEBOUNCE_SECONDS)
+@reactive.Calc
+@timed("app.calc.params")
+def params() -> dict:
+    p = {
+        "planning_mode": input.planning_mode(),
+        "num_reads": int(input.num_reads() or 0),
+        "read_len": int(input.read_length() or 0),
+        "bam_compression_ratio": round_sig(input.bam_compression_ratio() or 0),
+        "cram_compression_ratio": round_sig(input.cram_compression_ratio() or 0),
+        "gzip_compression_ratio": round_sig(input.fastq_gzip_compression_ratio() or 0),
+        "supplementary_alignments": round_sig(input.supplementary_alignments() or 0),
+        "percent_mapped": round_sig(input.mapped() or 0),
+        "output_format": input.output_format().upper(),
+        "use_fitted_compression": bool(input.use_fitted_compression()),
+        "cost_per_month_per_gb": round_sig(input.cost_per_month_per_gb() or 0),
+        "include_fastqz": bool(input.include_fastqz_costs()),
+        "egress_per_gb": round_sig(input.egress_per_gb() or 0),
+        "access_per_month": round_sig(input.access_per_month() or 0),
+        "samples_per_month": int(input.samples_per_month() or 0),
+        "fastqz_retention_months": int(input.fastqz_retention_months() or 0),
+        "planning_note": None,
+    }
+    if p["planning_mode"] == "coverage" and p["read_len"] > 0:
+        try:
+            p["num_reads"] = int(reads_for_coverage(round_sig(input.coverage() or 0),
+                                                    input.coverage_reference(),
+                                                    read_length = p["read_len"],
+                                                    duplicate_rate = round_sig(input.duplicate_rate() or 0)))
+        except (ValueError, OverflowError) as e:
+            # keep the Number of Reads input so every other output still renders
+            p["planning_note"] = f"Cannot plan from coverage ({e}); using the Number of Reads input instead."
+    elif p["planning_mode"] == "budget":
+        # the rest of the app then shows sizes and costs for the solved read count
+        try:
+            p["num_reads"] = cached_max_reads(input.budget_unit(),
+                                              round_sig(input.budget_amount() or 0),
+                                              int(input.budget_samples() or 1),
+                                              int(input.budget_retention_months() or 0),
+                                              **{k: p[k] for k in ("read_len", "bam_compression_ratio", "cram_compression_ratio",
+                                                                   "gzip_compression_ratio", "supplementary_alignments",
+                                                                   "percent_mapped", "output_format", "use_fitted_compression",
+                                                                   "cost_per_month_per_gb", "include_fastqz",
+                                                                   "fastqz_retention_months")})
+        except ValueError as e:
+            p["planning_note"] = f"Cannot plan from budget ({e}); using the Number of Reads input instead."
+    return p
+
+
+def compression_ratios(p: dict) -> tuple:
+    if p["use_fitted_compression"]:
+        model = default_compression_ratio_model()
+        return (model.ratio(p["num_reads"], p["read_len"], "BAM"),
+                model.ratio(p["num_reads"], p["read_len"], "CRAM"))
+    return p["bam_compression_ratio"], p["cram_compression_ratio"]
+
+
+cached_bam_size = shared_cache(estimate_bam_size_from_nreads)
+cached_fastqz_size = shared_cache(estimate_fastqz_size_from_nreads)
+cached_simulate_sizes = shared_cache(simulate_sizes, maxsize=256)
+
+
+@shared_cache(maxsize=256)
+def cached_projected_storage(num_reads, read_len, bam_compression_ratio, cram_compression_ratio,
+                             gzip_compression_ratio, supplementary_alignments, percent_mapped,
+                             output_format, samples_per_month, fastqz_retention_months,
+                             cost_per_month_per_gb) -> dict:
+    # the estimated dataset arrives in month 1, followed by samples_per_month more like it
+    schedule = np.full(PROJECTION_YEARS * 12, samples_per_month, dtype=float)
+    schedule[0] += 1
+    cohorts = intake_cohorts(schedule,
+                             n_reads = num_reads,
+                             read_len = read_len,
+                             bam_compression_ratio = bam_compression_ratio,
+                             cram_compression_ratio = cram_compression_ratio,
+                             gzip_compression_ratio = gzip_compression_ratio,
+                             supplementary_alignments = supplementary_alignments,
+                             percent_mapped = percent_mapped,
+                             )
+    return project_storage(cohorts,
+                           years = PROJECTION_YEARS,
+                           alignment_format = output_format,
+                           fastqz_retention_months = fastqz_retention_months,
+                           tier_prices = ((0, cost_per_month_per_gb),),
+                           )
+
+
+@shared_cache(maxsize=256)
+def cached_cheapest_policy(alignment_bytes, fastqz_bytes, cost_per_month_per_gb, egress_per_gb, access_per_month) -> dict:
+    file_bytes = {"alignment": alignment_bytes}
+    if fastqz_bytes is not None:
+        file_bytes["fastqz"] = fastqz_bytes
+    tiers = {**STORAGE_TIERS,
+             "hot": {**STORAGE_TIERS["hot"], "storage_per_gb_month": cost_per_month_per_gb}}
+    return cheapest_policy(file_bytes,
+                           horizon_months = PROJECTION_YEARS * 12,
+                           access_per_month = {"alignment": access_per_month, "fastqz": access_per_month},
+                           prices = PriceTable(tiers, egress_per_gb = egress_per_gb),
+                           )
+
+
+@shared_cache(maxsize=256)
+def cached_max_reads(budget_unit, budget_amount, n_samples, retention_months, read_len, bam_compression_ratio,
+                     cram_compression_ratio, gzip_compression_ratio, supplementary_alignments, percent_mapped,
+                     output_format, use_fitted_compression, cost_per_month_per_gb, include_fastqz,
+                     fastqz_retention_months) -> int:
+    budget = {"budget_bytes": budget_amount * 1024 ** 3} if budget_unit == "gb" else {"budget_dollars": budget_amount}
+    solved = max_reads_for_budget(**budget,
+                                  n_samples = n_samples,
+                                  retention_months = retention_months,
+                                  tier_prices = ((0, cost_per_month_per_gb),),
+                                  read_len = read_len,
+                                  bam_compression_ratio = bam_compression_ratio,
+                                  cram_compression_ratio = cram_compression_ratio,
+                                  gzip_compression_ratio = gzip_compression_ratio,
+                                  supplementary_alignments = supplementary_alignments,
+                                  percent_mapped = percent_mapped,
+                                  output_format = output_format,
+                                  include_fastqz = include_fastqz,
+                                  fastqz_retention_months = fastqz_retention_months or None,
+                                  compression_model = default_compression_ratio_model() if use_fitted_compression else None,
+                                  )
+    return int(solved["n_reads"])
+
+
+sweep_progress = reactive.Value((0, 0))
+
+
+@ui.bind_task_button(button_id="run_sweep")
+@reactive.extended_task
+async def sweep_job(grid, n_reads, output_format, include_fastqz, baseline) -> dict:
+    # 11 points over 6 parameters is a 1.8M point grid, split by read length over the job pool
+    chunks = [{"grid": chunk, "n_reads": n_reads, "output_format": output_format, "include_fastqz": include_fastqz}
+              for chunk in split_grid(grid, JOB_WORKERS * 2)]
+    result = await run_job(sweep, chunks, combine=merge_sweeps, on_progress=progress_reporter(sweep_progress))
+    # keep the baseline the sweep was centred on; the inputs may have changed since
+    return {**result, "baseline": baseline}
+
+
+@reactive.Calc
+def sweep_args() -> tuple:
+    p = params()
+    bam_compression_ratio, cram_compression_ratio = compression_ratios(p)
+    baseline = {
+        "read_len": p["read_len"],
+        "percent_mapped": p["percent_mapped"],
+        "supplementary_alignments": p["supplementary_alignments"],
+        "bam_compression_ratio": bam_compression_ratio,
+        "cram_compression_ratio": cram_compression_ratio,
+        "gzip_compression_ratio": p["gzip_compression_ratio"],
+    }
+    grid = parameter_grid(baseline, spread = float(input.sweep_spread() or 0), points = int(input.sweep_points()))
+    return grid, p["num_reads"], p["output_format"], p["include_fastqz"], baseline
+
+
+@reactive.Effect
+@reactive.event(input.run_sweep, ignore_init=True)
+def start_sweep():
+    # only the button starts a sweep; editing inputs must not resubmit a 10^6 point job
+    with reactive.isolate():
+        args = sweep_args()
+    sweep_job.cancel()
+    sweep_job.invoke(*args)
+
+
+@reactive.Effect
+@reactive.event(input.cancel_sweep)
+def cancel_sweep():
+    sweep_job.cancel()
+
+
 @reactive.Calc
+@timed("app.calc.sensitivity_sweep")
+def sensitivity_sweep() -> dict:
+    return sweep_job.result()
+
+
+@reactive.Calc
+@timed("app.calc.estimated_bam_size_bytes")
 def estimated_bam_size_bytes() -> float:
-    return estimate_bam_size_from_nreads(n_reads = input.num_reads(), 
-                                                read_len = input.read_length(),
-                                                bam_compression_ratio = input.bam_compression_ratio(),
-                                                supplementary_alignments = input.supplementary_alignments(),
-                                                percent_mapped = input.mapped(),
-                                                output_format = input.output_format(),
-                                                cram_compression_ratio = input.cram_compression_ratio()
-                                                )
+    p = params()
+    return cached_bam_size(n_reads = p["num_reads"],
+                           read_len = p["read_len"],
+                           bam_compression_ratio = p["bam_compression_ratio"],
+                           supplementary_alignments = p["supplementary_alignments"],
+                           percent_mapped = p["percent_mapped"],
+                           output_format = p["output_format"],
+                           cram_compression_ratio = p["cram_compression_ratio"],
+                           compression_model = default_compression_ratio_model() if p["use_fitted_compression"] else None
+                           )
 
 @reactive.Calc
+@timed("app.calc.estimated_fastqz_size_bytes")
 def estimated_fastqz_size_bytes() -> float:
-    return estimate_fastqz_size_from_nreads(n_reads = input.num_reads(), 
-                                                read_len = input.read_length(),
-                                                gzip_compression_ratio = input.fastq_gzip_compression_ratio()
-                                                )
+    p = params()
+    return cached_fastqz_size(n_reads = p["num_reads"],
+                              read_len = p["read_len"],
+                              gzip_compression_ratio = p["gzip_compression_ratio"]
+                              )
 
 @reactive.Calc
+@timed("app.calc.estimated_monthly_cost")
 def estimated_monthly_cost() -> float:
-    if input.include_fastqz_costs():
+    if params()["include_fastqz"]:
         size_in_gb = (estimated_bam_size_bytes() + estimated_fastqz_size_bytes()) / (1024 ** 3)
     else:
         size_in_gb = estimated_bam_size_bytes() / (1024 ** 3)
-    return size_in_gb * input.cost_per_month_per_gb()
\ No newline at end of file
+    return size_in_gb * params()["cost_per_month_per_gb"]
+
+@reactive.Calc
+@timed("app.calc.size_intervals")
+def size_intervals() -> dict:
+    p = params()
+    bam_compression_ratio, cram_compression_ratio = compression_ratios(p)
+    return cached_simulate_sizes(n_reads = p["num_reads"],
+                                 read_len = p["read_len"],
+                                 output_format = p["output_format"],
+                                 distributions = default_distributions(
+                                     bam_compression_ratio = bam_compression_ratio,
+                                     cram_compression_ratio = cram_compression_ratio,
+                                     gzip_compression_ratio = p["gzip_compression_ratio"],
+                                     supplementary_alignments = p["supplementary_alignments"],
+                                     percent_mapped = p["percent_mapped"],
+                                 ),
+                                 cost_per_month_per_gb = p["cost_per_month_per_gb"],
+                                 include_fastqz = p["include_fastqz"],
+                                 seed = 0,
+                                 )
+
+
+@reactive.Calc
+@timed("app.calc.projected_storage")
+def projected_storage() -> dict:
+    p = params()
+    bam_compression_ratio, cram_compression_ratio = compression_ratios(p)
+    if not p["include_fastqz"]:
+        fastqz_retention_months = 0
+    else:
+        fastqz_retention_months = p["fastqz_retention_months"] or None
+    return cached_projected_storage(p["num_reads"], p["read_len"], bam_compression_ratio, cram_compression_ratio,
+                                    p["gzip_compression_ratio"], p["supplementary_alignments"], p["percent_mapped"],
+                                    p["output_format"], p["samples_per_month"], fastqz_retention_months,
+                                    p["cost_per_month_per_gb"])
+
+@reactive.Calc
+@timed("app.calc.projected_cost_interval")
+def projected_cost_interval() -> tuple:
+    # scale the projection by the Monte Carlo spread of a single dataset's cost
+    interval = size_intervals()["monthly_cost"]
+    monthly_cost = projected_storage()["monthly_cost"]
+    if not estimated_monthly_cost():
+        return (monthly_cost, monthly_cost)
+    return (monthly_cost * interval["p5"] / estimated_monthly_cost(),
+            monthly_cost * interval["p95"] / estimated_monthly_cost())
+
+
+@reactive.Calc
+@timed("app.calc.cheapest_tier_placement")
+def cheapest_tier_placement() -> dict:
+    p = params()
+    return cached_cheapest_policy(estimated_bam_size_bytes(),
+                                  estimated_fastqz_size_bytes() if p["include_fastqz"] else None,
+                                  p["cost_per_month_per_gb"],
+                                  p["egress_per_gb"],
+                                  p["access_per_month"])
+
+
+@reactive.Effect
+@timed("app.effect.cost_chart_updates")
+def cost_chart_updates():
+    # send only the new y values instead of re-serializing the whole figure
+    fig = cummulative_cost_chart.widget
+    if fig is None:
+        return
+    series = cumulative_cost_series(projected_storage()["monthly_cost"],
+                                    years = PROJECTION_YEARS,
+                                    monthly_cost_interval = projected_cost_interval())
+    with fig.batch_update():
+        fig.data[0].y = series["cumulative_cost_high"]
+        fig.data[1].y = series["cumulative_cost_low"]
+        fig.data[2].y = series["cumulative_cost"]
@@ -0,0 +1,265 @@
+"""
+Throughput, latency and accuracy benchmarks for the size estimators.
+
+Three groups of metrics are measured:
+
+* throughput of the scalar and batch BAM/FASTQ.gz estimators, in rows per second,
+  from 1 to 10M rows;
+* latency of the computations behind the app's reactive calcs and figures;
+* accuracy, as mean absolute percent error against bam_general, bam_dragen and
+  incremental_reads, with constant and fitted compression ratios.
+
+Each run is appended to history.jsonl (not committed). Accuracy is compared with
+the committed baseline.json and may not get worse by more than
+`--accuracy-tolerance` percentage points. Timings depend on the machine, so they
+are only compared with a local timing_baseline.json, recorded on request; they
+may then drift by `--tolerance` before counting as a regression.
+
+    python benchmarks/estimators.py                     # run and compare
+    python benchmarks/estimators.py --update-baseline   # accept the current numbers
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from src.Functions import (  # noqa: E402
+    calculate_bam_cram_estimates_for_dragen,
+    default_compression_ratio_model,
+    estimate_bam_size_from_nreads,
+    estimate_bam_size_from_nreads_batch,
+    estimate_cram_size_from_nreads,
+    estimate_fastqz_size_from_nreads,
+    estimate_fastqz_size_from_nreads_batch,
+    plot_cummulative_cost_over_years,
+    plot_incremental_reads,
+)
+from src.RealDatasets import bam_dragen, bam_general, incremental_reads  # noqa: E402
+from src.seqstoreestimator.costs import cheapest_policy  # noqa: E402
+from src.seqstoreestimator.projection import intake_cohorts, project_storage  # noqa: E402
+from src.seqstoreestimator.uncertainty import simulate_sizes  # noqa: E402
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(BENCHMARK_DIR, "history.jsonl")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+TIMING_BASELINE_PATH = os.path.join(BENCHMARK_DIR, "timing_baseline.json")
+
+SCALAR_ROWS = (1, 1_000, 100_000)
+BATCH_ROWS = (1, 1_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _manifest(n_rows: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "n_reads": rng.integers(1_000_000, 1_000_000_000, n_rows),
+        "read_len": rng.choice([100, 150, 250], n_rows),
+        "percent_mapped": rng.uniform(0.8, 1.0, n_rows),
+        "supplementary_alignments": rng.uniform(0.0, 0.2, n_rows),
+    }
+
+
+def throughput(repeat: int = 3) -> dict:
+    """
+    Rows per second of the scalar and batch estimators.
+    """
+    results = {}
+    for n_rows in SCALAR_ROWS:
+        m = _manifest(n_rows)
+        rows = list(zip(m["n_reads"].tolist(), m["read_len"].tolist(),
+                        m["percent_mapped"].tolist(), m["supplementary_alignments"].tolist()))
+
+        def scalar_bam():
+            for n, rl, pm, sa in rows:
+                estimate_bam_size_from_nreads(n, read_len=rl, percent_mapped=pm, supplementary_alignments=sa)
+
+        def scalar_fastqz():
+            for n, rl, _, _ in rows:
+                estimate_fastqz_size_from_nreads(n, read_len=rl)
+
+        results[f"scalar_bam_rows_per_s[{n_rows}]"] = n_rows / _best_time(scalar_bam, repeat)
+        results[f"scalar_fastqz_rows_per_s[{n_rows}]"] = n_rows / _best_time(scalar_fastqz, repeat)
+
+    for n_rows in BATCH_ROWS:
+        m = _manifest(n_rows)
+        results[f"batch_bam_rows_per_s[{n_rows}]"] = n_rows / _best_time(
+            lambda: estimate_bam_size_from_nreads_batch(
+                m["n_reads"], read_len=m["read_len"], percent_mapped=m["percent_mapped"],
+                supplementary_alignments=m["supplementary_alignments"]),
+            repeat)
+        results[f"batch_fastqz_rows_per_s[{n_rows}]"] = n_rows / _best_time(
+            lambda: estimate_fastqz_size_from_nreads_batch(m["n_reads"], read_len=m["read_len"]),
+            repeat)
+    return results
+
+
+def latency(repeat: int = 3) -> dict:
+    """
+    Seconds taken by the computations behind the app's reactive calcs and figures.
+    """
+    n_reads = 3_771_780_000_000
+    bam_bytes = estimate_bam_size_from_nreads(n_reads)
+    fastqz_bytes = estimate_fastqz_size_from_nreads(n_reads)
+    cohorts = intake_cohorts(np.full(60, 100.0), n_reads=100_000_000)
+    cases = {
+        "estimated_bam_size_bytes": lambda: estimate_bam_size_from_nreads(n_reads),
+        "estimated_fastqz_size_bytes": lambda: estimate_fastqz_size_from_nreads(n_reads),
+        "size_intervals": lambda: simulate_sizes(n_reads, seed=0),
+        "projected_storage": lambda: project_storage(cohorts, years=5, fastqz_retention_months=6),
+        "cheapest_tier_placement": lambda: cheapest_policy(
+            {"alignment": bam_bytes, "fastqz": fastqz_bytes}, horizon_months=60,
+            access_per_month={"alignment": 0.01, "fastqz": 0.01}),
+        "cummulative_cost_chart": lambda: plot_cummulative_cost_over_years(100.0, years=5,
+                                                                            monthly_cost_interval=(80.0, 120.0)),
+        "incremental_reads_chart": plot_incremental_reads,
+        "dragen_bam_cram_estimates_table": calculate_bam_cram_estimates_for_dragen,
+    }
+    return {f"latency_s[{name}]": _best_time(func, repeat) for name, func in cases.items()}
+
+
+def _mape(estimated, observed) -> float:
+    estimated = np.asarray(estimated, dtype=float)
+    observed = np.asarray(observed, dtype=float)
+    return float(np.mean(np.abs(estimated - observed) / observed) * 100)
+
+
+def accuracy() -> dict:
+    """
+    Mean absolute percent error of the estimators against the benchmark datasets.
+    """
+    results = {}
+    for mode, model in (("constant", None), ("fitted", default_compression_ratio_model())):
+        def bam(n, fmt):
+            return [estimate_bam_size_from_nreads(r, output_format=fmt, compression_model=model) for r in n]
+
+        general_reads = [r["num_reads"] for r in bam_general]
+        results[f"mape_pct[bam_general,BAM,{mode}]"] = _mape(bam(general_reads, "BAM"),
+                                                             [r["bytes"] for r in bam_general])
+
+        dragen = [r for r in bam_dragen if r["bam_bytes"]]
+        dragen_reads = [r["num_reads"] for r in dragen]
+        results[f"mape_pct[bam_dragen,BAM,{mode}]"] = _mape(bam(dragen_reads, "BAM"),
+                                                            [r["bam_bytes"] for r in dragen])
+        dragen = [r for r in bam_dragen if r["cram_bytes"]]
+        results[f"mape_pct[bam_dragen,CRAM,{mode}]"] = _mape(bam([r["num_reads"] for r in dragen], "CRAM"),
+                                                             [r["cram_bytes"] for r in dragen])
+
+        if mode == "constant":
+            results["mape_pct[bam_dragen,CRAM,series_model]"] = _mape(
+                [estimate_cram_size_from_nreads(r["num_reads"], quality="novaseq") for r in dragen],
+                [r["cram_bytes"] for r in dragen])
+
+        incremental = [r for r in incremental_reads if r.get("bytes_compressed")]
+        results[f"mape_pct[incremental_reads,BAM,{mode}]"] = _mape(
+            bam([r["n_reads"] for r in incremental], "BAM"), [r["bytes_compressed"] for r in incremental])
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(metrics: dict, baseline: dict, tolerance: float = 0.25, accuracy_tolerance: float = 1.0) -> list:
+    """
+    Regressions of `metrics` against `baseline`.
+
+    Parameters
+    ----------
+    metrics, baseline : dict
+        Metric values keyed by name, as produced by `throughput`, `latency` and `accuracy`.
+    tolerance : float, default=0.25
+        Allowed relative drop in throughput or rise in latency.
+    accuracy_tolerance : float, default=1.0
+        Allowed rise in percent error, in percentage points.
+
+    Returns
+    -------
+    List[str]
+        One message per regressed metric.
+    """
+    regressions = []
+    for name, value in metrics.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if name.startswith("mape_pct") and value > base + accuracy_tolerance:
+            regressions.append(f"{name}: {value:.2f}% error, baseline {base:.2f}%")
+        elif "rows_per_s" in name and value < base * (1 - tolerance):
+            regressions.append(f"{name}: {value:,.0f} rows/s, baseline {base:,.0f}")
+        elif name.startswith("latency_s") and value > base * (1 + tolerance):
+            regressions.append(f"{name}: {value * 1000:.2f} ms, baseline {base * 1000:.2f} ms")
+    return regressions
+
+
+def run(repeat: int = 3, include_performance: bool = True) -> dict:
+    """
+    Measure every benchmark and return the metrics.
+    """
+    metrics = {}
+    if include_performance:
+        metrics.update(throughput(repeat))
+        metrics.update(latency(repeat))
+    metrics.update(accuracy())
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark estimator throughput, latency and accuracy.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per timing; the fastest is kept")
+    parser.add_argument("--accuracy-only", action="store_true", help="Skip throughput and latency")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--accuracy-tolerance", type=float, default=1.0,
+                        help="Allowed rise in percent error (percentage points)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the new baseline")
+    args = parser.parse_args()
+
+    metrics = run(repeat=args.repeat, include_performance=not args.accuracy_only)
+    record = {"timestamp": time.time(), "commit": _git_commit(), "metrics": metrics}
+    with open(HISTORY_PATH, "a") as handle:
+        handle.write(json.dumps(record) + "\n")
+
+    for name, value in metrics.items():
+        print(f"{name:60} {value:,.6g}")
+
+    # accuracy is machine independent and committed; timings are only kept locally
+    accuracy_metrics = {name: value for name, value in metrics.items() if name.startswith("mape_pct")}
+    timing_metrics = {name: value for name, value in metrics.items() if name not in accuracy_metrics}
+    if args.update_baseline:
+        for path, values in ((BASELINE_PATH, accuracy_metrics), (TIMING_BASELINE_PATH, timing_metrics)):
+            if values:
+                with open(path, "w") as handle:
+                    json.dump({"commit": record["commit"], "metrics": values}, handle, indent=2)
+                    handle.write("\n")
+                print(f"Baseline written to {path}")
+        sys.exit(0)
+
+    baseline = {}
+    for path in (BASELINE_PATH, TIMING_BASELINE_PATH):
+        if os.path.exists(path):
+            with open(path) as handle:
+                baseline.update(json.load(handle)["metrics"])
+    if timing_metrics and not os.path.exists(TIMING_BASELINE_PATH):
+        print(f"No timing baseline on this machine; run with --update-baseline to write {TIMING_BASELINE_PATH}")
+    regressions = compare(metrics, baseline, args.tolerance, args.accuracy_tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,98 @@
+"""
+Import-time benchmark guarding the cold-start budget.
+
+Each module is imported in a fresh interpreter several times and the fastest run
+is compared with its budget. Modules listed in FORBIDDEN_IMPORTS must not pull in
+the heavy plotting and DataFrame libraries at import time. Exits non-zero when a
+budget is exceeded, so it can run in CI:
+
+    python benchmarks/import_time.py
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# seconds for the import itself, excluding interpreter startup
+IMPORT_BUDGETS = {
+    "src.seqstoreestimator.core": 0.05,
+    "src.seqstoreestimator": 0.05,
+    "src.Functions": 0.5,
+}
+
+FORBIDDEN_IMPORTS = {
+    "src.seqstoreestimator.core": ("numpy", "pandas", "plotly"),
+    "src.seqstoreestimator": ("numpy", "pandas", "plotly"),
+    "src.Functions": ("pandas", "plotly"),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(m.split(".")[0] for m in sys.modules)}}))
+"""
+
+
+def measure_import(module: str, repeat: int = 5) -> dict:
+    """
+    Fastest import time of `module` in a fresh interpreter, and the top-level modules it loaded.
+    """
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def check_budgets(repeat: int = 5, scale: float = 1.0) -> list:
+    """
+    Measure every module in IMPORT_BUDGETS.
+
+    Parameters
+    ----------
+    repeat : int, default=5
+        Imports per module; the fastest is kept.
+    scale : float, default=1.0
+        Multiplier on the budgets, for slower machines.
+
+    Returns
+    -------
+    List[Dict]
+        module, seconds, budget, forbidden modules loaded and ok for each module.
+    """
+    results = []
+    for module, budget in IMPORT_BUDGETS.items():
+        measured = measure_import(module, repeat=repeat)
+        loaded = sorted(set(FORBIDDEN_IMPORTS.get(module, ())) & set(measured["modules"]))
+        results.append({
+            "module": module,
+            "seconds": measured["seconds"],
+            "budget": budget * scale,
+            "forbidden_loaded": loaded,
+            "ok": measured["seconds"] <= budget * scale and not loaded,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check import times against the startup budget.")
+    parser.add_argument("--repeat", type=int, default=5, help="Imports per module; the fastest is kept")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on the budgets")
+    args = parser.parse_args()
+
+    results = check_budgets(repeat=args.repeat, scale=args.scale)
+    for r in results:
+        status = "ok" if r["ok"] else "FAIL"
+        extra = f" loaded {', '.join(r['forbidden_loaded'])}" if r["forbidden_loaded"] else ""
+        print(f"{status:4} {r['module']:35} {r['seconds'] * 1000:8.1f} ms (budget {r['budget'] * 1000:.0f} ms){extra}")
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
@@ -0,0 +1,154 @@
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+from shiny import reactive
+
+_CACHES = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def round_sig(value, digits: int = 9) -> float:
+    """
+    Round a number to `digits` significant digits, e.g. to drop floating-point noise.
+    """
+    return float(f"{float(value):.{digits}g}")
+
+
+def normalize_params(value, digits: int = 9):
+    """
+    Normalize parameters into a hashable cache key.
+
+    Floats are rounded to `digits` significant digits so values that differ only
+    by floating-point noise share a key; sequences and arrays become tuples and
+    dicts become sorted item tuples. Other hashable objects are kept in the key
+    as themselves, so the key holds a reference and compares with their own
+    equality; unhashable ones are refused.
+
+    Parameters
+    ----------
+    value : Any
+        Parameter value, possibly nested.
+    digits : int, default=9
+        Significant digits kept for floats.
+
+    Returns
+    -------
+    Hashable
+        Normalized value.
+
+    Raises
+    ------
+    TypeError
+        If `value` contains an unhashable object other than a list, array or dict.
+    """
+    if value is None or isinstance(value, (bool, str, int, np.bool_)):
+        return value.item() if isinstance(value, np.generic) else value
+    if isinstance(value, (float, np.floating)):
+        return round_sig(value, digits)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, normalize_params(v, digits)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(normalize_params(v, digits) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        raise TypeError(f"Cannot use unhashable {type(value).__name__} in a cache key") from None
+    return value
+
+
+def shared_cache(func=None, maxsize: int = 4096):
+    """
+    Process-wide LRU cache keyed by normalized arguments.
+
+    Caches are registered by the function's qualified name, so a function that is
+    redefined for every Shiny session (as in `app.py`) still shares one cache
+    across all sessions on the worker. Cached values are shared and must not be
+    mutated by callers.
+
+    Parameters
+    ----------
+    func : Callable
+        Pure function to cache.
+    maxsize : int, default=4096
+        Maximum number of cached results.
+    """
+    if func is None:
+        return lambda f: shared_cache(f, maxsize=maxsize)
+
+    name = f"{func.__module__}.{func.__qualname__}"
+    with _CACHE_LOCK:
+        cache = _CACHES.setdefault(name, OrderedDict())
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (normalize_params(args), normalize_params(kwargs))
+        with _CACHE_LOCK:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        result = func(*args, **kwargs)
+        with _CACHE_LOCK:
+            cache[key] = result
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+        return result
+
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+
+def debounce(delay_secs: float):
+    """
+    Debounce a reactive calc: dependents only update once its value has stopped
+    changing for `delay_secs` seconds.
+
+    Parameters
+    ----------
+    delay_secs : float
+        Quiet period in seconds.
+    """
+    def wrapper(f):
+        when = reactive.Value(None)
+        trigger = reactive.Value(0)
+
+        @reactive.Calc
+        def cached():
+            return copy.deepcopy(f())
+
+        @reactive.Effect(priority=102)
+        def primer():
+            try:
+                cached()
+            except Exception:
+                ...
+            finally:
+                when.set(time.time() + delay_secs)
+
+        @reactive.Effect(priority=101)
+        def timer():
+            deadline = when()
+            if deadline is None:
+                return
+            time_left = deadline - time.time()
+            if time_left <= 0:
+                with reactive.isolate():
+                    when.set(None)
+                    trigger.set(trigger.get() + 1)
+            else:
+                reactive.invalidate_later(time_left)
+
+        @reactive.Calc
+        @reactive.event(trigger, ignore_none=False)
+        def debounced():
+            return cached()
+
+        return debounced
+
+    return wrapper
@@ -0,0 +1,109 @@
+
+import asyncio
+import atexit
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from shiny import reactive
+
+from src.AppCache import normalize_params
+
+# worker processes shared by every session on this app process
+JOB_WORKERS = int(os.environ.get("SEQSTOREESTIMATOR_JOB_WORKERS", 0)) or min(os.cpu_count() or 1, 4)
+JOB_CACHE_SIZE = 32
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+_RESULTS = OrderedDict()
+
+
+def job_pool() -> ProcessPoolExecutor:
+    """
+    Process pool shared by all sessions, started on first use.
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=JOB_WORKERS)
+            atexit.register(_POOL.shutdown, wait=False, cancel_futures=True)
+        return _POOL
+
+
+async def _indexed(index: int, future):
+    return index, await asyncio.wrap_future(future)
+
+
+async def run_job(func, chunks: list, combine=None, on_progress=None, use_cache: bool = True):
+    """
+    Run `func` over chunks of work in the shared process pool without blocking the event loop.
+
+    Parameters
+    ----------
+    func : Callable
+        Picklable top-level function, called once per chunk with the chunk's
+        keyword arguments.
+    chunks : List[dict]
+        Keyword arguments for each call; more chunks give finer progress.
+    combine : Callable[[list], Any], optional
+        Merges the per-chunk results, in chunk order; by default the list of
+        results is returned.
+    on_progress : Callable[[int, int], Any], optional
+        Called with (chunks done, total chunks) after each chunk; may be async.
+    use_cache : bool, default=True
+        Reuse the result of an identical earlier job, from any session.
+
+    Returns
+    -------
+    Any
+        Combined result. Cancelling the awaiting task cancels chunks that have not
+        started; chunks already running finish in the background and are discarded.
+    """
+    key = (f"{func.__module__}.{func.__qualname__}", normalize_params(chunks))
+    if use_cache and key in _RESULTS:
+        _RESULTS.move_to_end(key)
+        return _RESULTS[key]
+
+    pool = job_pool()
+    futures = [pool.submit(func, **chunk) for chunk in chunks]
+    results = [None] * len(futures)
+    try:
+        for done, next_result in enumerate(asyncio.as_completed([_indexed(i, f) for i, f in enumerate(futures)]), 1):
+            index, results[index] = await next_result
+            if on_progress is not None:
+                progress = on_progress(done, len(futures))
+                if inspect.isawaitable(progress):
+                    await progress
+    except asyncio.CancelledError:
+        for future in futures:
+            future.cancel()
+        raise
+
+    result = combine(results) if combine is not None else results
+    if use_cache:
+        _RESULTS[key] = result
+        if len(_RESULTS) > JOB_CACHE_SIZE:
+            _RESULTS.popitem(last=False)
+    return result
+
+
+def progress_reporter(value):
+    """
+    `on_progress` callback that stores (done, total) in a reactive value.
+
+    Extended tasks run outside the reactive flush, so the value is set under the
+    reactive lock and flushed straight away for the UI to update mid-job.
+
+    Parameters
+    ----------
+    value : reactive.Value
+        Session's progress value.
+    """
+    async def report(done: int, total: int):
+        async with reactive.lock():
+            value.set((done, total))
+            await reactive.flush()
+
+    return report
@@ -0,0 +1,147 @@
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+
+import pandas as pd
+import plotly.io as pio
+
+from src.Functions import calculate_bam_cram_estimates_for_dragen, plot_incremental_reads
+
+ARTIFACT_FORMAT_VERSION = 1
+CACHE_DIR = os.environ.get(
+    "SEQSTOREESTIMATOR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "benchmarks"),
+)
+
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+# the benchmark artifacts are a function of these files only
+SOURCE_FILES = (
+    os.path.join(_SRC_DIR, "RealDatasets.py"),
+    os.path.join(_SRC_DIR, "Functions.py"),
+    os.path.join(_SRC_DIR, "seqstoreestimator", "core.py"),
+)
+
+INCREMENTAL_READS_FIGURE = "incremental_reads_figure.json"
+DRAGEN_ESTIMATES = "dragen_bam_cram_estimates.json"
+
+
+def artifact_key() -> str:
+    """
+    Version key of the benchmark artifacts: a hash of the datasets and estimator sources.
+
+    Returns
+    -------
+    str
+        Directory name for the current artifacts, e.g. "v1-3f2a9c0d1b7e".
+    """
+    digest = hashlib.sha256()
+    for path in SOURCE_FILES:
+        with open(path, "rb") as handle:
+            digest.update(handle.read())
+    return f"v{ARTIFACT_FORMAT_VERSION}-{digest.hexdigest()[:12]}"
+
+
+def build_benchmark_artifacts(cache_dir: str = CACHE_DIR, force: bool = False) -> str:
+    """
+    Precompute the Benchmarks tab figure and table into a versioned cache directory.
+
+    Artifacts are written to a temporary directory and renamed into place, so
+    concurrent workers never see a partial build. Directories from older
+    versions are removed.
+
+    Parameters
+    ----------
+    cache_dir : str, default=CACHE_DIR
+        Root of the artifact cache.
+    force : bool, default=False
+        Rebuild even if artifacts for the current version exist.
+
+    Returns
+    -------
+    str
+        Directory holding the current artifacts.
+    """
+    key = artifact_key()
+    target = os.path.join(cache_dir, key)
+    if os.path.isdir(target) and not force:
+        return target
+
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir)
+    with open(os.path.join(staging, INCREMENTAL_READS_FIGURE), "w") as handle:
+        handle.write(pio.to_json(plot_incremental_reads()))
+    with open(os.path.join(staging, DRAGEN_ESTIMATES), "w") as handle:
+        handle.write(calculate_bam_cram_estimates_for_dragen().to_json(orient="split", index=False))
+    with open(os.path.join(staging, "manifest.json"), "w") as handle:
+        json.dump({"key": key, "sources": [os.path.relpath(p, _SRC_DIR) for p in SOURCE_FILES]}, handle)
+
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    try:
+        os.replace(staging, target)
+    except OSError:
+        # another worker finished the same build first
+        shutil.rmtree(staging, ignore_errors=True)
+
+    for name in os.listdir(cache_dir):
+        if name != key and name.startswith("v") and os.path.isdir(os.path.join(cache_dir, name)):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+    return target
+
+
+@lru_cache(maxsize=1)
+def benchmark_artifacts_dir() -> str:
+    """
+    Current artifacts directory, built on first use and reused for the life of the process.
+    """
+    return build_benchmark_artifacts()
+
+
+@lru_cache(maxsize=1)
+def _incremental_reads_figure_json() -> str:
+    with open(os.path.join(benchmark_artifacts_dir(), INCREMENTAL_READS_FIGURE)) as handle:
+        return handle.read()
+
+
+def load_incremental_reads_figure():
+    """
+    Cached `plot_incremental_reads()` figure.
+
+    Returns
+    -------
+    fig : plotly.graph_objs.Figure
+        A fresh figure each call, so sessions can modify their own copy.
+    """
+    return pio.from_json(_incremental_reads_figure_json())
+
+
+@lru_cache(maxsize=1)
+def _dragen_estimates() -> pd.DataFrame:
+    with open(os.path.join(benchmark_artifacts_dir(), DRAGEN_ESTIMATES)) as handle:
+        return pd.read_json(handle, orient="split")
+
+
+def load_dragen_estimates() -> pd.DataFrame:
+    """
+    Cached `calculate_bam_cram_estimates_for_dragen()` table.
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the cached table.
+    """
+    return _dragen_estimates().copy()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute the Benchmarks tab artifacts.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Artifact cache directory")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the current version exists")
+    args = parser.parse_args()
+    print(build_benchmark_artifacts(args.cache_dir, force=args.force))
@@ -1,16 +1,40 @@
 
-import plotly.graph_objs as go
-from src.RealDatasets import incremental_reads, bam_dragen
-import pandas as pd
+from typing import TYPE_CHECKING
+from src.RealDatasets import incremental_reads, bam_dragen, bam_general
 from math import log10
-
+import numpy as np
+from functools import lru_cache
+from src.Metrics import timed, timer
+from src.seqstoreestimator.compression_model import CompressionRatioModel, observations_from_datasets
+from src.seqstoreestimator.cram_model import DEFAULT_CRAM_SIZE_MODEL, CramSizeModel
+from src.seqstoreestimator.core import (
+    AUX_TAG_TYPES,
+    BAM_FIXED_FIELDS,
+    CIGAR_MIX,
+    DEFAULT_BAM_RECORD_MODEL,
+    BamRecordModel,
+    estimate_fastqz_size,
+    fastq_bytes_per_read,
+)
+from src.seqstoreestimator.sensitivity import heatmap
+
+# plotly and pandas are imported on first use by the plotting and DataFrame
+# helpers, so estimator-only callers do not pay for them at import time
+if TYPE_CHECKING:
+    import pandas as pd
+    import plotly.graph_objs as go
+
+
+@timed()
 def estimate_bam_size_from_nreads(n_reads: int,
                                   read_len: int = 150,
                                   bam_compression_ratio: float = 0.15,
                                   cram_compression_ratio: float = 0.3,
                                   output_format: str = "CRAM",
                                   supplementary_alignments: float = 0.1,
-                                  percent_mapped: float = 0.9) -> float:
+                                  percent_mapped: float = 0.9,
+                                  compression_model: CompressionRatioModel = None,
+                                  record_profile=None) -> float:
     """
     Estimate the disk usage in bytes of a BAM/CRAM file from the number of reads.
     
@@ -30,76 +54,36 @@ def estimate_bam_size_from_nreads(n_reads: int,
         Proportion of reads with supplementary alignments.
     percent_mapped : float, default=0.9
         Proportion of reads that are mapped.
+    compression_model : CompressionRatioModel, optional
+        Fitted ratio model; when given it replaces both compression ratios with
+        values for this read count and read length.
+    record_profile : BamRecordProfile, optional
+        Empirical record profile, e.g. `BamRecordProfile.from_bam(...)`, replacing
+        the built-in CIGAR mix, read name and aux tag sizes.
         
     Returns
     -------
     float
         Estimated file size in bytes.
     """
-    bam_fixed_fields = {
-        "block_size":  {"type": "int32_t",  "bytes": 4, "description": "BAM records starts with block size"},
-        "refID":       {"type": "int32_t",  "bytes": 4, "description": "Reference sequence ID (−1 if unmapped)"},
-        "pos":         {"type": "int32_t",  "bytes": 4, "description": "0-based leftmost coordinate (POS−1)"},
-        "l_read_name": {"type": "uint8_t",  "bytes": 1, "description": "Length of read name including NUL"},
-        "mapq":        {"type": "uint8_t",  "bytes": 1, "description": "Mapping quality (MAPQ)"},
-        "bin":         {"type": "uint16_t", "bytes": 2, "description": "BAI index bin"},
-        "n_cigar_op":  {"type": "uint16_t", "bytes": 2, "description": "Number of CIGAR operations"},
-        "flag":        {"type": "uint16_t", "bytes": 2, "description": "Bitwise SAM FLAG"},
-        "l_seq":       {"type": "uint32_t", "bytes": 4, "description": "Length of the sequence"},
-        "next_refID":  {"type": "int32_t",  "bytes": 4, "description": "Reference ID of the next segment"},
-        "next_pos":    {"type": "int32_t",  "bytes": 4, "description": "0-based leftmost position of the next segment"},
-        "tlen":        {"type": "int32_t",  "bytes": 4, "description": "Template length (TLEN)"},
-    }
-
-    cigar_mix = {
-        "perfect": {"percent": 0.6, "bytes": 4},
-        "softclip": {"percent": 0.35, "bytes": 8},
-        "indel": {"percent": 0.04, "bytes": 16},
-        "complex": {"percent": 0.01, "bytes": 32},
-    }
-
-    aux_tag_types = {
-        "integer": {"bytes": 7, "description": "Integer tags (e.g. NM:i, AS:i, MQ:i)"},
-        "float": { "bytes": 8, "description": "Float tags (e.g. sd:f)"},
-        "string": {"bytes": 16, "description": "String tags (e.g. RG:Z, PG:Z, MC:Z, RX:Z)"},
-        "character": { "bytes": 4, "description": "Character tags (rare)"},
-        "array_short_integer": { "bytes": 8 + 2 * 150, "description": "Short integer arrays (e.g. cd:B:s, ce:B:s)"},
-        "array_integer": { "bytes": 8 + 4 * 0, "description": "Integer arrays"},
-        "array_float": {"bytes": 8 + 4 * 0, "description": "Float arrays"},
-    }
-
-    aux_tags = {
-        "mapped_reads": {"bytes" : aux_tag_types["integer"]["bytes"] * 4 * percent_mapped,
-                               "description": "PAS, XS, AM, SM tags for primary alignments"},
-        "core" : {"bytes": aux_tag_types["integer"]["bytes"] * 6 +  aux_tag_types["string"]["bytes"] * 4,
-                  "description": "Core auxiliary tags present in all reads NM, MQ, UQ, PQ, etc"},
-    }   
-
-
-    bam_variable_fields = {
-        "cigar":   {"bytes":  sum(v["percent"] * v["bytes"] for v in cigar_mix.values()), "description": "CIGAR operations (array of uint32_t, 4 bytes each), assumed 5 ops"},
-        "read_name":     {"bytes": 35, "description": "Read name (l_read_name bytes), assumed 35 chars + NUL"},
-        "aux_tags":     {"bytes": sum(v["bytes"] for v in aux_tags.values()), "description": "Auxiliary tags, assumed 45 bytes"},
-        "SA_tag":      {"bytes": 120 * supplementary_alignments, "description": "SA auxiliary tag for supplementary alignments"},
-    }
-
-
-    total_fixed_bytes = sum(f["bytes"] for f in bam_fixed_fields.values())
-    total_variable_bytes = sum(f["bytes"] for f in bam_variable_fields.values())
-
-
-    bytes_quality: int = read_len
-    bytes_seq: int = (read_len + 1) // 2  # 4-bit encoding
-    bytes_per_read = total_fixed_bytes + total_variable_bytes + bytes_quality + bytes_seq
-    total_bytes = n_reads * bytes_per_read
-    print( "DEBUG: Total bytes before compression:", total_bytes)
-    total_bytes *= bam_compression_ratio
-    if output_format.upper() == "CRAM":
-        total_bytes *= cram_compression_ratio 
-
-    return total_bytes 
+    if compression_model is not None:
+        bam_compression_ratio = compression_model.ratio(n_reads, read_len, "BAM")
+        if output_format.upper() == "CRAM":
+            cram_compression_ratio = compression_model.ratio(n_reads, read_len, "CRAM")
+
+    record_model = DEFAULT_BAM_RECORD_MODEL if record_profile is None else record_profile.to_record_model()
+    return record_model.estimate(
+        n_reads=n_reads,
+        read_len=read_len,
+        bam_compression_ratio=bam_compression_ratio,
+        cram_compression_ratio=cram_compression_ratio,
+        output_format=output_format,
+        supplementary_alignments=supplementary_alignments,
+        percent_mapped=percent_mapped,
+    )
 
 
+@timed()
 def estimate_fastqz_size_from_nreads(
     n_reads: int,
     read_len: int = 150,
@@ -123,33 +107,234 @@ def estimate_fastqz_size_from_nreads(
     read_name_len : int, default=20
         Length of the read name (without '@' or newline).
     """
+    return estimate_fastqz_size(
+        n_reads=n_reads,
+        read_len=read_len,
+        gzip_compression_ratio=gzip_compression_ratio,
+        pe=pe,
+        read_name_len=read_name_len,
+    )
 
-    fastq_record = {
-        "read_name": {
-            "bytes": read_name_len + 2,
-            "description": "@readname plus newline",
-        },
-        "sequence": {
-            "bytes": read_len + 1,
-            "description": "Sequence bases plus newline",
-        },
-        "separator": {
-            "bytes": 2,
-            "description": "'+' separator line plus newline",
-        },
-        "qualities": {
-            "bytes": read_len + 1,
-            "description": "Quality scores plus newline",
-        },
-    }
 
-    bytes_per_read = sum(f["bytes"] for f in fastq_record.values())
+@timed()
+def estimate_cram_size_from_nreads(n_reads: int,
+                                   read_len: int = 150,
+                                   quality: str = None,
+                                   features_per_read: float = None,
+                                   mismatch_rate: float = None,
+                                   cram_model: CramSizeModel = None) -> float:
+    """
+    Estimate CRAM file size in bytes from per-data-series costs instead of a BAM ratio.
 
-    if pe:
-        bytes_per_read *= 2
+    Parameters
+    ----------
+    n_reads : int
+        Number of sequencing reads.
+    read_len : int, default=150
+        Read length in bases.
+    quality : str, optional
+        Quality scheme: "lossless", "binned" (default), "novaseq" or "none". Leave
+        unset with a calibrated `cram_model`, which has its sample's quality cost.
+    features_per_read : float, optional
+        Mismatches, indels and soft clips per read; derived from `read_len` and
+        `mismatch_rate` by default.
+    mismatch_rate : float, optional
+        Per-base difference from the reference; defaults to the model's rate.
+    cram_model : CramSizeModel, optional
+        Model to use, e.g. from `seqstoreestimator.cram_model.calibrate_cram_model`.
+        Defaults to `DEFAULT_CRAM_SIZE_MODEL`.
 
-    total_bytes = n_reads * bytes_per_read * gzip_compression_ratio
-    return total_bytes
+    Returns
+    -------
+    float
+        Estimated file size in bytes.
+    """
+    if cram_model is None:
+        cram_model = DEFAULT_CRAM_SIZE_MODEL
+    return cram_model.estimate(n_reads, read_len=read_len, quality=quality, features_per_read=features_per_read,
+                               mismatch_rate=mismatch_rate)
+
+
+@timed()
+def estimate_bam_size_from_nreads_batch(n_reads,
+                                        read_len=150,
+                                        bam_compression_ratio=0.15,
+                                        cram_compression_ratio=0.3,
+                                        output_format="CRAM",
+                                        supplementary_alignments=0.1,
+                                        percent_mapped=0.9,
+                                        compression_model=None,
+                                        record_profile=None) -> np.ndarray:
+    """
+    Vectorized version of `estimate_bam_size_from_nreads` for many samples at once.
+
+    Every argument accepts a scalar, a NumPy array or a pandas Series; scalars are
+    broadcast against the arrays. Results are identical to calling the scalar
+    function row by row.
+
+    Parameters
+    ----------
+    n_reads : array-like of int
+        Number of sequencing reads per sample.
+    read_len : array-like of int, default=150
+        Read length in bases.
+    bam_compression_ratio : array-like of float, default=0.15
+        Compression ratio for BAM format.
+    cram_compression_ratio : array-like of float, default=0.3
+        Additional compression ratio applied when output format is CRAM.
+    output_format : str or array-like of str, default="CRAM"
+        Output format ("BAM" or "CRAM").
+    supplementary_alignments : array-like of float, default=0.1
+        Proportion of reads with supplementary alignments.
+    percent_mapped : array-like of float, default=0.9
+        Proportion of reads that are mapped.
+    compression_model : CompressionRatioModel, optional
+        Fitted ratio model replacing both compression ratios per sample.
+    record_profile : BamRecordProfile, optional
+        Empirical record profile replacing the built-in record layout.
+
+    Returns
+    -------
+    numpy.ndarray
+        Estimated file sizes in bytes.
+    """
+    is_cram = np.char.upper(np.asarray(output_format, dtype=str)) == "CRAM"
+    if compression_model is not None:
+        bam_compression_ratio = compression_model.ratio(n_reads, read_len, "BAM")
+        if is_cram.any():
+            cram_compression_ratio = compression_model.ratio(n_reads, read_len, "CRAM")
+
+    record_model = DEFAULT_BAM_RECORD_MODEL if record_profile is None else record_profile.to_record_model()
+    bytes_per_read = record_model.bytes_per_read_array(
+        read_len=read_len,
+        percent_mapped=percent_mapped,
+        supplementary_alignments=supplementary_alignments,
+    )
+    total_bytes = np.asarray(n_reads) * bytes_per_read * np.asarray(bam_compression_ratio, dtype=float)
+
+    return np.where(is_cram, total_bytes * np.asarray(cram_compression_ratio, dtype=float), total_bytes)
+
+
+@timed()
+def estimate_fastqz_size_from_nreads_batch(n_reads,
+                                           read_len=150,
+                                           gzip_compression_ratio=0.25,
+                                           pe=True,
+                                           read_name_len=20) -> np.ndarray:
+    """
+    Vectorized version of `estimate_fastqz_size_from_nreads` for many samples at once.
+
+    Every argument accepts a scalar, a NumPy array or a pandas Series; scalars are
+    broadcast against the arrays.
+
+    Parameters
+    ----------
+    n_reads : array-like of int
+        Number of sequencing fragments (read pairs if pe=True, else single-end reads).
+    read_len : array-like of int, default=150
+        Read length in bases.
+    gzip_compression_ratio : array-like of float, default=0.25
+        Compression ratio for gzip.
+    pe : array-like of bool, default=True
+        If True, counts both R1 and R2 reads.
+    read_name_len : array-like of int, default=20
+        Length of the read name (without '@' or newline).
+
+    Returns
+    -------
+    numpy.ndarray
+        Estimated gzipped FASTQ sizes in bytes.
+    """
+    n_reads = np.asarray(n_reads)
+    read_len = np.asarray(read_len)
+    read_name_len = np.asarray(read_name_len)
+
+    bytes_per_read = fastq_bytes_per_read(read_len, pe=False, read_name_len=read_name_len)
+    bytes_per_read = np.where(np.asarray(pe, dtype=bool), bytes_per_read * 2, bytes_per_read)
+
+    return n_reads * bytes_per_read * np.asarray(gzip_compression_ratio, dtype=float)
+
+
+@timed()
+def estimate_sizes_batch(n_reads,
+                         read_len=150,
+                         bam_compression_ratio=0.15,
+                         cram_compression_ratio=0.3,
+                         gzip_compression_ratio=0.25,
+                         supplementary_alignments=0.1,
+                         percent_mapped=0.9,
+                         pe=True,
+                         compression_model=None,
+                         record_profile=None) -> "pd.DataFrame":
+    """
+    Estimate BAM, CRAM and FASTQ.gz sizes for a whole sample manifest in one pass.
+
+    Parameters
+    ----------
+    n_reads : array-like of int
+        Number of sequencing reads per sample. If a pandas Series is given its
+        index is kept on the returned DataFrame.
+    read_len, bam_compression_ratio, cram_compression_ratio, supplementary_alignments, percent_mapped
+        See `estimate_bam_size_from_nreads_batch`.
+    gzip_compression_ratio, pe
+        See `estimate_fastqz_size_from_nreads_batch`.
+    compression_model : CompressionRatioModel, optional
+        Fitted ratio model replacing the BAM and CRAM compression ratios.
+    record_profile : BamRecordProfile, optional
+        Empirical record profile replacing the built-in record layout.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per sample with bam_bytes, cram_bytes and fastqz_bytes columns.
+    """
+    import pandas as pd
+
+    index = n_reads.index if isinstance(n_reads, pd.Series) else None
+    if compression_model is not None:
+        bam_compression_ratio = compression_model.ratio(n_reads, read_len, "BAM")
+        cram_compression_ratio = compression_model.ratio(n_reads, read_len, "CRAM")
+
+    bam_bytes = estimate_bam_size_from_nreads_batch(
+        n_reads=n_reads,
+        read_len=read_len,
+        bam_compression_ratio=bam_compression_ratio,
+        output_format="BAM",
+        supplementary_alignments=supplementary_alignments,
+        percent_mapped=percent_mapped,
+        record_profile=record_profile,
+    )
+    cram_bytes = bam_bytes * np.asarray(cram_compression_ratio, dtype=float)
+    fastqz_bytes = estimate_fastqz_size_from_nreads_batch(
+        n_reads=n_reads,
+        read_len=read_len,
+        gzip_compression_ratio=gzip_compression_ratio,
+        pe=pe,
+    )
+    bam_bytes, cram_bytes, fastqz_bytes = np.broadcast_arrays(
+        np.atleast_1d(bam_bytes), np.atleast_1d(cram_bytes), np.atleast_1d(fastqz_bytes)
+    )
+
+    return pd.DataFrame(
+        {"bam_bytes": bam_bytes, "cram_bytes": cram_bytes, "fastqz_bytes": fastqz_bytes},
+        index=index,
+    )
+
+
+@timed()
+@lru_cache(maxsize=1)
+def default_compression_ratio_model() -> CompressionRatioModel:
+    """
+    Compression ratio model fitted once to incremental_reads, bam_general and bam_dragen.
+
+    Returns
+    -------
+    CompressionRatioModel
+        Fitted BAM and CRAM ratio curves for 150 bp reads.
+    """
+    return CompressionRatioModel.fit(
+        observations_from_datasets(incremental_reads, bam_general, bam_dragen)
+    )
 
 
 def file_size_converter(size_in_bytes: float) -> str:
@@ -185,19 +370,21 @@ def bases_to_reads(num_bases: float, read_length: int) -> int:
     
     Parameters
     ----------
-    num_bases : float
+    num_bases : float or array-like of float
         Total number of bases.
-    read_length : int
+    read_length : int or array-like of int
         Length of each read in bases.
         
     Returns
     -------
-    int
-        Estimated number of reads.
+    int or numpy.ndarray
+        Estimated number of reads; an array when either input is an array.
     """
-    if read_length <= 0:
+    if np.any(np.asarray(read_length) <= 0):
         raise ValueError("Read length must be a positive integer.")
     
+    if np.ndim(num_bases) or np.ndim(read_length):
+        return (np.asarray(num_bases, dtype=float) / np.asarray(read_length)).astype(np.int64)
     return int(num_bases / read_length)
 
 def reads_to_bases(num_reads: int, read_length: int) -> int:
@@ -206,19 +393,21 @@ def reads_to_bases(num_reads: int, read_length: int) -> int:
     
     Parameters
     ----------
-    num_reads : int
+    num_reads : int or array-like of int
         Total number of reads.
-    read_length : int
+    read_length : int or array-like of int
         Length of each read in bases.
         
     Returns
     -------
-    int
+    int or numpy.ndarray
         Estimated number of bases.
     """
-    if read_length <= 0:
+    if np.any(np.asarray(read_length) <= 0):
         raise ValueError("Read length must be a positive integer.")
     
+    if np.ndim(num_reads) or np.ndim(read_length):
+        return np.asarray(num_reads) * np.asarray(read_length)
     return num_reads * read_length
 
 def to_bases(bases: int, unit: str) -> float:
@@ -238,27 +427,122 @@ def to_bases(bases: int, unit: str) -> float:
     return bases / unit_multipliers[unit]
 
 
-def plot_cummulative_cost_over_years(monthly_cost: float, years: int = 5) -> dict:
+@timed()
+def reads_for_coverage(coverage,
+                       reference,
+                       read_length=150,
+                       duplicate_rate=0.0,
+                       on_target_rate=None):
+    """
+    Number of reads needed for a target coverage of a genome or capture panel.
+
+    Parameters
+    ----------
+    coverage : float or array-like of float
+        Mean deduplicated on-target depth, e.g. 30 for 30x WGS or 100 for WES.
+    reference : str, float or array-like
+        Name in the reference catalog (`seqstoreestimator.references`), e.g.
+        "GRCh38" or "IDT xGen Exome v2", or a target size in bases.
+    read_length : int or array-like of int, default=150
+        Length of each read in bases.
+    duplicate_rate : float or array-like of float, default=0.0
+        Fraction of reads that are duplicates.
+    on_target_rate : float or array-like of float, optional
+        Fraction of bases on target; defaults to the catalog value.
+
+    Returns
+    -------
+    int or numpy.ndarray
+        Number of reads, ready for `estimate_bam_size_from_nreads` and the batch estimators.
+
+    Raises
+    ------
+    ValueError
+        For out-of-range rates or coverage, see `coverage_to_bases`.
+    """
+    from src.seqstoreestimator.references import coverage_to_bases
+
+    bases = coverage_to_bases(coverage, reference, duplicate_rate, on_target_rate)
+    return bases_to_reads(bases if np.ndim(bases) else float(bases), read_length)
+
+
+@timed()
+def cumulative_cost_series(monthly_cost,
+                           years: int = 5,
+                           monthly_cost_interval: tuple = None) -> dict:
+    """
+    Cumulative storage cost month by month.
+
+    Parameters
+    ----------
+    monthly_cost, years, monthly_cost_interval
+        See `plot_cummulative_cost_over_years`.
+
+    Returns
+    -------
+    dict
+        month and cumulative_cost arrays, plus cumulative_cost_low and
+        cumulative_cost_high when `monthly_cost_interval` is given.
+    """
+    n_months = years * 12
+    series = {
+        "month": np.arange(1, n_months + 1),
+        "cumulative_cost": np.cumsum(np.broadcast_to(monthly_cost, n_months)),
+    }
+    if monthly_cost_interval is not None:
+        low, high = monthly_cost_interval
+        series["cumulative_cost_low"] = np.cumsum(np.broadcast_to(low, n_months))
+        series["cumulative_cost_high"] = np.cumsum(np.broadcast_to(high, n_months))
+    return series
+
+
+@timed()
+def plot_cummulative_cost_over_years(monthly_cost,
+                                     years: int = 5,
+                                     monthly_cost_interval: tuple = None) -> dict:
     """
     Generate data for plotting monthly storage cost over a number of years.
     
     Parameters
     ----------
-    monthly_cost : float
-        Monthly storage cost in dollars.
+    monthly_cost : float or array-like of float
+        Monthly storage cost in dollars, either flat or one value per month, e.g.
+        `monthly_cost` from `seqstoreestimator.projection.project_storage`.
     years : int, default=5
         Number of years to project.
+    monthly_cost_interval : tuple, optional
+        (low, high) monthly cost, each flat or per month, e.g. P5 and P95 from
+        `seqstoreestimator.uncertainty.simulate_sizes`, drawn as a shaded band.
         
     Returns
     -------
     fig : plotly.graph_objs.Figure
-        Plotly figure object for the monthly cost over years.
+        Plotly figure object for the monthly cost over years. With an interval the
+        traces are P95, P5 and the cumulative cost, in that order.
     """
-    months = list(range(1, years * 12 + 1))
-    cumulative_cost = [monthly_cost * month for month in months]
+    import plotly.graph_objs as go
 
+    series = cumulative_cost_series(monthly_cost, years, monthly_cost_interval)
+    months = series["month"]
+    cumulative_cost = series["cumulative_cost"]
 
     fig = go.Figure()
+    if monthly_cost_interval is not None:
+        fig.add_trace(go.Scatter(
+            x=months,
+            y=series["cumulative_cost_high"],
+            mode='lines',
+            line=dict(width=0),
+            name='P95'
+        ))
+        fig.add_trace(go.Scatter(
+            x=months,
+            y=series["cumulative_cost_low"],
+            mode='lines',
+            line=dict(width=0),
+            fill='tonexty',
+            name='P5'
+        ))
     fig.add_trace(go.Scatter(
         x=months,
         y=cumulative_cost,
@@ -266,7 +550,7 @@ def plot_cummulative_cost_over_years(monthly_cost: float, years: int = 5) -> dic
         name='Cumulative Cost'
     ))
     fig.update_layout(
-        title="Cumulative Storage Cost Over 5 Years",
+        title=f"Cumulative Storage Cost Over {years} Years",
         xaxis_title="Month",
         yaxis_title="Cumulative Cost (USD)",
         template="plotly_white"
@@ -274,6 +558,48 @@ def plot_cummulative_cost_over_years(monthly_cost: float, years: int = 5) -> dic
     return fig
 
 
+@timed()
+def plot_sensitivity_heatmap(sweep_result: dict,
+                             x: str,
+                             y: str,
+                             output: str = "total_bytes"):
+    """
+    Heatmap of an estimator output over two swept parameters.
+
+    Parameters
+    ----------
+    sweep_result : dict
+        Output of `seqstoreestimator.sensitivity.sweep`.
+    x, y : str
+        Swept parameters on the x and y axes; the output is averaged over the others.
+    output : str, default="total_bytes"
+        "alignment_bytes", "fastqz_bytes" or "total_bytes".
+
+    Returns
+    -------
+    fig : plotly.graph_objs.Figure
+        Plotly heatmap with sizes in GB.
+    """
+    import plotly.graph_objs as go
+
+    x_values, y_values, z = heatmap(sweep_result, x, y, output)
+    fig = go.Figure(go.Heatmap(
+        x=x_values,
+        y=y_values,
+        z=z / (1024 ** 3),
+        colorscale="Viridis",
+        colorbar=dict(title="GB")
+    ))
+    fig.update_layout(
+        title=f"Mean {output.replace('_', ' ')} by {x} and {y}",
+        xaxis_title=x,
+        yaxis_title=y,
+        template="plotly_white"
+    )
+    return fig
+
+
+@timed()
 def plot_incremental_reads():
     """
     Plot incremental_reads dataset with n_reads on the x-axis and all other numeric fields as separate series.
@@ -283,6 +609,8 @@ def plot_incremental_reads():
     fig : plotly.graph_objs.Figure
         Plotly figure object with multiple series.
     """
+    import plotly.graph_objs as go
+
     # Extract x-axis
     x = [log10(row["n_reads"]) for row in incremental_reads]
     
@@ -309,19 +637,32 @@ def plot_incremental_reads():
 
     return fig
 
+@timed()
 def calculate_bam_cram_estimates_for_dragen(
-) -> pd.DataFrame:
+    records: list = None,
+) -> "pd.DataFrame":
     """
     For each record in bam_dragen, estimate BAM and CRAM file sizes and compare to observed values.
     Adds estimated_bam_bytes, estimated_cram_bytes, bam_percent_diff, cram_percent_diff to each record.
 
+    Parameters
+    ----------
+    records : List[Dict], optional
+        Records with num_reads, bam_bytes and cram_bytes, e.g. from
+        `seqstoreestimator.scanner.observed_bam_cram_records`. Defaults to bam_dragen.
+
     Returns
     -------
     List[Dict]
         List of records with added estimates and percent differences.
     """
+    import pandas as pd
+
+    if records is None:
+        records = bam_dragen
+
     results = []
-    for rec in bam_dragen:
+    for rec in records:
         n_reads = rec["num_reads"]
         # Estimate BAM and CRAM sizes
         est_bam = estimate_bam_size_from_nreads(
@@ -343,6 +684,7 @@ def calculate_bam_cram_estimates_for_dragen(
         new_rec["bam_percent_diff"] = bam_percent_diff
         new_rec["cram_percent_diff"] = cram_percent_diff
         results.append(new_rec)
-    results = pd.DataFrame(results)
+    with timer("src.Functions.calculate_bam_cram_estimates_for_dragen.dataframe"):
+        results = pd.DataFrame(results)
     return results
 
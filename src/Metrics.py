@@ -0,0 +1,140 @@
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# opt in with SEQSTOREESTIMATOR_METRICS=1; when off, `timed` returns functions unwrapped
+METRICS_ENABLED = os.environ.get("SEQSTOREESTIMATOR_METRICS", "").lower() not in ("", "0", "false", "no")
+N_BUCKETS = 40  # bucket b holds durations under 2**b microseconds
+
+_STATS = {}
+_STATS_LOCK = threading.Lock()
+
+
+class TimingStats:
+    """
+    Call count, total and maximum duration, and a log2 histogram of durations.
+    """
+
+    __slots__ = ("count", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * N_BUCKETS
+
+    def add(self, elapsed_ns: int):
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[min((elapsed_ns // 1000).bit_length(), N_BUCKETS - 1)] += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound in seconds of the bucket holding the `q` quantile.
+        """
+        target = q * self.count
+        seen = 0
+        for bucket, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return min(2 ** bucket / 1e6, self.max_ns / 1e9)
+        return self.max_ns / 1e9
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_s": self.total_ns / 1e9,
+            "mean_s": self.total_ns / self.count / 1e9 if self.count else 0.0,
+            "p50_s": self.quantile(0.5),
+            "p95_s": self.quantile(0.95),
+            "max_s": self.max_ns / 1e9,
+            "histogram_us": {f"<{2 ** b}": n for b, n in enumerate(self.buckets) if n},
+        }
+
+
+def record(name: str, elapsed_ns: int):
+    """
+    Add one timing, in nanoseconds, to the stats for `name`.
+    """
+    with _STATS_LOCK:
+        stats = _STATS.get(name)
+        if stats is None:
+            stats = _STATS[name] = TimingStats()
+        stats.add(elapsed_ns)
+
+
+@contextmanager
+def timer(name: str):
+    """
+    Time a block of code under `name`; does nothing unless metrics are enabled.
+
+    Examples
+    --------
+    >>> with timer("app.dragen_table.dataframe"):
+    ...     df = pd.DataFrame(rows)
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter_ns() - start)
+
+
+def timed(name: str = None):
+    """
+    Decorator timing every call of a function.
+
+    Timings are recorded under `name`, by default the function's module and
+    qualified name. When metrics are disabled the function is returned unchanged,
+    so instrumentation costs nothing in production.
+    """
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+        key = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(key, time.perf_counter_ns() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> dict:
+    """
+    Summary of every timer, slowest total first.
+    """
+    with _STATS_LOCK:
+        summaries = {name: stats.summary() for name, stats in _STATS.items()}
+    return dict(sorted(summaries.items(), key=lambda item: item[1]["total_s"], reverse=True))
+
+
+def dump_json(path: str = None) -> str:
+    """
+    Metrics as JSON with the process id and a timestamp, also written to `path` if given.
+    """
+    text = json.dumps({"pid": os.getpid(), "timestamp": time.time(), "timers": snapshot()}, indent=2)
+    if path:
+        with open(path, "w") as handle:
+            handle.write(text)
+    return text
+
+
+def reset():
+    with _STATS_LOCK:
+        _STATS.clear()
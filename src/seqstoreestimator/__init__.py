@@ -0,0 +1,41 @@
+"""
+Storage size and cost estimates for sequencing data.
+
+Importing the package only loads the dependency-free core estimators; the NumPy
+and pandas based modules are imported when first accessed, e.g.
+`seqstoreestimator.projection`.
+"""
+import importlib
+
+from .core import (
+    DEFAULT_BAM_RECORD_MODEL,
+    BamRecordModel,
+    estimate_bam_size,
+    estimate_fastqz_size,
+    fastq_bytes_per_read,
+)
+
+_LAZY_SUBMODULES = (
+    "calibration",
+    "cli",
+    "compression_model",
+    "costs",
+    "cram_model",
+    "file_index",
+    "inverse",
+    "pipeline_outputs",
+    "projection",
+    "read_lengths",
+    "record_profile",
+    "references",
+    "scanner",
+    "scheduler",
+    "sensitivity",
+    "uncertainty",
+)
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
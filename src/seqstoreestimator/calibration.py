@@ -0,0 +1,587 @@
+"""
+Calibrate compression ratios by sampling the start of real BAM, CRAM and FASTQ.gz files.
+
+Only the first records (or containers) of a file are read, block by block, so memory
+use is bounded by a single BGZF block or CRAM block header no matter how large the
+file is. Totals for the whole file are extrapolated from its size on disk.
+"""
+import os
+import struct
+import zlib
+
+from .core import DEFAULT_BAM_RECORD_MODEL, fastq_bytes_per_read
+
+BGZF_EOF_BYTES = 28
+BAM_RECORD_CORE_BYTES = 32  # fixed fields every BAM record has after block_size
+FASTQ_CHUNK_BYTES = 64 * 1024
+
+
+def _read_exact(handle, n: int) -> bytes:
+    data = handle.read(n)
+    if len(data) != n:
+        raise EOFError(f"Unexpected end of file reading {n} bytes from {getattr(handle, 'name', handle)}")
+    return data
+
+
+def _iter_bgzf_blocks(handle):
+    """
+    Yield (compressed_size, data) for each BGZF block of an open binary file.
+    """
+    while True:
+        header = handle.read(12)
+        if not header:
+            return
+        if len(header) < 12 or header[0] != 31 or header[1] != 139 or not header[3] & 4:
+            raise ValueError("Not a BGZF file: invalid gzip block header")
+        xlen = struct.unpack("<H", header[10:12])[0]
+        extra = _read_exact(handle, xlen)
+
+        block_size = None
+        offset = 0
+        while offset + 4 <= xlen:
+            si1, si2, slen = struct.unpack("<BBH", extra[offset:offset + 4])
+            if si1 == 66 and si2 == 67 and slen == 2:
+                block_size = struct.unpack("<H", extra[offset + 4:offset + 6])[0] + 1
+            offset += 4 + slen
+        if block_size is None:
+            raise ValueError("Not a BGZF file: missing BC extra subfield")
+
+        remainder = _read_exact(handle, block_size - 12 - xlen)
+        cdata = remainder[:-8]
+        data = zlib.decompress(cdata, -15) if cdata else b""
+        yield block_size, data
+
+
+def _bam_header_length(buffer, path: str):
+    """
+    Length of the BAM header at the start of `buffer`, or None until it is fully buffered.
+    """
+    if len(buffer) < 12:
+        return None
+    if bytes(buffer[:4]) != b"BAM\x01":
+        raise ValueError(f"{path} is not a BAM file")
+    pos = 8 + struct.unpack_from("<i", buffer, 4)[0]
+    if len(buffer) < pos + 4:
+        return None
+    n_ref = struct.unpack_from("<i", buffer, pos)[0]
+    pos += 4
+    for _ in range(n_ref):
+        if len(buffer) < pos + 4:
+            return None
+        l_name = struct.unpack_from("<i", buffer, pos)[0]
+        pos += 4 + l_name + 4
+    return pos if len(buffer) >= pos else None
+
+
+def _bam_block_size(buffer, pos: int, path: str) -> int:
+    """
+    block_size of the BAM record at `pos`, rejecting values too small for a record.
+    """
+    block_size = struct.unpack_from("<i", buffer, pos)[0]
+    if block_size < BAM_RECORD_CORE_BYTES:
+        raise ValueError(f"{path}: corrupt BAM record with block_size {block_size}")
+    return block_size
+
+
+def _compressed_bytes_in_range(blocks: list, start: int, end: int) -> float:
+    """
+    Compressed bytes attributable to uncompressed offsets [start, end), pro rata per block.
+    """
+    total = 0.0
+    for block_start, block_usize, block_csize in blocks:
+        if block_usize == 0:
+            continue
+        overlap = min(end, block_start + block_usize) - max(start, block_start)
+        if overlap > 0:
+            total += block_csize * overlap / block_usize
+    return total
+
+
+def _summarize(path: str,
+               file_format: str,
+               sampled_records: int,
+               bytes_uncompressed: float,
+               bytes_compressed: float,
+               overhead_bytes: float,
+               complete: bool) -> dict:
+    file_bytes = os.path.getsize(path)
+    if sampled_records:
+        bytes_per_record_compressed = bytes_compressed / sampled_records
+        bytes_per_record_uncompressed = bytes_uncompressed / sampled_records
+    else:
+        bytes_per_record_compressed = None
+        bytes_per_record_uncompressed = None
+
+    if complete or not sampled_records:
+        estimated_n_reads = sampled_records
+    else:
+        estimated_n_reads = int(round(max(file_bytes - overhead_bytes, 0) / bytes_per_record_compressed))
+
+    return {
+        "path": path,
+        "format": file_format,
+        "file_bytes": file_bytes,
+        "sampled_records": sampled_records,
+        "bytes_uncompressed": bytes_uncompressed,
+        "bytes_compressed": bytes_compressed,
+        "compression_ratio": bytes_compressed / bytes_uncompressed if bytes_uncompressed else None,
+        "bytes_per_record_uncompressed": bytes_per_record_uncompressed,
+        "bytes_per_record_compressed": bytes_per_record_compressed,
+        "estimated_n_reads": estimated_n_reads,
+        "complete": complete,
+    }
+
+
+def sample_bam(path: str, n_records: int = 100_000) -> dict:
+    """
+    Measure BAM compression from the first records of a file.
+
+    BGZF blocks are decompressed one at a time and the BAM header and records are
+    parsed from a rolling buffer, so only the blocks covering the first `n_records`
+    records are ever read.
+
+    Parameters
+    ----------
+    path : str
+        Path to a BAM file.
+    n_records : int, default=100_000
+        Number of alignment records to sample.
+
+    Returns
+    -------
+    dict
+        Sampled record count, uncompressed and compressed record bytes, the BAM
+        compression ratio, bytes per record and the extrapolated read count of
+        the whole file.
+    """
+    blocks = []
+    buffer = bytearray()
+    buffer_start = 0  # uncompressed offset of buffer[0]
+    stream_end = 0
+    header_end = None
+    records = 0
+    records_end = None
+    complete = False
+
+    with open(path, "rb") as handle:
+        block_iter = _iter_bgzf_blocks(handle)
+        while records_end is None:
+            try:
+                csize, data = next(block_iter)
+            except StopIteration:
+                complete = True
+                break
+            blocks.append((stream_end, len(data), csize))
+            stream_end += len(data)
+            buffer += data
+
+            if header_end is None:
+                header_length = _bam_header_length(buffer, path)
+                if header_length is None:
+                    continue
+                header_end = header_length
+                del buffer[:header_length]
+                buffer_start = header_end
+
+            pos = 0
+            while len(buffer) - pos >= 4:
+                block_size = _bam_block_size(buffer, pos, path)
+                if len(buffer) - pos < 4 + block_size:
+                    break
+                pos += 4 + block_size
+                records += 1
+                if records == n_records:
+                    records_end = buffer_start + pos
+                    break
+            del buffer[:pos]
+            buffer_start += pos
+
+    if header_end is None:
+        raise ValueError(f"{path} ended before the end of the BAM header")
+    if records_end is None:
+        records_end = buffer_start
+
+    header_compressed = _compressed_bytes_in_range(blocks, 0, header_end)
+    return _summarize(
+        path=path,
+        file_format="BAM",
+        sampled_records=records,
+        bytes_uncompressed=records_end - header_end,
+        bytes_compressed=_compressed_bytes_in_range(blocks, header_end, records_end),
+        overhead_bytes=header_compressed + BGZF_EOF_BYTES,
+        complete=complete,
+    )
+
+
+def iter_bam_records(path: str, n_records: int = 100_000):
+    """
+    Yield the first `n_records` alignment records of a BAM file.
+
+    Like `sample_bam`, BGZF blocks are decompressed one at a time, so memory is
+    bounded by a block plus one record.
+
+    Yields
+    ------
+    bytes
+        One record, without its leading block_size field.
+    """
+    buffer = bytearray()
+    in_header = True
+    records = 0
+    with open(path, "rb") as handle:
+        for _, data in _iter_bgzf_blocks(handle):
+            buffer += data
+            if in_header:
+                header_length = _bam_header_length(buffer, path)
+                if header_length is None:
+                    continue
+                in_header = False
+                del buffer[:header_length]
+
+            pos = 0
+            while len(buffer) - pos >= 4:
+                block_size = _bam_block_size(buffer, pos, path)
+                if len(buffer) - pos < 4 + block_size:
+                    break
+                yield bytes(buffer[pos + 4:pos + 4 + block_size])
+                pos += 4 + block_size
+                records += 1
+                if records == n_records:
+                    return
+            del buffer[:pos]
+
+
+def _read_itf8(handle) -> int:
+    b0 = _read_exact(handle, 1)[0]
+    if b0 & 0x80 == 0:
+        return b0
+    if b0 & 0x40 == 0:
+        rest = _read_exact(handle, 1)
+        return ((b0 & 0x7F) << 8) | rest[0]
+    if b0 & 0x20 == 0:
+        rest = _read_exact(handle, 2)
+        return ((b0 & 0x3F) << 16) | (rest[0] << 8) | rest[1]
+    if b0 & 0x10 == 0:
+        rest = _read_exact(handle, 3)
+        return ((b0 & 0x1F) << 24) | (rest[0] << 16) | (rest[1] << 8) | rest[2]
+    rest = _read_exact(handle, 4)
+    value = ((b0 & 0x0F) << 28) | (rest[0] << 20) | (rest[1] << 12) | (rest[2] << 4) | (rest[3] & 0x0F)
+    return value - (1 << 32) if value >= 1 << 31 else value
+
+
+def _read_ltf8(handle) -> int:
+    b0 = _read_exact(handle, 1)[0]
+    n_extra = 0
+    while n_extra < 8 and b0 & (0x80 >> n_extra):
+        n_extra += 1
+    value = b0 & (0xFF >> (n_extra + 1)) if n_extra < 8 else 0
+    for byte in _read_exact(handle, n_extra):
+        value = (value << 8) | byte
+    return value
+
+
+def read_cram_container_header(handle, major_version: int = 3):
+    """
+    Read one CRAM container header from the current position of `handle`.
+
+    Parameters
+    ----------
+    handle : binary file object
+        File positioned at the start of a container.
+    major_version : int, default=3
+        CRAM major version from the file definition (CRC32 fields exist from 3.0).
+
+    Returns
+    -------
+    dict or None
+        Container length (bytes after the header), header size, record and base
+        counts, block count and landmarks; None at end of file.
+    """
+    start = handle.tell()
+    raw_length = handle.read(4)
+    if not raw_length:
+        return None
+    if len(raw_length) < 4:
+        raise EOFError("Truncated CRAM container header")
+    length = struct.unpack("<i", raw_length)[0]
+    ref_seq_id = _read_itf8(handle)
+    _read_itf8(handle)  # alignment start
+    _read_itf8(handle)  # alignment span
+    n_records = _read_itf8(handle)
+    _read_ltf8(handle)  # record counter
+    n_bases = _read_ltf8(handle)
+    n_blocks = _read_itf8(handle)
+    landmarks = [_read_itf8(handle) for _ in range(_read_itf8(handle))]
+    if major_version >= 3:
+        _read_exact(handle, 4)  # CRC32
+
+    return {
+        "length": length,
+        "header_bytes": handle.tell() - start,
+        "ref_seq_id": ref_seq_id,
+        "n_records": n_records,
+        "n_bases": n_bases,
+        "n_blocks": n_blocks,
+        "landmarks": landmarks,
+    }
+
+
+def read_cram_file_definition(handle) -> tuple:
+    """
+    Read the 26-byte CRAM file definition and return (major, minor) version.
+    """
+    definition = _read_exact(handle, 26)
+    if definition[:4] != b"CRAM":
+        raise ValueError("Not a CRAM file: missing CRAM magic")
+    return definition[4], definition[5]
+
+
+def read_cram_block(handle, major_version: int = 3, read_data: bool = False) -> dict:
+    """
+    Read one CRAM block header, returning its payload only when `read_data` is True.
+
+    Parameters
+    ----------
+    handle : binary file object
+        File positioned at the start of a block.
+    major_version : int, default=3
+        CRAM major version (blocks carry a CRC32 from 3.0).
+    read_data : bool, default=False
+        Read and decompress the payload instead of seeking past it. Only raw,
+        gzip, bzip2 and lzma payloads can be decompressed.
+
+    Returns
+    -------
+    dict
+        method, content_type, content_id, compressed_size (payload bytes),
+        raw_size, block_bytes (header, payload and CRC) and data (or None).
+    """
+    start = handle.tell()
+    method, content_type = _read_exact(handle, 2)
+    content_id = _read_itf8(handle)
+    compressed_size = _read_itf8(handle)
+    raw_size = _read_itf8(handle)
+    data = None
+    if read_data:
+        payload = _read_exact(handle, compressed_size)
+        if method == 0:
+            data = payload
+        elif method == 1:
+            data = zlib.decompress(payload, 31)
+        elif method == 2:
+            import bz2
+            data = bz2.decompress(payload)
+        elif method == 3:
+            import lzma
+            data = lzma.decompress(payload)
+        else:
+            raise ValueError(f"Cannot decompress CRAM block with compression method {method}")
+        if major_version >= 3:
+            _read_exact(handle, 4)
+    else:
+        handle.seek(compressed_size + (4 if major_version >= 3 else 0), os.SEEK_CUR)
+    return {
+        "method": method,
+        "content_type": content_type,
+        "content_id": content_id,
+        "compressed_size": compressed_size,
+        "raw_size": raw_size,
+        "block_bytes": handle.tell() - start,
+        "data": data,
+    }
+
+
+def sample_cram(path: str, n_containers: int = 20) -> dict:
+    """
+    Measure CRAM compression from the first data containers of a file.
+
+    Only container and block headers are read; block payloads are skipped with
+    seeks, so nothing is decompressed.
+
+    Parameters
+    ----------
+    path : str
+        Path to a CRAM file.
+    n_containers : int, default=20
+        Number of data containers (after the SAM header container) to sample.
+
+    Returns
+    -------
+    dict
+        Sampled record count, raw and compressed block bytes, the CRAM block
+        compression ratio, bytes per record and the extrapolated read count of
+        the whole file.
+    """
+    records = 0
+    bytes_raw = 0
+    bytes_compressed = 0
+    overhead = 26
+    containers = 0
+    complete = False
+
+    with open(path, "rb") as handle:
+        major_version, _ = read_cram_file_definition(handle)
+        while containers < n_containers:
+            header = read_cram_container_header(handle, major_version)
+            if header is None:
+                complete = True
+                break
+            data_start = handle.tell()
+            if header["n_records"] == 0:
+                overhead += header["header_bytes"] + header["length"]
+                handle.seek(data_start + header["length"])
+                continue
+
+            for _ in range(header["n_blocks"]):
+                if handle.tell() >= data_start + header["length"]:
+                    break
+                bytes_raw += read_cram_block(handle, major_version)["raw_size"]
+            handle.seek(data_start + header["length"])
+
+            records += header["n_records"]
+            bytes_compressed += header["header_bytes"] + header["length"]
+            containers += 1
+
+    return _summarize(
+        path=path,
+        file_format="CRAM",
+        sampled_records=records,
+        bytes_uncompressed=bytes_raw,
+        bytes_compressed=bytes_compressed,
+        overhead_bytes=overhead,
+        complete=complete,
+    )
+
+
+def sample_fastqz(path: str, n_records: int = 100_000) -> dict:
+    """
+    Measure gzip compression from the first records of a FASTQ.gz file.
+
+    The file is decompressed in small chunks until `n_records` four-line records
+    have been seen. Multi-member gzip files (including BGZF) are supported; a
+    file ending inside a gzip member raises EOFError.
+
+    Parameters
+    ----------
+    path : str
+        Path to a gzipped FASTQ file.
+    n_records : int, default=100_000
+        Number of FASTQ records to sample.
+
+    Returns
+    -------
+    dict
+        Sampled record count, uncompressed and compressed bytes, the gzip
+        compression ratio, bytes per record and the extrapolated read count of
+        the whole file.
+    """
+    target_lines = 4 * n_records
+    lines = 0
+    consumed = 0
+    produced = 0
+    records_bytes = None
+    complete = False
+
+    decompressor = zlib.decompressobj(wbits=31)
+    in_member = False
+    with open(path, "rb") as handle:
+        while records_bytes is None:
+            chunk = handle.read(FASTQ_CHUNK_BYTES)
+            if not chunk:
+                if in_member:
+                    raise EOFError(f"{path} ended inside a gzip member")
+                complete = True
+                break
+            while chunk:
+                data = decompressor.decompress(chunk)
+                # input after the end of a member is left in unused_data for the next one
+                consumed += len(chunk) - len(decompressor.unused_data)
+                chunk = decompressor.unused_data
+                in_member = not decompressor.eof
+                if decompressor.eof:
+                    decompressor = zlib.decompressobj(wbits=31)
+
+                newlines = data.count(b"\n")
+                if lines + newlines >= target_lines:
+                    pos = -1
+                    for _ in range(target_lines - lines):
+                        pos = data.index(b"\n", pos + 1)
+                    records_bytes = produced + pos + 1
+                    lines = target_lines
+                else:
+                    lines += newlines
+                produced += len(data)
+                if records_bytes is not None:
+                    break
+
+    if records_bytes is None:
+        records_bytes = produced
+    records = lines // 4
+    ratio = consumed / produced if produced else 0.0
+    return _summarize(
+        path=path,
+        file_format="FASTQ.gz",
+        sampled_records=records,
+        bytes_uncompressed=records_bytes,
+        bytes_compressed=records_bytes * ratio if not complete else consumed,
+        overhead_bytes=0,
+        complete=complete,
+    )
+
+
+def sample_file(path: str, n_records: int = 100_000) -> dict:
+    """
+    Sample a BAM, CRAM or FASTQ.gz file, choosing the reader from its extension.
+
+    For CRAM files `n_records` is converted to a container count assuming about
+    10,000 records per container.
+    """
+    name = path.lower()
+    if name.endswith(".bam"):
+        return sample_bam(path, n_records=n_records)
+    if name.endswith(".cram"):
+        return sample_cram(path, n_containers=max(1, n_records // 10_000))
+    if name.endswith((".fastq.gz", ".fq.gz")):
+        return sample_fastqz(path, n_records=n_records)
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+def calibrate_compression_ratios(bam_sample: dict = None,
+                                 cram_sample: dict = None,
+                                 fastqz_sample: dict = None,
+                                 read_len: int = 150,
+                                 percent_mapped: float = 0.9,
+                                 supplementary_alignments: float = 0.1,
+                                 read_name_len: int = 20,
+                                 bam_compression_ratio: float = 0.15) -> dict:
+    """
+    Convert file samples into the ratios used by the estimators.
+
+    The CRAM ratio is relative to the compressed BAM size, as in
+    `estimate_bam_size_from_nreads`. When no BAM sample is given it is derived
+    against the modelled BAM size using `bam_compression_ratio`. The FASTQ.gz
+    sample is compared with one modelled FASTQ record, i.e. one mate.
+
+    Returns
+    -------
+    dict
+        Keys bam_compression_ratio, cram_compression_ratio and
+        gzip_compression_ratio; None for formats without a sample.
+    """
+    ratios = {"bam_compression_ratio": None, "cram_compression_ratio": None, "gzip_compression_ratio": None}
+    model_bytes_per_read = DEFAULT_BAM_RECORD_MODEL.bytes_per_read(read_len, percent_mapped, supplementary_alignments)
+
+    if bam_sample and bam_sample["sampled_records"]:
+        bam_compressed_per_read = bam_sample["bytes_per_record_compressed"]
+        ratios["bam_compression_ratio"] = bam_compressed_per_read / model_bytes_per_read
+    else:
+        bam_compressed_per_read = model_bytes_per_read * bam_compression_ratio
+
+    if cram_sample and cram_sample["sampled_records"]:
+        ratios["cram_compression_ratio"] = cram_sample["bytes_per_record_compressed"] / bam_compressed_per_read
+
+    if fastqz_sample and fastqz_sample["sampled_records"]:
+        fastq_bytes = fastq_bytes_per_read(read_len, pe=False, read_name_len=read_name_len)
+        ratios["gzip_compression_ratio"] = fastqz_sample["bytes_per_record_compressed"] / fastq_bytes
+
+    return ratios
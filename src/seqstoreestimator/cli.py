@@ -0,0 +1,321 @@
+"""
+Headless bulk estimation from a CSV/TSV sample sheet.
+
+The sheet is read in row chunks and each chunk is estimated with the vectorized
+byte models, so memory stays constant however many samples the sheet holds. Large
+sheets are spread over a process pool, with a bounded number of chunks in flight.
+"""
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .core import DEFAULT_BAM_RECORD_MODEL, fastq_bytes_per_read
+
+BYTES_PER_GB = 1024 ** 3
+SIZE_COLUMNS = ["bam_bytes", "cram_bytes", "fastqz_bytes", "stored_bytes", "monthly_cost"]
+
+# accepted sample sheet headers for each estimator parameter
+COLUMN_ALIASES = {
+    "sample": ("sample", "sample_id", "sample_name"),
+    "n_reads": ("n_reads", "reads", "num_reads"),
+    "read_len": ("read_len", "read_length"),
+    "output_format": ("output_format", "format"),
+    "percent_mapped": ("percent_mapped", "mapped"),
+    "supplementary_alignments": ("supplementary_alignments",),
+    "pe": ("pe", "paired"),
+    "bam_compression_ratio": ("bam_compression_ratio",),
+    "cram_compression_ratio": ("cram_compression_ratio",),
+    "gzip_compression_ratio": ("gzip_compression_ratio", "fastq_gzip_compression_ratio"),
+}
+
+DEFAULTS = {
+    "read_len": 150,
+    "output_format": "CRAM",
+    "percent_mapped": 0.9,
+    "supplementary_alignments": 0.1,
+    "pe": True,
+    "bam_compression_ratio": 0.15,
+    "cram_compression_ratio": 0.3,
+    "gzip_compression_ratio": 0.25,
+}
+
+
+def _column_mapping(columns) -> dict:
+    lowered = {c.strip().lower(): c for c in columns}
+    mapping = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered:
+                mapping[lowered[alias]] = name
+                break
+    if "n_reads" not in mapping.values():
+        raise ValueError(f"Sample sheet needs a read count column, one of {COLUMN_ALIASES['n_reads']}")
+    return mapping
+
+
+def _param_column(sheet: pd.DataFrame, name: str, default) -> pd.Series:
+    """
+    Column `name` of the sheet cast to the type of its default, with empty cells filled.
+    """
+    if name not in sheet:
+        return pd.Series(default, index=sheet.index)
+    column = sheet[name]
+    # cast before filling: fillna on object columns would silently downcast them
+    if isinstance(default, (bool, str)):
+        return column.astype("string").fillna(str(default))
+    return pd.to_numeric(column, errors="coerce").astype(float).fillna(default)
+
+
+def invalid_read_counts(sheet: pd.DataFrame) -> pd.Series:
+    """
+    Boolean mask of rows whose read count is empty, non-numeric, infinite or negative.
+
+    `sheet` uses the renamed columns from `_column_mapping`.
+    """
+    n_reads = pd.to_numeric(sheet["n_reads"], errors="coerce").astype(float)
+    return ~(np.isfinite(n_reads) & (n_reads >= 0))
+
+
+def row_problems(sheet: pd.DataFrame, defaults: dict = None) -> pd.Series:
+    """
+    Why each row of a sample sheet cannot be estimated, or None for valid rows.
+
+    A row needs a valid read count (see `invalid_read_counts`), and every numeric
+    parameter it sets must parse as a number. `sheet` uses the renamed columns
+    from `_column_mapping`.
+    """
+    problems = pd.Series(None, index=sheet.index, dtype=object)
+    for name, default in {**DEFAULTS, **(defaults or {})}.items():
+        if name not in sheet or isinstance(default, (bool, str)):
+            continue
+        column = sheet[name]
+        bad = column.notna() & pd.to_numeric(column, errors="coerce").isna()
+        problems[bad] = [f"{name} {value!r} is not a number" for value in column[bad]]
+    invalid = invalid_read_counts(sheet)
+    problems[invalid] = ["n_reads is empty" if pd.isna(value) else f"n_reads {value!r} is not a non-negative number"
+                         for value in sheet.loc[invalid, "n_reads"]]
+    return problems
+
+
+def estimate_chunk(chunk: pd.DataFrame,
+                   defaults: dict = None,
+                   cost_per_month_per_gb: float = 0.0064,
+                   include_fastqz: bool = True) -> pd.DataFrame:
+    """
+    Estimate BAM, CRAM and FASTQ.gz sizes and monthly cost for a chunk of a sample sheet.
+
+    Parameters
+    ----------
+    chunk : pd.DataFrame
+        Sample sheet rows; columns may use any header in `COLUMN_ALIASES`. Missing
+        columns and empty cells take their value from `defaults`, except the read
+        count, which every row must have.
+    defaults : dict, optional
+        Parameter defaults, overriding `DEFAULTS`.
+    cost_per_month_per_gb : float, default=0.0064
+        Storage price in dollars per GB per month.
+    include_fastqz : bool, default=True
+        Count the FASTQ.gz in stored_bytes and monthly_cost.
+
+    Returns
+    -------
+    pd.DataFrame
+        sample, n_reads, read_len, output_format and the `SIZE_COLUMNS`.
+        stored_bytes is the BAM or CRAM size, per output_format, plus the FASTQ.gz
+        when `include_fastqz` is True.
+
+    Raises
+    ------
+    ValueError
+        If a row has no valid read count or a non-numeric parameter (see
+        `row_problems`); the message lists sheet line numbers, counting the header
+        as line 1 as `pandas.read_csv` chunks are indexed.
+    """
+    defaults = {**DEFAULTS, **(defaults or {})}
+    sheet = chunk.rename(columns=_column_mapping(chunk.columns))
+    problems = row_problems(sheet, defaults).dropna()
+    if len(problems):
+        lines = "; ".join(f"line {i + 2}: {problem}" for i, problem in problems.iloc[:10].items())
+        raise ValueError(f"Sample sheet rows cannot be estimated ({lines})")
+    params = {name: _param_column(sheet, name, default) for name, default in defaults.items()}
+
+    n_reads = pd.to_numeric(sheet["n_reads"]).to_numpy(dtype=float)
+    read_len = params["read_len"].to_numpy(dtype=int)
+    pe = params["pe"].astype(str).str.lower().isin(["true", "1", "yes", "pe"]).to_numpy()
+    is_cram = params["output_format"].astype(str).str.upper().to_numpy() == "CRAM"
+
+    bytes_per_read = DEFAULT_BAM_RECORD_MODEL.bytes_per_read_array(
+        read_len=read_len,
+        percent_mapped=params["percent_mapped"].to_numpy(dtype=float),
+        supplementary_alignments=params["supplementary_alignments"].to_numpy(dtype=float),
+    )
+    bam_bytes = n_reads * bytes_per_read * params["bam_compression_ratio"].to_numpy(dtype=float)
+    cram_bytes = bam_bytes * params["cram_compression_ratio"].to_numpy(dtype=float)
+    fastq_bytes = np.where(pe, fastq_bytes_per_read(read_len, pe=True), fastq_bytes_per_read(read_len, pe=False))
+    fastqz_bytes = n_reads * fastq_bytes * params["gzip_compression_ratio"].to_numpy(dtype=float)
+
+    stored_bytes = np.where(is_cram, cram_bytes, bam_bytes)
+    if include_fastqz:
+        stored_bytes = stored_bytes + fastqz_bytes
+
+    return pd.DataFrame({
+        "sample": sheet["sample"] if "sample" in sheet else sheet.index,
+        "n_reads": n_reads.astype(np.int64),
+        "read_len": read_len,
+        "output_format": np.where(is_cram, "CRAM", "BAM"),
+        "bam_bytes": bam_bytes,
+        "cram_bytes": cram_bytes,
+        "fastqz_bytes": fastqz_bytes,
+        "stored_bytes": stored_bytes,
+        "monthly_cost": stored_bytes * (cost_per_month_per_gb / BYTES_PER_GB),
+    })
+
+
+def _drop_invalid_rows(chunks, skipped: list, source: str = "sample sheet", defaults: dict = None):
+    """
+    Yield chunks without the rows flagged by `row_problems`, reporting each on stderr.
+
+    Sheet line numbers of the dropped rows are appended to `skipped`.
+    """
+    for chunk in chunks:
+        sheet = chunk.rename(columns=_column_mapping(chunk.columns))
+        problems = row_problems(sheet, defaults)
+        invalid = problems.notna()
+        if invalid.any():
+            for i, problem in problems[invalid].items():
+                print(f"{source}:{i + 2}: skipped, {problem}", file=sys.stderr)
+                skipped.append(i + 2)
+            chunk = chunk[~invalid.to_numpy()]
+        yield chunk
+
+
+def _iter_estimates(chunks, jobs: int, **kwargs):
+    """
+    Yield estimated chunks in input order, on `jobs` processes when `jobs` > 1.
+    """
+    if jobs <= 1:
+        for chunk in chunks:
+            yield estimate_chunk(chunk, **kwargs)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(estimate_chunk, chunk, **kwargs))
+            if len(in_flight) >= jobs * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def estimate_sample_sheet(sample_sheet: str,
+                          output=None,
+                          chunksize: int = 100_000,
+                          jobs: int = 1,
+                          sep: str = None,
+                          defaults: dict = None,
+                          cost_per_month_per_gb: float = 0.0064,
+                          include_fastqz: bool = True) -> dict:
+    """
+    Stream a sample sheet, writing per-sample estimates and returning the totals.
+
+    Rows without a valid read count or with a non-numeric parameter are skipped
+    and reported on stderr.
+
+    Parameters
+    ----------
+    sample_sheet : str
+        CSV or TSV file, or "-" for stdin.
+    output : str or file-like, optional
+        Where to write per-sample rows as CSV; skipped when None.
+    chunksize : int, default=100_000
+        Rows read and estimated at a time.
+    jobs : int, default=1
+        Worker processes; chunks are estimated in parallel when greater than 1.
+    sep : str, optional
+        Field separator; inferred from the extension (tab for .tsv/.txt) if omitted.
+    defaults, cost_per_month_per_gb, include_fastqz
+        See `estimate_chunk`.
+
+    Returns
+    -------
+    dict
+        Number of samples, total reads, the sum of each of `SIZE_COLUMNS` and the
+        number of skipped rows.
+    """
+    if sep is None:
+        sep = "\t" if str(sample_sheet).lower().endswith((".tsv", ".txt", ".tsv.gz")) else ","
+    source = sys.stdin if sample_sheet == "-" else sample_sheet
+    skipped = []
+    chunks = _drop_invalid_rows(pd.read_csv(source, sep=sep, chunksize=chunksize), skipped,
+                                source="<stdin>" if sample_sheet == "-" else str(sample_sheet),
+                                defaults=defaults)
+
+    totals = {"samples": 0, "n_reads": 0, **{c: 0.0 for c in SIZE_COLUMNS}}
+    header = True
+    for estimates in _iter_estimates(chunks, jobs, defaults=defaults,
+                                     cost_per_month_per_gb=cost_per_month_per_gb,
+                                     include_fastqz=include_fastqz):
+        totals["samples"] += len(estimates)
+        totals["n_reads"] += int(estimates["n_reads"].sum())
+        for column in SIZE_COLUMNS:
+            totals[column] += float(estimates[column].sum())
+        if output is not None:
+            estimates.to_csv(output, mode="w" if header else "a", header=header, index=False)
+            header = False
+    totals["skipped_rows"] = len(skipped)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="seqstoreestimator",
+        description="Estimate BAM/CRAM/FASTQ.gz sizes and monthly storage cost for a sample sheet.",
+    )
+    parser.add_argument("sample_sheet", help="CSV/TSV with sample, reads, read_length, format, ... columns ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="Write per-sample estimates to this CSV ('-' for stdout)")
+    parser.add_argument("--totals", help="Write totals to this CSV instead of stderr")
+    parser.add_argument("--sep", help="Sample sheet field separator (default: from extension)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows processed at a time")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Worker processes (default: all cores for sheets over 50 MB, else 1)")
+    parser.add_argument("--cost-per-month-per-gb", type=float, default=0.0064, help="Storage price in $ per GB-month")
+    parser.add_argument("--exclude-fastqz", action="store_true", help="Leave FASTQ.gz out of stored bytes and cost")
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, default=default,
+                            type=type(default) if not isinstance(default, bool) else str,
+                            help=f"Default {name} for rows that do not set it (default: {default})")
+    args = parser.parse_args(argv)
+
+    jobs = args.jobs
+    if jobs <= 0:
+        large = args.sample_sheet != "-" and os.path.getsize(args.sample_sheet) > 50 * 1024 ** 2
+        jobs = (os.cpu_count() or 1) if large else 1
+
+    output = sys.stdout if args.output == "-" else args.output
+    totals = estimate_sample_sheet(
+        args.sample_sheet,
+        output=output,
+        chunksize=args.chunksize,
+        jobs=jobs,
+        sep=args.sep,
+        defaults={name: getattr(args, name) for name in DEFAULTS},
+        cost_per_month_per_gb=args.cost_per_month_per_gb,
+        include_fastqz=not args.exclude_fastqz,
+    )
+    if args.totals:
+        pd.DataFrame([totals]).to_csv(args.totals, index=False)
+    else:
+        for name, value in totals.items():
+            print(f"{name}\t{value}", file=sys.stderr)
+    if totals["skipped_rows"]:
+        sys.exit(f"seqstoreestimator: skipped {totals['skipped_rows']} invalid row(s)")
+
+
+if __name__ == "__main__":
+    main()
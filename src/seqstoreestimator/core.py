@@ -0,0 +1,222 @@
+"""
+Core BAM record byte model shared by the scalar and batch estimators.
+
+Only the standard library is imported here, so pipelines and the CLI can estimate
+sizes without loading NumPy, pandas or plotly; NumPy is imported on first use by
+the array helpers.
+"""
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+BAM_FIXED_FIELDS = {
+    "block_size":  {"type": "int32_t",  "bytes": 4, "description": "BAM records starts with block size"},
+    "refID":       {"type": "int32_t",  "bytes": 4, "description": "Reference sequence ID (−1 if unmapped)"},
+    "pos":         {"type": "int32_t",  "bytes": 4, "description": "0-based leftmost coordinate (POS−1)"},
+    "l_read_name": {"type": "uint8_t",  "bytes": 1, "description": "Length of read name including NUL"},
+    "mapq":        {"type": "uint8_t",  "bytes": 1, "description": "Mapping quality (MAPQ)"},
+    "bin":         {"type": "uint16_t", "bytes": 2, "description": "BAI index bin"},
+    "n_cigar_op":  {"type": "uint16_t", "bytes": 2, "description": "Number of CIGAR operations"},
+    "flag":        {"type": "uint16_t", "bytes": 2, "description": "Bitwise SAM FLAG"},
+    "l_seq":       {"type": "uint32_t", "bytes": 4, "description": "Length of the sequence"},
+    "next_refID":  {"type": "int32_t",  "bytes": 4, "description": "Reference ID of the next segment"},
+    "next_pos":    {"type": "int32_t",  "bytes": 4, "description": "0-based leftmost position of the next segment"},
+    "tlen":        {"type": "int32_t",  "bytes": 4, "description": "Template length (TLEN)"},
+}
+
+CIGAR_MIX = {
+    "perfect": {"percent": 0.6, "bytes": 4},
+    "softclip": {"percent": 0.35, "bytes": 8},
+    "indel": {"percent": 0.04, "bytes": 16},
+    "complex": {"percent": 0.01, "bytes": 32},
+}
+
+AUX_TAG_TYPES = {
+    "integer": {"bytes": 7, "description": "Integer tags (e.g. NM:i, AS:i, MQ:i)"},
+    "float": { "bytes": 8, "description": "Float tags (e.g. sd:f)"},
+    "string": {"bytes": 16, "description": "String tags (e.g. RG:Z, PG:Z, MC:Z, RX:Z)"},
+    "character": { "bytes": 4, "description": "Character tags (rare)"},
+    "array_short_integer": { "bytes": 8 + 2 * 150, "description": "Short integer arrays (e.g. cd:B:s, ce:B:s)"},
+    "array_integer": { "bytes": 8 + 4 * 0, "description": "Integer arrays"},
+    "array_float": {"bytes": 8 + 4 * 0, "description": "Float arrays"},
+}
+
+AUX_TAGS = {
+    "mapped_reads": {"count": {"integer": 4}, "per_mapped_read": True,
+                     "description": "PAS, XS, AM, SM tags for primary alignments"},
+    "core": {"count": {"integer": 6, "string": 4}, "per_mapped_read": False,
+             "description": "Core auxiliary tags present in all reads NM, MQ, UQ, PQ, etc"},
+}
+
+
+class BamRecordModel:
+    """
+    Precompiled byte model of a single uncompressed BAM record.
+
+    The layout tables are summed once when the model is built. Only `read_len`,
+    `percent_mapped` and `supplementary_alignments` change the per-read cost, so
+    `bytes_per_read` is memoized on those three values with LRU eviction.
+
+    Parameters
+    ----------
+    fixed_fields : dict, default=BAM_FIXED_FIELDS
+        Fixed-size fields of a BAM record.
+    cigar_mix : dict, default=CIGAR_MIX
+        Fraction of reads and CIGAR bytes for each alignment class.
+    aux_tag_types : dict, default=AUX_TAG_TYPES
+        Encoded size of each auxiliary tag type.
+    aux_tags : dict, default=AUX_TAGS
+        Number of tags of each type written per read.
+    read_name_bytes : float, default=35
+        Read name length including NUL.
+    sa_tag_bytes : float, default=120
+        Size of the SA tag on reads with supplementary alignments.
+    aux_bytes_per_base : float, default=0
+        Auxiliary tag bytes per base of read length, for array tags that scale
+        with the read (e.g. per-base B:s arrays).
+    cache_size : int, default=1024
+        Maximum number of parameter combinations kept by `bytes_per_read`.
+    """
+
+    def __init__(self,
+                 fixed_fields: dict = BAM_FIXED_FIELDS,
+                 cigar_mix: dict = CIGAR_MIX,
+                 aux_tag_types: dict = AUX_TAG_TYPES,
+                 aux_tags: dict = AUX_TAGS,
+                 read_name_bytes: float = 35,
+                 sa_tag_bytes: float = 120,
+                 aux_bytes_per_base: float = 0,
+                 cache_size: int = 1024):
+        self.fixed_bytes = sum(f["bytes"] for f in fixed_fields.values())
+        self.cigar_bytes = sum(v["percent"] * v["bytes"] for v in cigar_mix.values())
+        self.read_name_bytes = read_name_bytes
+        self.sa_tag_bytes = sa_tag_bytes
+        self.aux_bytes_per_base = aux_bytes_per_base
+
+        self.mapped_aux_bytes = 0
+        self.per_read_aux_bytes = 0
+        for tag in aux_tags.values():
+            tag_bytes = sum(aux_tag_types[t]["bytes"] * n for t, n in tag["count"].items())
+            if tag["per_mapped_read"]:
+                self.mapped_aux_bytes += tag_bytes
+            else:
+                self.per_read_aux_bytes += tag_bytes
+
+        self.bytes_per_read = lru_cache(maxsize=cache_size)(self._bytes_per_read)
+
+    def _bytes_per_read(self,
+                        read_len: int,
+                        percent_mapped: float,
+                        supplementary_alignments: float,
+                        cigar_bytes: float = None) -> float:
+        if cigar_bytes is None:
+            cigar_bytes = self.cigar_bytes
+        aux_tag_bytes = (self.mapped_aux_bytes * percent_mapped + self.per_read_aux_bytes
+                         + self.aux_bytes_per_base * read_len)
+        total_variable_bytes = (cigar_bytes + self.read_name_bytes + aux_tag_bytes
+                                + self.sa_tag_bytes * supplementary_alignments)
+        bytes_quality = read_len
+        bytes_seq = (read_len + 1) // 2  # 4-bit encoding
+        return self.fixed_bytes + total_variable_bytes + bytes_quality + bytes_seq
+
+    def bytes_per_read_array(self, read_len, percent_mapped, supplementary_alignments, cigar_bytes=None):
+        """
+        Uncompressed bytes per read for arrays of parameters.
+
+        Parameters
+        ----------
+        read_len : array-like of int
+            Read length in bases.
+        percent_mapped : array-like of float
+            Proportion of reads that are mapped.
+        supplementary_alignments : array-like of float
+            Proportion of reads with supplementary alignments.
+        cigar_bytes : array-like of float, optional
+            Mean CIGAR bytes per read, overriding the model's CIGAR mix.
+
+        Returns
+        -------
+        numpy.ndarray
+            Bytes per read, broadcast over the inputs.
+        """
+        import numpy as np
+
+        return self._bytes_per_read(
+            np.asarray(read_len),
+            np.asarray(percent_mapped, dtype=float),
+            np.asarray(supplementary_alignments, dtype=float),
+            None if cigar_bytes is None else np.asarray(cigar_bytes, dtype=float),
+        )
+
+    def estimate(self,
+                 n_reads: int,
+                 read_len: int = 150,
+                 bam_compression_ratio: float = 0.15,
+                 cram_compression_ratio: float = 0.3,
+                 output_format: str = "CRAM",
+                 supplementary_alignments: float = 0.1,
+                 percent_mapped: float = 0.9) -> float:
+        """
+        Estimate the disk usage in bytes of a BAM/CRAM file from the number of reads.
+
+        See `estimate_bam_size_from_nreads` for the parameters.
+        """
+        total_bytes = n_reads * self.bytes_per_read(read_len, percent_mapped, supplementary_alignments)
+        logger.debug("Total bytes before compression: %s", total_bytes)
+        total_bytes *= bam_compression_ratio
+        if output_format.upper() == "CRAM":
+            total_bytes *= cram_compression_ratio
+
+        return total_bytes
+
+
+DEFAULT_BAM_RECORD_MODEL = BamRecordModel()
+
+
+def fastq_bytes_per_read(read_len, pe: bool = True, read_name_len=20):
+    """
+    Uncompressed FASTQ bytes per fragment.
+
+    Counts the read name, sequence, separator and quality lines with their
+    newlines, for both mates when `pe` is True. Works on scalars and NumPy arrays.
+    """
+    bytes_per_read = (read_name_len + 2) + (read_len + 1) + 2 + (read_len + 1)
+    return bytes_per_read * 2 if pe else bytes_per_read
+
+
+def estimate_bam_size(n_reads: int,
+                      read_len: int = 150,
+                      bam_compression_ratio: float = 0.15,
+                      cram_compression_ratio: float = 0.3,
+                      output_format: str = "CRAM",
+                      supplementary_alignments: float = 0.1,
+                      percent_mapped: float = 0.9) -> float:
+    """
+    Estimate the disk usage in bytes of a BAM/CRAM file from the number of reads.
+
+    Dependency-free equivalent of `estimate_bam_size_from_nreads` without a
+    fitted compression model.
+    """
+    return DEFAULT_BAM_RECORD_MODEL.estimate(
+        n_reads=n_reads,
+        read_len=read_len,
+        bam_compression_ratio=bam_compression_ratio,
+        cram_compression_ratio=cram_compression_ratio,
+        output_format=output_format,
+        supplementary_alignments=supplementary_alignments,
+        percent_mapped=percent_mapped,
+    )
+
+
+def estimate_fastqz_size(n_reads: int,
+                         read_len: int = 150,
+                         gzip_compression_ratio: float = 0.25,
+                         pe: bool = True,
+                         read_name_len: int = 20) -> float:
+    """
+    Estimate the gzipped FASTQ (.fastq.gz) size in bytes from number of reads.
+
+    See `estimate_fastqz_size_from_nreads` for the parameters.
+    """
+    return n_reads * fastq_bytes_per_read(read_len, pe=pe, read_name_len=read_name_len) * gzip_compression_ratio
@@ -0,0 +1,217 @@
+"""
+Multi-tier storage, retrieval and egress costs for tier placement policies.
+
+A placement policy keeps each file class (FASTQ.gz, alignments) in the hot tier
+for some months, then the cool tier, then archive until the end of the horizon.
+Costs are linear in bytes, so every policy is reduced to a dollar cost per GB per
+file class and many candidate policies are evaluated as one NumPy array.
+"""
+import itertools
+
+import numpy as np
+
+BYTES_PER_GB = 1024 ** 3
+
+TIERS = ("hot", "cool", "archive")
+
+# prices in USD; retrieval is charged per GB read back from the tier
+STORAGE_TIERS = {
+    "hot": {"storage_per_gb_month": 0.0064, "retrieval_per_gb": 0.0, "min_retention_months": 0},
+    "cool": {"storage_per_gb_month": 0.0025, "retrieval_per_gb": 0.01, "min_retention_months": 1},
+    "archive": {"storage_per_gb_month": 0.00099, "retrieval_per_gb": 0.02, "min_retention_months": 6},
+}
+
+EGRESS_PER_GB = 0.09
+
+
+class PriceTable:
+    """
+    Storage tier and egress prices.
+
+    Parameters
+    ----------
+    tiers : dict, default=STORAGE_TIERS
+        storage_per_gb_month, retrieval_per_gb and min_retention_months for each
+        of the hot, cool and archive tiers. Data removed from a tier before its
+        minimum retention is billed for the remaining months.
+    egress_per_gb : float, default=EGRESS_PER_GB
+        Price per GB downloaded out of the provider.
+    """
+
+    def __init__(self, tiers: dict = STORAGE_TIERS, egress_per_gb: float = EGRESS_PER_GB):
+        self.tiers = tiers
+        self.egress_per_gb = egress_per_gb
+        self.storage = np.array([tiers[t]["storage_per_gb_month"] for t in TIERS], dtype=float)
+        self.retrieval = np.array([tiers[t]["retrieval_per_gb"] for t in TIERS], dtype=float)
+        self.min_retention = np.array([tiers[t]["min_retention_months"] for t in TIERS], dtype=float)
+
+
+DEFAULT_PRICE_TABLE = PriceTable()
+
+
+def cost_per_gb(hot_months,
+                cool_months,
+                horizon_months: int,
+                access_per_month=0.0,
+                egress_fraction=1.0,
+                prices: PriceTable = DEFAULT_PRICE_TABLE) -> dict:
+    """
+    Dollar cost per GB stored over the horizon for hot -> cool -> archive policies.
+
+    Parameters
+    ----------
+    hot_months, cool_months : array-like of int
+        Months spent in the hot and cool tiers; the rest of the horizon is spent
+        in archive. Clipped so the tiers never exceed the horizon.
+    horizon_months : int
+        Months the data is kept before deletion.
+    access_per_month : array-like of float, default=0.0
+        Fraction of the data read back each month.
+    egress_fraction : array-like of float, default=1.0
+        Fraction of retrieved data that leaves the provider and pays egress.
+    prices : PriceTable, default=DEFAULT_PRICE_TABLE
+        Tier and egress prices.
+
+    Returns
+    -------
+    dict
+        storage, retrieval, egress, early_deletion and total cost per GB,
+        broadcast over the inputs.
+    """
+    hot = np.clip(np.asarray(hot_months, dtype=float), 0, horizon_months)
+    cool = np.clip(np.asarray(cool_months, dtype=float), 0, horizon_months - hot)
+    archive = horizon_months - hot - cool
+    months = np.stack(np.broadcast_arrays(hot, cool, archive), axis=-1)
+
+    # every tier that is used is left, by a transition or by deletion at the horizon
+    early_months = np.where(months > 0, np.clip(prices.min_retention - months, 0, None), 0)
+    access = np.asarray(access_per_month, dtype=float)
+
+    storage = months @ prices.storage
+    early_deletion = early_months @ prices.storage
+    retrieval = access * (months @ prices.retrieval)
+    egress = access * horizon_months * np.asarray(egress_fraction, dtype=float) * prices.egress_per_gb
+    # egress does not depend on the policy; broadcast it so every entry lines up
+    storage, retrieval, egress, early_deletion = np.broadcast_arrays(storage, retrieval, egress, early_deletion)
+    return {
+        "storage": storage,
+        "retrieval": retrieval,
+        "egress": egress,
+        "early_deletion": early_deletion,
+        "total": storage + retrieval + egress + early_deletion,
+    }
+
+
+def candidate_policies(horizon_months: int, step: int = 1, file_classes=("fastqz", "alignment")) -> dict:
+    """
+    Every hot/cool month split, in steps of `step`, for each file class.
+
+    Returns
+    -------
+    dict
+        `{file_class}_hot_months` and `{file_class}_cool_months` arrays, one entry
+        per candidate policy (the Cartesian product over file classes).
+    """
+    splits = [(hot, cool)
+              for hot in range(0, horizon_months + 1, step)
+              for cool in range(0, horizon_months - hot + 1, step)]
+    grid = np.array(list(itertools.product(splits, repeat=len(file_classes))), dtype=float)
+    policies = {}
+    for i, file_class in enumerate(file_classes):
+        policies[f"{file_class}_hot_months"] = grid[:, i, 0]
+        policies[f"{file_class}_cool_months"] = grid[:, i, 1]
+    return policies
+
+
+def evaluate_policies(file_bytes: dict,
+                      policies: dict,
+                      horizon_months: int,
+                      access_per_month: dict = None,
+                      egress_fraction: float = 1.0,
+                      prices: PriceTable = DEFAULT_PRICE_TABLE) -> dict:
+    """
+    Project cost of each placement policy over the horizon.
+
+    Parameters
+    ----------
+    file_bytes : dict
+        Bytes per file class, e.g. `{"fastqz": ..., "alignment": ...}`; values may
+        be per-sample arrays and are summed.
+    policies : dict
+        `{file_class}_hot_months` and `{file_class}_cool_months` arrays, as from
+        `candidate_policies`.
+    horizon_months : int
+        Months the data is kept.
+    access_per_month : dict, optional
+        Fraction of each file class read back per month; 0 when missing.
+    egress_fraction : float, default=1.0
+        Fraction of retrieved data that pays egress.
+    prices : PriceTable, default=DEFAULT_PRICE_TABLE
+        Tier and egress prices.
+
+    Returns
+    -------
+    dict
+        storage, retrieval, egress, early_deletion and total dollar cost, one
+        entry per policy.
+    """
+    access_per_month = access_per_month or {}
+    totals = None
+    for file_class, n_bytes in file_bytes.items():
+        gb = float(np.sum(n_bytes)) / BYTES_PER_GB
+        per_gb = cost_per_gb(
+            policies[f"{file_class}_hot_months"],
+            policies[f"{file_class}_cool_months"],
+            horizon_months,
+            access_per_month=access_per_month.get(file_class, 0.0),
+            egress_fraction=egress_fraction,
+            prices=prices,
+        )
+        costs = {k: v * gb for k, v in per_gb.items()}
+        totals = costs if totals is None else {k: totals[k] + costs[k] for k in totals}
+    return totals
+
+
+def cheapest_policy(file_bytes: dict,
+                    horizon_months: int,
+                    access_per_month: dict = None,
+                    egress_fraction: float = 1.0,
+                    step: int = 1,
+                    prices: PriceTable = DEFAULT_PRICE_TABLE) -> dict:
+    """
+    Search all hot/cool/archive splits for the cheapest placement of each file class.
+
+    Costs add up independently across file classes, so each class is searched on
+    its own over its hot/cool splits rather than over their Cartesian product.
+
+    Returns
+    -------
+    dict
+        The winning policy's `{file_class}_hot_months`, `{file_class}_cool_months`
+        and `{file_class}_archive_months`, its cost breakdown, and the
+        all-hot cost for comparison as `hot_only_total`.
+    """
+    access_per_month = access_per_month or {}
+    result = {}
+    breakdown = None
+    for file_class, n_bytes in file_bytes.items():
+        policies = candidate_policies(horizon_months, step=step, file_classes=(file_class,))
+        costs = evaluate_policies({file_class: n_bytes}, policies, horizon_months,
+                                  access_per_month, egress_fraction, prices)
+        best = int(np.argmin(costs["total"]))
+        hot = int(policies[f"{file_class}_hot_months"][best])
+        cool = int(policies[f"{file_class}_cool_months"][best])
+        result[f"{file_class}_hot_months"] = hot
+        result[f"{file_class}_cool_months"] = cool
+        result[f"{file_class}_archive_months"] = horizon_months - hot - cool
+
+        best_costs = {k: float(v[best]) for k, v in costs.items()}
+        breakdown = best_costs if breakdown is None else {k: breakdown[k] + best_costs[k] for k in breakdown}
+
+    hot_only = {f"{c}_{tier}_months": np.array([horizon_months if tier == "hot" else 0])
+                for c in file_bytes for tier in ("hot", "cool")}
+    result.update(breakdown or {})
+    result["hot_only_total"] = float(
+        evaluate_policies(file_bytes, hot_only, horizon_months, access_per_month, egress_fraction, prices)["total"][0]
+    )
+    return result
@@ -0,0 +1,306 @@
+"""
+Reference-aware CRAM size model built from per-data-series byte costs.
+
+CRAM stores bases as differences from the reference, so its size is driven by
+quality scores, read names, read features (mismatches, indels, soft clips) and
+tags rather than by a fixed fraction of the BAM. Each of these is modelled
+separately and can be calibrated from the block sizes of a local CRAM: only the
+small compression header of each container is decoded, to learn which external
+block holds which data series, and every other block is skipped by seeking.
+"""
+import io
+
+from .calibration import _read_itf8, read_cram_block, read_cram_container_header, read_cram_file_definition
+
+# compressed quality bytes per base for common quality schemes
+QUALITY_BYTES_PER_BASE = {
+    "lossless": 0.42,  # full-resolution Illumina qualities
+    "binned": 0.12,  # Illumina 8-level binning
+    "novaseq": 0.08,  # NovaSeq/DRAGEN 4-level binning
+    "none": 0.0,  # qualities discarded
+}
+DEFAULT_QUALITY = "binned"
+
+# CRAM data series grouped into the model's cost components
+SERIES_COMPONENTS = {
+    "read_names": ("RN",),
+    "quality": ("QS",),
+    "features": ("FN", "FC", "FP", "BA", "BS", "DL", "IN", "SC", "RS", "PD", "HC", "BB", "QQ"),
+    "tags": ("TC", "TN", "TL"),
+    "record": ("BF", "CF", "RL", "AP", "RG", "MF", "NS", "NP", "TS", "NF", "MQ", "RI"),
+}
+_SERIES_COMPONENT = {series: component for component, names in SERIES_COMPONENTS.items() for series in names}
+
+BLOCK_COMPRESSION_HEADER = 1
+BLOCK_SLICE_HEADER = 2
+BLOCK_EXTERNAL = 4
+BLOCK_CORE = 5
+
+CODEC_EXTERNAL = 1
+CODEC_BYTE_ARRAY_LEN = 4
+CODEC_BYTE_ARRAY_STOP = 5
+
+
+class CramSizeModel:
+    """
+    Per-read CRAM byte costs by data series.
+
+    Bases matching the reference cost nothing; every difference from it (mismatch,
+    indel or soft clip) is stored as a read feature. Features per read therefore
+    scale with read length and the per-base `mismatch_rate`, which covers both
+    sequencing errors and the sample's divergence from the reference.
+
+    The default costs are published values, not fitted to the benchmark data. On
+    the two bam_dragen CRAMs they are about 13% off on average, outside the ±10%
+    target: those two files differ by 29% in bytes per read at the same read
+    length and quality scheme, so no model of these inputs alone gets both within
+    ±10%. Calibrate from a local CRAM of the same pipeline with
+    `calibrate_cram_model` when that accuracy is needed.
+
+    Parameters
+    ----------
+    record_bytes : float, default=3.0
+        Flags, positions, mate and mapping fields per read, plus container and
+        slice overhead.
+    read_name_bytes : float, default=2.5
+        Compressed read name bytes per read.
+    quality_bytes_per_base : dict or float, default=QUALITY_BYTES_PER_BASE
+        Compressed quality bytes per base, per quality scheme, or one value
+        calibrated from a file, whose quality scheme is then fixed.
+    feature_bytes : float, default=1.2
+        Bytes per read feature (mismatch, indel or soft clip).
+    mismatch_rate : float, default=0.008
+        Bases per base that differ from the reference.
+    clips_per_read : float, default=0.3
+        Soft clips and other features per read that do not scale with length.
+    tag_bytes : float, default=2.0
+        Compressed aux tag bytes per read.
+    """
+
+    def __init__(self,
+                 record_bytes: float = 3.0,
+                 read_name_bytes: float = 2.5,
+                 quality_bytes_per_base=QUALITY_BYTES_PER_BASE,
+                 feature_bytes: float = 1.2,
+                 mismatch_rate: float = 0.008,
+                 clips_per_read: float = 0.3,
+                 tag_bytes: float = 2.0):
+        self.record_bytes = record_bytes
+        self.read_name_bytes = read_name_bytes
+        self.quality_bytes_per_base = quality_bytes_per_base
+        self.feature_bytes = feature_bytes
+        self.mismatch_rate = mismatch_rate
+        self.clips_per_read = clips_per_read
+        self.tag_bytes = tag_bytes
+
+    def _quality_bytes_per_base(self, quality: str = None) -> float:
+        if not isinstance(self.quality_bytes_per_base, dict):
+            if quality is not None:
+                raise ValueError(f"Model is calibrated with the sample's own quality cost; cannot apply quality={quality!r}")
+            return self.quality_bytes_per_base
+        if quality is None:
+            quality = DEFAULT_QUALITY
+        if quality not in self.quality_bytes_per_base:
+            raise ValueError(f"Unknown quality scheme {quality!r}; expected one of {sorted(self.quality_bytes_per_base)}")
+        return self.quality_bytes_per_base[quality]
+
+    def features_per_read(self, read_len=150, mismatch_rate=None):
+        """
+        Read features per read: `read_len * mismatch_rate` plus `clips_per_read`.
+        """
+        if mismatch_rate is None:
+            mismatch_rate = self.mismatch_rate
+        return read_len * mismatch_rate + self.clips_per_read
+
+    def bytes_per_read(self, read_len=150, quality: str = None, features_per_read=None, mismatch_rate=None) -> dict:
+        """
+        Compressed bytes per read for each component and in total.
+
+        Parameters
+        ----------
+        read_len : int or array-like of int, default=150
+            Read length in bases.
+        quality : str, optional
+            Quality scheme, a key of `QUALITY_BYTES_PER_BASE`; defaults to
+            "binned". Calibrated models carry the sample's own quality cost and
+            raise ValueError if a scheme is given.
+        features_per_read : float or array-like of float, optional
+            Mismatches, indels and soft clips per read, if known; otherwise
+            derived from `read_len` and `mismatch_rate`.
+        mismatch_rate : float or array-like of float, optional
+            Per-base difference from the reference; defaults to the model's rate.
+
+        Returns
+        -------
+        dict
+            record, read_names, quality, features, tags and total bytes per read.
+        """
+        if features_per_read is None:
+            features_per_read = self.features_per_read(read_len, mismatch_rate)
+        components = {
+            "record": self.record_bytes,
+            "read_names": self.read_name_bytes,
+            "quality": self._quality_bytes_per_base(quality) * read_len,
+            "features": self.feature_bytes * features_per_read,
+            "tags": self.tag_bytes,
+        }
+        components["total"] = sum(components.values())
+        return components
+
+    def estimate(self, n_reads, read_len=150, quality: str = None, features_per_read=None, mismatch_rate=None):
+        """
+        Estimate CRAM file size in bytes; works on scalars and NumPy arrays.
+
+        See `bytes_per_read` for the parameters.
+        """
+        return n_reads * self.bytes_per_read(read_len, quality, features_per_read, mismatch_rate)["total"]
+
+    @classmethod
+    def from_series_bytes(cls, series: dict, mismatch_rate: float = 0.008, clips_per_read: float = 0.3) -> "CramSizeModel":
+        """
+        Build a calibrated model from `sample_cram_series` output.
+
+        Features are not decoded, so their count is taken from the sample's mean
+        read length and the given `mismatch_rate` and `clips_per_read`; use the
+        sample's known error rate against its reference where available.
+        """
+        n_records = series["n_records"]
+        per_read = {k: v / n_records for k, v in series["component_bytes"].items()}
+        features_per_read = series["n_bases"] / n_records * mismatch_rate + clips_per_read
+        return cls(
+            record_bytes=per_read.get("record", 0.0) + per_read.get("other", 0.0) + series["overhead_bytes"] / n_records,
+            read_name_bytes=per_read.get("read_names", 0.0),
+            quality_bytes_per_base=series["component_bytes"].get("quality", 0.0) / series["n_bases"],
+            feature_bytes=per_read.get("features", 0.0) / features_per_read if features_per_read else 0.0,
+            mismatch_rate=mismatch_rate,
+            clips_per_read=clips_per_read,
+            tag_bytes=per_read.get("tags", 0.0),
+        )
+
+
+DEFAULT_CRAM_SIZE_MODEL = CramSizeModel()
+
+
+def _encoding_content_ids(handle) -> list:
+    """
+    External block content ids used by one encoding descriptor.
+    """
+    codec = _read_itf8(handle)
+    params = handle.read(_read_itf8(handle))
+    params_handle = io.BytesIO(params)
+    if codec == CODEC_EXTERNAL:
+        return [_read_itf8(params_handle)]
+    if codec == CODEC_BYTE_ARRAY_STOP:
+        params_handle.read(1)  # stop byte
+        return [_read_itf8(params_handle)]
+    if codec == CODEC_BYTE_ARRAY_LEN:
+        return _encoding_content_ids(params_handle) + _encoding_content_ids(params_handle)
+    return []  # values are bit-packed in the core block
+
+
+def parse_compression_header(data: bytes) -> dict:
+    """
+    Map external block content ids to the model component they store.
+
+    Parameters
+    ----------
+    data : bytes
+        Decompressed compression header block.
+
+    Returns
+    -------
+    dict
+        Component name keyed by content id. Ids shared by several components go
+        to the first one listed in the header.
+    """
+    handle = io.BytesIO(data)
+    handle.seek(_read_itf8(handle), io.SEEK_CUR)  # preservation map
+
+    components = {}
+    _read_itf8(handle)  # data series map size
+    for _ in range(_read_itf8(handle)):
+        series = handle.read(2).decode("ascii")
+        for content_id in _encoding_content_ids(handle):
+            components.setdefault(content_id, _SERIES_COMPONENT.get(series, "other"))
+
+    _read_itf8(handle)  # tag encoding map size
+    for _ in range(_read_itf8(handle)):
+        _read_itf8(handle)  # tag key
+        for content_id in _encoding_content_ids(handle):
+            components.setdefault(content_id, "tags")
+    return components
+
+
+def sample_cram_series(path: str, n_containers: int = 20) -> dict:
+    """
+    Compressed bytes per model component over the first data containers of a CRAM.
+
+    Parameters
+    ----------
+    path : str
+        Path to a CRAM file (version 3).
+    n_containers : int, default=20
+        Number of data containers to sample.
+
+    Returns
+    -------
+    dict
+        n_records, n_bases, component_bytes (block bytes per component; the core
+        block is counted as record data) and overhead_bytes (container, compression
+        and slice headers).
+    """
+    component_bytes = {}
+    n_records = 0
+    n_bases = 0
+    overhead = 0
+    containers = 0
+    with open(path, "rb") as handle:
+        major_version, _ = read_cram_file_definition(handle)
+        while containers < n_containers:
+            header = read_cram_container_header(handle, major_version)
+            if header is None:
+                break
+            data_start = handle.tell()
+            if header["n_records"] == 0:
+                handle.seek(data_start + header["length"])
+                continue
+
+            compression_header = read_cram_block(handle, major_version, read_data=True)
+            if compression_header["content_type"] != BLOCK_COMPRESSION_HEADER:
+                raise ValueError(f"{path}: container does not start with a compression header")
+            content_components = parse_compression_header(compression_header["data"])
+            overhead += header["header_bytes"] + compression_header["block_bytes"]
+
+            while handle.tell() < data_start + header["length"]:
+                block = read_cram_block(handle, major_version)
+                if block["content_type"] == BLOCK_EXTERNAL:
+                    component = content_components.get(block["content_id"], "other")
+                elif block["content_type"] == BLOCK_CORE:
+                    component = "record"
+                else:
+                    overhead += block["block_bytes"]
+                    continue
+                component_bytes[component] = component_bytes.get(component, 0) + block["block_bytes"]
+
+            n_records += header["n_records"]
+            n_bases += header["n_bases"]
+            containers += 1
+
+    if not n_records:
+        raise ValueError(f"{path} has no alignment records to sample")
+    return {
+        "n_records": n_records,
+        "n_bases": n_bases,
+        "component_bytes": component_bytes,
+        "overhead_bytes": overhead,
+    }
+
+
+def calibrate_cram_model(path: str, n_containers: int = 20, mismatch_rate: float = 0.008,
+                         clips_per_read: float = 0.3) -> CramSizeModel:
+    """
+    CramSizeModel calibrated from the first containers of a local CRAM file.
+
+    See `CramSizeModel.from_series_bytes` for `mismatch_rate` and `clips_per_read`.
+    """
+    return CramSizeModel.from_series_bytes(sample_cram_series(path, n_containers), mismatch_rate, clips_per_read)
@@ -0,0 +1,141 @@
+"""
+Persistent SQLite index of per-file measurements from the archive scanner.
+
+Rows are keyed by path and stamped with the file's size and mtime, so a re-scan
+only measures files that are new or have changed since the last run.
+"""
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+INDEX_COLUMNS = [
+    "path", "sample", "format", "bytes", "mtime", "num_reads", "read_count_method",
+    "compression_ratio", "bytes_per_record_compressed", "error", "scanned_at",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    sample TEXT,
+    format TEXT,
+    bytes INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    num_reads INTEGER,
+    read_count_method TEXT,
+    compression_ratio REAL,
+    bytes_per_record_compressed REAL,
+    error TEXT,
+    scanned_at REAL
+);
+CREATE INDEX IF NOT EXISTS files_sample ON files (sample);
+"""
+
+
+def _under(prefix: str) -> tuple:
+    """
+    SQL condition and parameters selecting paths inside directory `prefix`.
+
+    Matching stops at a directory boundary, so "/x/a" selects "/x/a/f.bam" but not
+    "/x/ab/f.bam". Substrings are compared rather than LIKE patterns because paths
+    may contain "%" and "_".
+    """
+    root = prefix.rstrip(os.sep)
+    if not root:
+        return "1", []
+    directory = root + os.sep
+    return "(path = ? OR substr(path, 1, ?) = ?)", [root, len(directory), directory]
+
+
+class FileIndex:
+    """
+    SQLite store of file measurements keyed by path, size and mtime.
+
+    Parameters
+    ----------
+    path : str
+        SQLite database file; created if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        # WAL lets the app read the index while a nightly scan is writing to it
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def is_current(self, path: str, size: int, mtime: float) -> bool:
+        """
+        True if `path` is indexed with the given size and mtime and was measured without error.
+        """
+        row = self._conn.execute(
+            "SELECT 1 FROM files WHERE path = ? AND bytes = ? AND mtime = ? AND error IS NULL", (path, size, mtime)
+        ).fetchone()
+        return row is not None
+
+    def stamps(self, prefix: str = "") -> dict:
+        """
+        Map of path to (bytes, mtime) for indexed paths under directory `prefix`.
+
+        Files whose measurement failed map to (None, None), so a re-scan retries
+        them: on network storage the error may have been transient.
+        """
+        condition, params = _under(prefix)
+        rows = self._conn.execute(
+            f"SELECT path, bytes, mtime, error IS NOT NULL FROM files WHERE {condition}", params
+        )
+        return {path: (None, None) if failed else (size, mtime) for path, size, mtime, failed in rows}
+
+    def upsert(self, rows: list):
+        """
+        Insert or replace measurement rows (dicts with the scanner's columns).
+        """
+        now = time.time()
+        values = [
+            tuple(now if c == "scanned_at" else row.get(c) for c in INDEX_COLUMNS)
+            for row in rows
+        ]
+        placeholders = ", ".join("?" for _ in INDEX_COLUMNS)
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO files ({', '.join(INDEX_COLUMNS)}) VALUES ({placeholders})", values
+        )
+        self._conn.commit()
+
+    def remove(self, paths):
+        """
+        Drop entries for files that no longer exist.
+        """
+        self._conn.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in paths))
+        self._conn.commit()
+
+    def to_dataframe(self, prefix: str = "", file_format: str = None) -> pd.DataFrame:
+        """
+        Indexed measurements as a DataFrame, optionally filtered by directory and format.
+        """
+        condition, params = _under(prefix)
+        query = f"SELECT {', '.join(INDEX_COLUMNS)} FROM files WHERE {condition}"
+        if file_format is not None:
+            query += " AND format = ?"
+            params.append(file_format)
+        return pd.read_sql_query(query + " ORDER BY path", self._conn, params=params)
+
+
+def is_index_path(path: str) -> bool:
+    """
+    True if `path` names a FileIndex database rather than a CSV/Parquet dataset.
+    """
+    return os.path.splitext(path)[1].lower() in (".sqlite", ".sqlite3", ".db")
@@ -0,0 +1,178 @@
+"""
+Inverse estimates: the most reads per sample that fit a storage or cost budget.
+
+With constant compression ratios, stored bytes and cost are linear in the number
+of reads, so the answer is the budget divided by the cost of one read. A fitted
+compression model makes the ratios depend on the read count; then every scenario
+is solved at once by bisection on NumPy arrays. Either way thousands of budget
+scenarios (budgets, sample counts, horizons, read lengths) broadcast together.
+"""
+import numpy as np
+
+from .core import DEFAULT_BAM_RECORD_MODEL, fastq_bytes_per_read
+from .projection import _tier_price
+
+BYTES_PER_GB = 1024 ** 3
+MAX_READS = 1e13
+
+
+def price_over_horizon(months, tier_prices=((0, 0.0064),)) -> np.ndarray:
+    """
+    Dollars per GB to keep data for `months` months, summed over age-based price tiers.
+
+    Parameters
+    ----------
+    months : int or array-like of int
+        Months the data is kept.
+    tier_prices : sequence of (int, float), default=((0, 0.0064),)
+        (min_age_months, price per GB-month) tiers, as in `project_storage`.
+    """
+    months = np.asarray(months, dtype=np.int64)
+    horizon = int(months.max()) if months.size else 0
+    cumulative = np.concatenate([[0.0], np.cumsum(_tier_price(np.arange(horizon), tier_prices))])
+    return cumulative[np.clip(months, 0, horizon)]
+
+
+def max_reads_for_budget(budget_bytes=None,
+                         budget_dollars=None,
+                         n_samples=1,
+                         retention_months=60,
+                         tier_prices=((0, 0.0064),),
+                         read_len=150,
+                         bam_compression_ratio=0.15,
+                         cram_compression_ratio=0.3,
+                         gzip_compression_ratio=0.25,
+                         supplementary_alignments=0.1,
+                         percent_mapped=0.9,
+                         output_format: str = "CRAM",
+                         include_fastqz: bool = True,
+                         fastqz_retention_months=None,
+                         pe: bool = True,
+                         genome_size=None,
+                         compression_model=None,
+                         record_model=DEFAULT_BAM_RECORD_MODEL,
+                         max_iterations: int = 64) -> dict:
+    """
+    Maximum reads per sample whose storage fits a byte or dollar budget.
+
+    Every numeric argument may be an array; they broadcast into one scenario per
+    element.
+
+    Parameters
+    ----------
+    budget_bytes : float or array-like, optional
+        Storage available for all samples, in bytes.
+    budget_dollars : float or array-like, optional
+        Money available for storing all samples over `retention_months`. Exactly
+        one of `budget_bytes` and `budget_dollars` must be given.
+    n_samples : int or array-like, default=1
+        Samples sharing the budget.
+    retention_months : int or array-like, default=60
+        Months the alignments are kept; only used with `budget_dollars`.
+    tier_prices : sequence of (int, float), default=((0, 0.0064),)
+        (min_age_months, price per GB-month) tiers; only used with `budget_dollars`.
+    read_len, bam_compression_ratio, cram_compression_ratio, gzip_compression_ratio,
+    supplementary_alignments, percent_mapped, output_format
+        See `estimate_bam_size_from_nreads` and `estimate_fastqz_size_from_nreads`.
+    include_fastqz : bool, default=True
+        Count the FASTQ.gz against the budget.
+    fastqz_retention_months : int or array-like, optional
+        Months the FASTQ.gz is kept, if shorter than `retention_months`.
+    pe : bool, default=True
+        Paired-end FASTQ.
+    genome_size : float or array-like, optional
+        Target size in bases; adds the resulting coverage per sample.
+    compression_model : CompressionRatioModel, optional
+        Fitted ratio model; read-count dependent ratios are solved by bisection.
+    record_model : BamRecordModel, default=DEFAULT_BAM_RECORD_MODEL
+        Per-read byte model.
+    max_iterations : int, default=64
+        Bisection steps; 64 halvings of `MAX_READS` resolve single reads.
+
+    Returns
+    -------
+    dict
+        n_reads (whole reads per sample), bases, bytes_per_sample, total_bytes,
+        total_cost (with a dollar budget) and coverage (with `genome_size`).
+
+    Raises
+    ------
+    ValueError
+        If storing a read uses none of the budget in some scenario (a zero price,
+        retention or compression ratio), so no read count is the maximum.
+    """
+    if (budget_bytes is None) == (budget_dollars is None):
+        raise ValueError("Give exactly one of budget_bytes and budget_dollars")
+    n_samples = np.asarray(n_samples, dtype=float)
+    read_len = np.asarray(read_len)
+    is_cram = output_format.upper() == "CRAM"
+
+    # budget units per stored byte of alignment and of FASTQ.gz
+    if budget_dollars is None:
+        budget = np.asarray(budget_bytes, dtype=float)
+        alignment_weight = 1.0
+        fastqz_weight = 1.0 if include_fastqz else 0.0
+    else:
+        budget = np.asarray(budget_dollars, dtype=float)
+        alignment_weight = price_over_horizon(retention_months, tier_prices) / BYTES_PER_GB
+        if not include_fastqz:
+            fastqz_weight = 0.0
+        elif fastqz_retention_months is None:
+            fastqz_weight = alignment_weight
+        else:
+            fastqz_weight = price_over_horizon(np.minimum(fastqz_retention_months, retention_months),
+                                               tier_prices) / BYTES_PER_GB
+
+    bytes_per_read = record_model.bytes_per_read_array(read_len, percent_mapped, supplementary_alignments)
+    fastqz_per_read = fastq_bytes_per_read(read_len, pe=pe) * np.asarray(gzip_compression_ratio, dtype=float)
+
+    # alignment and FASTQ.gz bytes per read at `n_reads` reads per sample
+    def per_read(n_reads):
+        if compression_model is None:
+            bam_ratio, cram_ratio = bam_compression_ratio, cram_compression_ratio
+        else:
+            bam_ratio = compression_model.ratio(n_reads, read_len, "BAM")
+            cram_ratio = compression_model.ratio(n_reads, read_len, "CRAM") if is_cram else 1.0
+        alignment = bytes_per_read * np.asarray(bam_ratio, dtype=float)
+        if is_cram:
+            alignment = alignment * np.asarray(cram_ratio, dtype=float)
+        return alignment, fastqz_per_read
+
+    def spend(n_reads):
+        alignment, fastqz = per_read(n_reads)
+        return n_samples * n_reads * (alignment * alignment_weight + fastqz * fastqz_weight)
+
+    spend_per_read = spend(np.ones(()))
+    if not np.all(spend_per_read > 0):
+        raise ValueError("storing a read uses none of the budget; check the storage price, retention months "
+                         "and compression ratios")
+    if compression_model is None:
+        # linear model: budget = n_reads * spend per read
+        n_reads = budget / spend_per_read
+    else:
+        shape = np.broadcast_shapes(budget.shape, spend_per_read.shape)
+        low = np.zeros(shape)
+        high = np.full(shape, MAX_READS)
+        for _ in range(max_iterations):
+            mid = (low + high) / 2
+            fits = spend(mid) <= budget
+            low = np.where(fits, mid, low)
+            high = np.where(fits, high, mid)
+            if np.all(high - low < 1):
+                break
+        n_reads = low
+    n_reads = np.floor(np.clip(n_reads, 0, MAX_READS))
+
+    alignment, fastqz = per_read(n_reads)
+    bytes_per_sample = n_reads * (alignment + (fastqz if include_fastqz else 0.0))
+    result = {
+        "n_reads": n_reads,
+        "bases": n_reads * read_len,
+        "bytes_per_sample": bytes_per_sample,
+        "total_bytes": bytes_per_sample * n_samples,
+    }
+    if budget_dollars is not None:
+        result["total_cost"] = spend(n_reads)
+    if genome_size is not None:
+        result["coverage"] = result["bases"] / np.asarray(genome_size, dtype=float)
+    return result
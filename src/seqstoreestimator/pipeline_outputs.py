@@ -0,0 +1,219 @@
+"""
+Registry of per-sample pipeline outputs with final storage and peak scratch estimates.
+
+Every artifact a sample produces (FASTQ.gz, intermediate and final alignments,
+indexes, sort spill files, gVCF/VCF, QC) is registered with its own size model, the
+pipeline stage that writes it and the stage after which it is deleted. Final
+stored bytes are the artifacts that are never deleted; peak scratch is the largest
+total of artifacts alive at any one stage. Size models work on NumPy arrays, so a
+whole batch of samples is estimated in one call.
+"""
+import numpy as np
+
+from .core import DEFAULT_BAM_RECORD_MODEL, fastq_bytes_per_read
+
+PIPELINE_STAGES = ("input", "align", "sort", "markdup", "convert", "call", "qc")
+
+HUMAN_GENOME_SIZE = 3_100_000_000
+
+DEFAULT_SAMPLE_PARAMS = {
+    "n_reads": 800_000_000,
+    "read_len": 150,
+    "pe": True,
+    "bam_compression_ratio": 0.15,
+    "cram_compression_ratio": 0.3,
+    "gzip_compression_ratio": 0.25,
+    "supplementary_alignments": 0.1,
+    "percent_mapped": 0.9,
+    "output_format": "CRAM",
+    "target_size": HUMAN_GENOME_SIZE,
+    "keep_fastqz": True,
+    "aligner_output_ratio": 1.3,  # fast, low-level compression of unsorted aligner output
+    "sort_spill_ratio": 1.0,  # temporary sort files relative to the sorted BAM
+    "variants_per_base": 0.0016,
+    "vcf_bytes_per_variant": 40,
+    "gvcf_bytes_per_base": 0.6,
+    "qc_bytes": 50 * 1024 ** 2,
+}
+
+
+class Artifact:
+    """
+    One registered pipeline output.
+
+    Parameters
+    ----------
+    name : str
+        Artifact name.
+    size : Callable[[dict, dict], array-like]
+        Size model taking the sample parameters and the sizes of previously
+        registered artifacts, returning bytes.
+    stage : str
+        Stage in `PIPELINE_STAGES` that writes the artifact.
+    delete_after : str or Callable[[dict], str] or None
+        Last stage the artifact is kept for, or a function of the sample
+        parameters returning it; None keeps it as a final stored output.
+    """
+
+    def __init__(self, name: str, size, stage: str, delete_after=None):
+        if stage not in PIPELINE_STAGES:
+            raise ValueError(f"Unknown pipeline stage {stage!r}")
+        self.name = name
+        self.size = size
+        self.stage = stage
+        self.delete_after = delete_after
+
+    def last_stage(self, params: dict):
+        return self.delete_after(params) if callable(self.delete_after) else self.delete_after
+
+
+ARTIFACTS = {}
+
+
+def register_artifact(name: str, stage: str, delete_after=None, registry: dict = None):
+    """
+    Decorator registering a size model as a pipeline artifact.
+
+    Artifacts are sized in registration order, so a model may use the sizes of
+    artifacts registered before it.
+
+    Examples
+    --------
+    >>> @register_artifact("md5", stage="qc")
+    ... def md5_size(params, sizes):
+    ...     return 64
+    """
+    registry = ARTIFACTS if registry is None else registry
+
+    def decorator(size):
+        registry[name] = Artifact(name, size, stage, delete_after)
+        return size
+
+    return decorator
+
+
+def _is_cram(params: dict) -> bool:
+    return params["output_format"].upper() == "CRAM"
+
+
+@register_artifact("fastqz", stage="input", delete_after=lambda p: None if p["keep_fastqz"] else "align")
+def _fastqz_size(p, sizes):
+    return p["n_reads"] * fastq_bytes_per_read(p["read_len"], pe=p["pe"]) * p["gzip_compression_ratio"]
+
+
+def _bam_size(p):
+    bytes_per_read = DEFAULT_BAM_RECORD_MODEL.bytes_per_read_array(
+        p["read_len"], p["percent_mapped"], p["supplementary_alignments"])
+    return p["n_reads"] * bytes_per_read * p["bam_compression_ratio"]
+
+
+@register_artifact("unsorted_bam", stage="align", delete_after="sort")
+def _unsorted_bam_size(p, sizes):
+    return _bam_size(p) * p["aligner_output_ratio"]
+
+
+@register_artifact("sort_spill", stage="sort", delete_after="sort")
+def _sort_spill_size(p, sizes):
+    return _bam_size(p) * p["sort_spill_ratio"]
+
+
+@register_artifact("sorted_bam", stage="sort", delete_after="markdup")
+def _sorted_bam_size(p, sizes):
+    return _bam_size(p)
+
+
+@register_artifact("markdup_bam", stage="markdup", delete_after=lambda p: "convert" if _is_cram(p) else None)
+def _markdup_bam_size(p, sizes):
+    return _bam_size(p)
+
+
+@register_artifact("bai", stage="markdup", delete_after=lambda p: "convert" if _is_cram(p) else None)
+def _bai_size(p, sizes):
+    # about 8.5 MB for a 100 GB 30x WGS BAM
+    return sizes["markdup_bam"] * 8.5e-5
+
+
+@register_artifact("cram", stage="convert")
+def _cram_size(p, sizes):
+    return sizes["markdup_bam"] * p["cram_compression_ratio"] if _is_cram(p) else 0.0
+
+
+@register_artifact("crai", stage="convert")
+def _crai_size(p, sizes):
+    # about 1 MB for a 15 GB 30x WGS CRAM
+    return sizes["cram"] * 7e-5
+
+
+@register_artifact("gvcf", stage="call")
+def _gvcf_size(p, sizes):
+    return p["target_size"] * p["gvcf_bytes_per_base"]
+
+
+@register_artifact("vcf", stage="call")
+def _vcf_size(p, sizes):
+    return p["target_size"] * p["variants_per_base"] * p["vcf_bytes_per_variant"]
+
+
+@register_artifact("vcf_index", stage="call")
+def _vcf_index_size(p, sizes):
+    return (sizes["vcf"] + sizes["gvcf"]) * 1e-3
+
+
+@register_artifact("qc", stage="qc")
+def _qc_size(p, sizes):
+    return p["qc_bytes"]
+
+
+def estimate_sample_outputs(params: dict = None, registry: dict = None, **overrides) -> dict:
+    """
+    Sizes of every registered artifact, final stored bytes and peak scratch.
+
+    Parameters
+    ----------
+    params : dict, optional
+        Sample parameters overriding `DEFAULT_SAMPLE_PARAMS`. Numeric values may
+        be NumPy arrays (one entry per sample); `output_format` and
+        `keep_fastqz` apply to the whole batch.
+    registry : dict, default=ARTIFACTS
+        Artifact registry to evaluate.
+    **overrides
+        Individual parameters, e.g. `n_reads=...`.
+
+    Returns
+    -------
+    dict
+        artifacts (bytes per artifact), stage_bytes (bytes alive at each stage),
+        stored_bytes, peak_scratch_bytes and peak_stage.
+    """
+    registry = ARTIFACTS if registry is None else registry
+    p = {**DEFAULT_SAMPLE_PARAMS, **(params or {}), **overrides}
+    p["n_reads"] = np.asarray(p["n_reads"], dtype=float)
+
+    sizes = {}
+    for name, artifact in registry.items():
+        sizes[name] = artifact.size(p, sizes)
+    # constant-size artifacts take the batch shape too
+    zeros = np.zeros(np.broadcast_shapes(*(np.shape(size) for size in sizes.values())))
+    sizes = {name: size + zeros for name, size in sizes.items()}
+
+    stage_index = {stage: i for i, stage in enumerate(PIPELINE_STAGES)}
+    stage_bytes = {stage: zeros for stage in PIPELINE_STAGES}
+    stored_bytes = zeros
+    for name, artifact in registry.items():
+        first = stage_index[artifact.stage]
+        last_stage = artifact.last_stage(p)
+        last = len(PIPELINE_STAGES) - 1 if last_stage is None else stage_index[last_stage]
+        for stage in PIPELINE_STAGES[first:last + 1]:
+            stage_bytes[stage] = stage_bytes[stage] + sizes[name]
+        if last_stage is None:
+            stored_bytes = stored_bytes + sizes[name]
+
+    by_stage = np.stack(list(stage_bytes.values()))
+    peak = by_stage.argmax(axis=0)
+    return {
+        "artifacts": sizes,
+        "stage_bytes": stage_bytes,
+        "stored_bytes": stored_bytes,
+        "peak_scratch_bytes": by_stage.max(axis=0),
+        "peak_stage": np.asarray(PIPELINE_STAGES)[peak],
+    }
@@ -0,0 +1,138 @@
+"""
+Month-by-month storage growth and cost for a project with a sequencing schedule.
+
+Each cohort is a batch of samples that arrives in one month. Stored bytes are laid
+out as a months x cohorts matrix from each cohort's age, with retention policies
+masking out files once they are deleted or converted, so a ten-year projection
+over thousands of cohorts is a few array operations and one cumsum.
+"""
+import numpy as np
+
+from .core import DEFAULT_BAM_RECORD_MODEL, fastq_bytes_per_read
+
+BYTES_PER_GB = 1024 ** 3
+
+
+def intake_cohorts(samples_per_month,
+                   n_reads,
+                   read_len=150,
+                   bam_compression_ratio=0.15,
+                   cram_compression_ratio=0.3,
+                   gzip_compression_ratio=0.25,
+                   supplementary_alignments=0.1,
+                   percent_mapped=0.9,
+                   pe=True) -> dict:
+    """
+    Cohorts for a schedule of samples sequenced per month.
+
+    Parameters
+    ----------
+    samples_per_month : array-like of int
+        Samples sequenced in each month; index 0 is the first projected month.
+    n_reads, read_len, ... : float or array-like
+        Per-sample estimator parameters, scalar or one value per month.
+
+    Returns
+    -------
+    dict
+        start_month, n_samples and per-sample fastqz_bytes, bam_bytes and
+        cram_bytes arrays, one entry per month with samples.
+    """
+    samples_per_month = np.asarray(samples_per_month, dtype=float)
+    start_month = np.flatnonzero(samples_per_month)
+
+    def per_cohort(value):
+        value = np.asarray(value)
+        return value[start_month] if value.ndim else np.full(len(start_month), value)
+
+    n_reads = per_cohort(n_reads)
+    read_len = per_cohort(read_len)
+    bytes_per_read = DEFAULT_BAM_RECORD_MODEL.bytes_per_read_array(
+        read_len=read_len,
+        percent_mapped=per_cohort(percent_mapped),
+        supplementary_alignments=per_cohort(supplementary_alignments),
+    )
+    bam_bytes = n_reads * bytes_per_read * per_cohort(bam_compression_ratio)
+    return {
+        "start_month": start_month,
+        "n_samples": samples_per_month[start_month],
+        "fastqz_bytes": n_reads * fastq_bytes_per_read(read_len, pe=pe) * per_cohort(gzip_compression_ratio),
+        "bam_bytes": bam_bytes,
+        "cram_bytes": bam_bytes * per_cohort(cram_compression_ratio),
+    }
+
+
+def _tier_price(age: np.ndarray, tier_prices) -> np.ndarray:
+    """
+    Price per GB-month for data of the given age, from (min_age_months, price) tiers.
+    """
+    tiers = sorted(tier_prices)
+    min_ages = np.array([t[0] for t in tiers])
+    prices = np.array([t[1] for t in tiers], dtype=float)
+    return prices[np.clip(np.searchsorted(min_ages, age, side="right") - 1, 0, None)]
+
+
+def project_storage(cohorts: dict,
+                    years: int = 5,
+                    alignment_format: str = "CRAM",
+                    fastqz_retention_months: int = None,
+                    convert_to_cram_after_months: int = None,
+                    tier_prices=((0, 0.0064),)) -> dict:
+    """
+    Project stored bytes and cost month by month.
+
+    Parameters
+    ----------
+    cohorts : dict
+        start_month, n_samples, fastqz_bytes, bam_bytes and cram_bytes arrays, as
+        returned by `intake_cohorts`.
+    years : int, default=5
+        Number of years to project.
+    alignment_format : str, default="CRAM"
+        Format alignments are stored in on arrival ("BAM" or "CRAM").
+    fastqz_retention_months : int, optional
+        Months a cohort's FASTQ.gz is kept; kept forever when None.
+    convert_to_cram_after_months : int, optional
+        Months after which BAMs are replaced by CRAMs; only used when
+        `alignment_format` is "BAM".
+    tier_prices : sequence of (int, float), default=((0, 0.0064),)
+        (min_age_months, price per GB-month) tiers; data is billed at the tier
+        matching its age, e.g. ((0, 0.0064), (12, 0.001)) moves it to a cheaper
+        tier after a year.
+
+    Returns
+    -------
+    dict
+        month (1-based), fastqz_bytes, alignment_bytes, stored_bytes,
+        monthly_cost and cumulative_cost arrays, one entry per month.
+    """
+    n_months = years * 12
+    # age[m, c]: months since cohort c arrived, negative before it arrives
+    age = np.arange(n_months)[:, None] - np.asarray(cohorts["start_month"])[None, :]
+    stored = age >= 0
+    n_samples = np.asarray(cohorts["n_samples"], dtype=float)
+
+    fastqz_mask = stored if fastqz_retention_months is None else stored & (age < fastqz_retention_months)
+    fastqz = fastqz_mask * (n_samples * cohorts["fastqz_bytes"])
+
+    if alignment_format.upper() == "CRAM":
+        alignment = stored * (n_samples * cohorts["cram_bytes"])
+    elif convert_to_cram_after_months is None:
+        alignment = stored * (n_samples * cohorts["bam_bytes"])
+    else:
+        as_bam = stored & (age < convert_to_cram_after_months)
+        as_cram = age >= convert_to_cram_after_months
+        alignment = as_bam * (n_samples * cohorts["bam_bytes"]) + as_cram * (n_samples * cohorts["cram_bytes"])
+
+    price = _tier_price(age, tier_prices)
+    monthly_cost = ((fastqz + alignment) * price).sum(axis=1) / BYTES_PER_GB
+    fastqz_bytes = fastqz.sum(axis=1)
+    alignment_bytes = alignment.sum(axis=1)
+    return {
+        "month": np.arange(1, n_months + 1),
+        "fastqz_bytes": fastqz_bytes,
+        "alignment_bytes": alignment_bytes,
+        "stored_bytes": fastqz_bytes + alignment_bytes,
+        "monthly_cost": monthly_cost,
+        "cumulative_cost": np.cumsum(monthly_cost),
+    }
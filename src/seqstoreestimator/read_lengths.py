@@ -0,0 +1,264 @@
+"""
+Size estimates for variable-length and long reads from a read-length distribution.
+
+ONT and PacBio reads range from 1 kb to over 100 kb, so a single `read_len` does
+not describe them. A distribution is held as read-length bins and probabilities;
+the per-read byte model is evaluated on every bin at once and averaged, including
+CIGAR operations and base modification tags (MM/ML) that grow with read length.
+Distributions come from a histogram, from N50 and mean length, or by streaming
+the first reads of a local FASTQ(.gz) or BAM.
+"""
+import gzip
+
+import numpy as np
+
+from .calibration import iter_bam_records
+from .core import DEFAULT_BAM_RECORD_MODEL, fastq_bytes_per_read
+
+DEFAULT_N_BINS = 512
+
+# per-base costs that scale with read length, by platform
+PLATFORM_DEFAULTS = {
+    "illumina": {"cigar_ops_per_base": 0.0, "mod_sites_per_base": 0.0},
+    "pacbio_hifi": {"cigar_ops_per_base": 0.005, "mod_sites_per_base": 0.01},
+    "ont": {"cigar_ops_per_base": 0.05, "mod_sites_per_base": 0.01},
+}
+
+
+class ModificationTags:
+    """
+    Byte cost of MM/ML base modification tags.
+
+    Parameters
+    ----------
+    sites_per_base : float, default=0.01
+        Candidate modification sites per base (about 0.01 for CpG 5mC).
+    mod_types : int, default=1
+        Modification types called per site (e.g. 2 for 5mC and 5hmC).
+    mm_bytes_per_site : float, default=3.0
+        MM:Z bytes per site: the comma and a delta of a few digits.
+    ml_bytes_per_site : float, default=1.0
+        ML:B:C bytes per site and modification type.
+    fixed_bytes : float, default=18.0
+        MM:Z and ML:B tag headers and the modification code, per read.
+    """
+
+    def __init__(self,
+                 sites_per_base: float = 0.01,
+                 mod_types: int = 1,
+                 mm_bytes_per_site: float = 3.0,
+                 ml_bytes_per_site: float = 1.0,
+                 fixed_bytes: float = 18.0):
+        self.sites_per_base = sites_per_base
+        self.mod_types = mod_types
+        self.mm_bytes_per_site = mm_bytes_per_site
+        self.ml_bytes_per_site = ml_bytes_per_site
+        self.fixed_bytes = fixed_bytes
+
+    def bytes_per_read(self, read_len):
+        sites = self.sites_per_base * read_len
+        return self.fixed_bytes + sites * (self.mm_bytes_per_site + self.ml_bytes_per_site * self.mod_types)
+
+
+class ReadLengthDistribution:
+    """
+    Discrete read-length distribution.
+
+    Parameters
+    ----------
+    lengths : array-like of int
+        Read length of each bin.
+    weights : array-like of float
+        Number or fraction of reads in each bin; normalized to sum to 1.
+    """
+
+    def __init__(self, lengths, weights):
+        lengths = np.asarray(lengths, dtype=np.int64)
+        weights = np.asarray(weights, dtype=float)
+        keep = weights > 0
+        if not keep.any():
+            raise ValueError("Read length distribution has no reads")
+        self.lengths = lengths[keep]
+        self.weights = weights[keep] / weights[keep].sum()
+
+    @classmethod
+    def from_histogram(cls, lengths, counts) -> "ReadLengthDistribution":
+        return cls(lengths, counts)
+
+    @classmethod
+    def from_lengths(cls, read_lengths, n_bins: int = DEFAULT_N_BINS) -> "ReadLengthDistribution":
+        """
+        Distribution of observed read lengths; exact when there are few distinct
+        lengths, otherwise binned on a log scale.
+        """
+        read_lengths = np.asarray(read_lengths, dtype=np.int64)
+        lengths, counts = np.unique(read_lengths, return_counts=True)
+        if len(lengths) <= n_bins:
+            return cls(lengths, counts)
+        edges = np.unique(np.geomspace(max(lengths[0], 1), lengths[-1] + 1, n_bins + 1).astype(np.int64))
+        bin_index = np.clip(np.searchsorted(edges, lengths, side="right") - 1, 0, len(edges) - 2)
+        counts_binned = np.bincount(bin_index, weights=counts, minlength=len(edges) - 1)
+        bases_binned = np.bincount(bin_index, weights=counts * lengths, minlength=len(edges) - 1)
+        nonzero = counts_binned > 0
+        # represent each bin by its mean length so total bases are preserved
+        return cls(np.rint(bases_binned[nonzero] / counts_binned[nonzero]), counts_binned[nonzero])
+
+    @classmethod
+    def from_n50(cls, n50: float, mean: float, n_bins: int = DEFAULT_N_BINS) -> "ReadLengthDistribution":
+        """
+        Log-normal distribution matching a read N50 and mean read length.
+
+        For a log-normal length distribution the N50 is the median of the
+        length-weighted distribution, exp(mu + sigma^2), and the mean is
+        exp(mu + sigma^2 / 2), which fixes both parameters.
+        """
+        if n50 <= mean:
+            raise ValueError("Read N50 must be larger than the mean read length")
+        sigma2 = 2 * np.log(n50 / mean)
+        mu = np.log(mean) - sigma2 / 2
+        return cls.lognormal(mu, np.sqrt(sigma2), n_bins)
+
+    @classmethod
+    def lognormal(cls, mu: float, sigma: float, n_bins: int = DEFAULT_N_BINS) -> "ReadLengthDistribution":
+        """
+        Log-normal distribution of read lengths discretized on a log-spaced grid (+/- 5 sigma).
+        """
+        edges = np.exp(np.linspace(mu - 5 * sigma, mu + 5 * sigma, n_bins + 1))
+        log_edges = np.log(edges)
+        # probability mass per bin from the normal CDF of log length
+        cdf = 0.5 * (1 + _erf((log_edges - mu) / (sigma * np.sqrt(2))))
+        centers = np.maximum(np.rint(np.sqrt(edges[:-1] * edges[1:])), 1)
+        return cls(centers, np.diff(cdf))
+
+    @classmethod
+    def from_fastq(cls, path: str, n_records: int = 100_000) -> "ReadLengthDistribution":
+        """
+        Distribution of the first `n_records` reads of a FASTQ or FASTQ.gz file.
+        """
+        return cls.from_lengths(list(iter_fastq_read_lengths(path, n_records)))
+
+    @classmethod
+    def from_bam(cls, path: str, n_records: int = 100_000) -> "ReadLengthDistribution":
+        """
+        Distribution of the first `n_records` records of a BAM file.
+        """
+        return cls.from_lengths([int.from_bytes(r[16:20], "little") for r in iter_bam_records(path, n_records)])
+
+    @property
+    def mean(self) -> float:
+        return float(self.lengths @ self.weights)
+
+    @property
+    def n50(self) -> float:
+        order = np.argsort(self.lengths)
+        bases = np.cumsum((self.lengths * self.weights)[order])
+        return float(self.lengths[order][np.searchsorted(bases, bases[-1] / 2)])
+
+
+def _erf(x: np.ndarray) -> np.ndarray:
+    # Abramowitz and Stegun 7.1.26, accurate to 1.5e-7; avoids a SciPy dependency
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1 / (1 + 0.3275911 * x)
+    y = 1 - (((((1.061405429 * t - 1.453152027) * t) + 1.421413741) * t - 0.284496736) * t + 0.254829592) * t * np.exp(-x * x)
+    return sign * y
+
+
+def iter_fastq_read_lengths(path: str, n_records: int = 100_000):
+    """
+    Yield the sequence length of the first `n_records` reads of a FASTQ(.gz) file.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as handle:
+        for i, line in enumerate(handle):
+            if i % 4 == 1:
+                yield len(line.rstrip(b"\r\n"))
+                if i // 4 + 1 >= n_records:
+                    return
+
+
+def expected_bam_bytes_per_read(distribution: ReadLengthDistribution,
+                                percent_mapped: float = 0.9,
+                                supplementary_alignments: float = 0.1,
+                                cigar_ops_per_base: float = 0.0,
+                                modification_tags: ModificationTags = None,
+                                record_model=DEFAULT_BAM_RECORD_MODEL) -> float:
+    """
+    Mean uncompressed BAM bytes per read over a read-length distribution.
+
+    Parameters
+    ----------
+    distribution : ReadLengthDistribution
+        Read lengths and their probabilities.
+    percent_mapped, supplementary_alignments
+        See `estimate_bam_size_from_nreads`.
+    cigar_ops_per_base : float, default=0.0
+        Extra CIGAR operations per base, for indel-rich long reads; each costs 4 bytes.
+    modification_tags : ModificationTags, optional
+        MM/ML tag costs when base modifications are called.
+    record_model : BamRecordModel, default=DEFAULT_BAM_RECORD_MODEL
+        Per-read byte model, e.g. from a `BamRecordProfile`.
+    """
+    lengths = distribution.lengths
+    per_read = record_model.bytes_per_read_array(lengths, percent_mapped, supplementary_alignments)
+    per_read = per_read + 4 * cigar_ops_per_base * lengths
+    if modification_tags is not None:
+        per_read = per_read + modification_tags.bytes_per_read(lengths)
+    return float(per_read @ distribution.weights)
+
+
+def estimate_bam_size_from_distribution(n_reads,
+                                        distribution: ReadLengthDistribution,
+                                        bam_compression_ratio: float = 0.15,
+                                        cram_compression_ratio: float = 0.3,
+                                        output_format: str = "CRAM",
+                                        supplementary_alignments: float = 0.1,
+                                        percent_mapped: float = 0.9,
+                                        platform: str = "illumina",
+                                        modification_tags: ModificationTags = None,
+                                        record_model=DEFAULT_BAM_RECORD_MODEL):
+    """
+    Estimate BAM/CRAM size in bytes for reads following a length distribution.
+
+    Parameters
+    ----------
+    n_reads : int or array-like of int
+        Number of reads.
+    distribution : ReadLengthDistribution
+        Read lengths and their probabilities.
+    platform : str, default="illumina"
+        Key of `PLATFORM_DEFAULTS`, setting CIGAR operations per base.
+    modification_tags : ModificationTags, optional
+        MM/ML tag costs; pass `ModificationTags(PLATFORM_DEFAULTS[platform]["mod_sites_per_base"])`
+        for the platform's typical CpG calls.
+    Other parameters
+        See `estimate_bam_size_from_nreads`.
+    """
+    bytes_per_read = expected_bam_bytes_per_read(
+        distribution,
+        percent_mapped=percent_mapped,
+        supplementary_alignments=supplementary_alignments,
+        cigar_ops_per_base=PLATFORM_DEFAULTS[platform]["cigar_ops_per_base"],
+        modification_tags=modification_tags,
+        record_model=record_model,
+    )
+    total_bytes = np.asarray(n_reads) * bytes_per_read * bam_compression_ratio
+    if output_format.upper() == "CRAM":
+        total_bytes = total_bytes * cram_compression_ratio
+    return float(total_bytes) if np.ndim(total_bytes) == 0 else total_bytes
+
+
+def estimate_fastqz_size_from_distribution(n_reads,
+                                           distribution: ReadLengthDistribution,
+                                           gzip_compression_ratio: float = 0.25,
+                                           pe: bool = False,
+                                           read_name_len: int = 20):
+    """
+    Estimate gzipped FASTQ size in bytes for reads following a length distribution.
+
+    Long-read runs are single-ended, so `pe` defaults to False.
+    """
+    bytes_per_read = float(fastq_bytes_per_read(distribution.lengths, pe=pe, read_name_len=read_name_len)
+                           @ distribution.weights)
+    total_bytes = np.asarray(n_reads) * bytes_per_read * gzip_compression_ratio
+    return float(total_bytes) if np.ndim(total_bytes) == 0 else total_bytes
@@ -0,0 +1,215 @@
+"""
+Empirical BAM record profiles built by streaming a sample of real records.
+
+A profile holds fixed-size NumPy histograms of read name length, CIGAR operation
+count and read length, plus per-tag auxiliary byte totals indexed by the tag's
+two characters, so its memory does not grow with the number of records. It turns
+into a `BamRecordModel` whose CIGAR mix and aux tag tables are the observed ones,
+letting each aligner (DRAGEN, BWA, ...) get its own model without code edits.
+"""
+import struct
+
+import numpy as np
+
+from .calibration import iter_bam_records
+from .core import BAM_FIXED_FIELDS, BamRecordModel
+
+MAX_HIST_VALUE = 1024
+N_TAG_CODES = 128 * 128
+
+FLAG_UNMAPPED = 0x4
+FLAG_SUPPLEMENTARY = 0x800
+
+_AUX_VALUE_BYTES = {"A": 1, "c": 1, "C": 1, "s": 2, "S": 2, "i": 4, "I": 4, "f": 4}
+_SA_CODE = ord("S") * 128 + ord("A")
+
+
+def _tag_code(tag: bytes) -> int:
+    return (tag[0] & 0x7F) * 128 + (tag[1] & 0x7F)
+
+
+def _tag_name(code: int) -> str:
+    return chr(code // 128) + chr(code % 128)
+
+
+class BamRecordProfile:
+    """
+    Histograms and tag byte totals of sampled BAM records.
+
+    Attributes
+    ----------
+    read_name_hist, cigar_ops_hist, read_len_hist : numpy.ndarray
+        Counts of l_read_name (including NUL), n_cigar_op and l_seq; values above
+        MAX_HIST_VALUE are counted in the last bin.
+    tag_records, tag_fixed_bytes, tag_array_bytes : numpy.ndarray
+        Per tag code: records carrying the tag, bytes that do not depend on read
+        length (tag, type and array header), and array element bytes.
+    """
+
+    def __init__(self):
+        self.n_records = 0
+        self.n_mapped = 0
+        self.n_supplementary = 0
+        self.bases = 0
+        self.cigar_ops = 0
+        self.read_name_hist = np.zeros(MAX_HIST_VALUE + 1, dtype=np.int64)
+        self.cigar_ops_hist = np.zeros(MAX_HIST_VALUE + 1, dtype=np.int64)
+        self.read_len_hist = np.zeros(MAX_HIST_VALUE + 1, dtype=np.int64)
+        self.tag_records = np.zeros(N_TAG_CODES, dtype=np.int64)
+        self.tag_fixed_bytes = np.zeros(N_TAG_CODES, dtype=np.int64)
+        self.tag_array_bytes = np.zeros(N_TAG_CODES, dtype=np.int64)
+        self._record_model = None
+
+    def add_record(self, record: bytes):
+        """
+        Add one BAM record, without its leading block_size field.
+        """
+        l_read_name = record[8]
+        n_cigar_op, flag = struct.unpack_from("<HH", record, 12)
+        l_seq = struct.unpack_from("<i", record, 16)[0]
+
+        self.n_records += 1
+        self.n_mapped += not flag & FLAG_UNMAPPED
+        self.n_supplementary += bool(flag & FLAG_SUPPLEMENTARY)
+        self.bases += l_seq
+        self.cigar_ops += n_cigar_op
+        self.read_name_hist[min(l_read_name, MAX_HIST_VALUE)] += 1
+        self.cigar_ops_hist[min(n_cigar_op, MAX_HIST_VALUE)] += 1
+        self.read_len_hist[min(l_seq, MAX_HIST_VALUE)] += 1
+
+        pos = 32 + l_read_name + 4 * n_cigar_op + (l_seq + 1) // 2 + l_seq
+        end = len(record)
+        while pos + 3 <= end:
+            code = _tag_code(record[pos:pos + 2])
+            value_type = chr(record[pos + 2])
+            start = pos
+            pos += 3
+            if value_type in _AUX_VALUE_BYTES:
+                pos += _AUX_VALUE_BYTES[value_type]
+                fixed, array = pos - start, 0
+            elif value_type in "ZH":
+                pos = record.index(0, pos) + 1
+                fixed, array = pos - start, 0
+            elif value_type == "B":
+                subtype = chr(record[pos])
+                count = struct.unpack_from("<i", record, pos + 1)[0]
+                array = count * _AUX_VALUE_BYTES[subtype]
+                pos += 5 + array
+                fixed = pos - start - array
+            else:
+                raise ValueError(f"Unknown aux tag type {value_type!r}")
+            self.tag_records[code] += 1
+            self.tag_fixed_bytes[code] += fixed
+            self.tag_array_bytes[code] += array
+        self._record_model = None
+
+    @classmethod
+    def from_bam(cls, path: str, n_records: int = 100_000) -> "BamRecordProfile":
+        """
+        Profile the first `n_records` records of a BAM file.
+        """
+        profile = cls()
+        for record in iter_bam_records(path, n_records):
+            profile.add_record(record)
+        return profile
+
+    def merge(self, other: "BamRecordProfile") -> "BamRecordProfile":
+        """
+        Combined profile of two samples, e.g. from several BAMs of one aligner.
+        """
+        merged = BamRecordProfile()
+        for name, value in vars(self).items():
+            if name != "_record_model":
+                setattr(merged, name, value + getattr(other, name))
+        return merged
+
+    @property
+    def mapped_fraction(self) -> float:
+        return self.n_mapped / self.n_records if self.n_records else 0.0
+
+    @property
+    def sa_fraction(self) -> float:
+        """
+        Fraction of records carrying an SA tag, for `supplementary_alignments`.
+        """
+        return self.tag_records[_SA_CODE] / self.n_records if self.n_records else 0.0
+
+    @property
+    def mean_read_len(self) -> float:
+        return self.bases / self.n_records if self.n_records else 0.0
+
+    def tag_summary(self) -> dict:
+        """
+        Mean bytes per record for each observed tag, split into fixed and array bytes.
+        """
+        n = max(self.n_records, 1)
+        return {
+            _tag_name(code): {
+                "records": int(self.tag_records[code]),
+                "fixed_bytes_per_record": self.tag_fixed_bytes[code] / n,
+                "array_bytes_per_record": self.tag_array_bytes[code] / n,
+            }
+            for code in np.flatnonzero(self.tag_records)
+        }
+
+    def to_record_model(self, cache_size: int = 1024) -> BamRecordModel:
+        """
+        BamRecordModel with the observed CIGAR mix, read names and aux tags.
+
+        The SA tag is modelled separately as `sa_tag_bytes` on the
+        `supplementary_alignments` fraction of reads (see `sa_fraction`). Array tag
+        elements are charged per base of read length, so the model scales to other
+        read lengths. Other tags are already averaged over mapped and unmapped
+        reads, so `percent_mapped` no longer changes the estimate.
+        """
+        if self._record_model is not None:
+            return self._record_model
+        if not self.n_records:
+            raise ValueError("Cannot build a record model from an empty profile")
+
+        n_cigar_ops = np.flatnonzero(self.cigar_ops_hist)
+        cigar_mix = {
+            f"{n}_ops": {"percent": self.cigar_ops_hist[n] / self.n_records, "bytes": 4 * n}
+            for n in n_cigar_ops
+        }
+        # the last bin holds every count above MAX_HIST_VALUE; correct its bytes to the exact total
+        overflow = self.cigar_ops - int((self.cigar_ops_hist * np.arange(len(self.cigar_ops_hist))).sum())
+        if overflow and self.cigar_ops_hist[-1]:
+            cigar_mix[f"{MAX_HIST_VALUE}_ops"]["bytes"] += 4 * overflow / self.cigar_ops_hist[-1]
+
+        sa_records = self.tag_records[_SA_CODE]
+        sa_bytes = (self.tag_fixed_bytes[_SA_CODE] + self.tag_array_bytes[_SA_CODE]) / sa_records if sa_records else 0.0
+        not_sa = np.arange(N_TAG_CODES) != _SA_CODE
+        aux_fixed = self.tag_fixed_bytes[not_sa].sum() / self.n_records
+        aux_per_base = self.tag_array_bytes[not_sa].sum() / self.bases if self.bases else 0.0
+
+        self._record_model = BamRecordModel(
+            fixed_fields=BAM_FIXED_FIELDS,
+            cigar_mix=cigar_mix,
+            aux_tag_types={"observed": {"bytes": float(aux_fixed), "description": "Observed aux tags except SA"}},
+            aux_tags={"observed": {"count": {"observed": 1}, "per_mapped_read": False,
+                                   "description": "Mean aux bytes per sampled record"}},
+            read_name_bytes=float((self.read_name_hist * np.arange(len(self.read_name_hist))).sum() / self.n_records),
+            sa_tag_bytes=float(sa_bytes),
+            aux_bytes_per_base=float(aux_per_base),
+            cache_size=cache_size,
+        )
+        return self._record_model
+
+    def save(self, path: str):
+        """
+        Save the profile as a compressed .npz file.
+        """
+        np.savez_compressed(path, **{k: np.asarray(v) for k, v in vars(self).items() if k != "_record_model"})
+
+    @classmethod
+    def load(cls, path: str) -> "BamRecordProfile":
+        """
+        Load a profile written by `save`.
+        """
+        profile = cls()
+        with np.load(path) as data:
+            for name in data.files:
+                value = data[name]
+                setattr(profile, name, value if value.ndim else int(value))
+        return profile
@@ -0,0 +1,151 @@
+"""
+Catalog of reference genome and capture panel sizes for coverage-based planning.
+
+The catalog ships with the package as a small TSV (`data/references.tsv`) and is
+parsed on first use, then kept indexed by lower-cased name and alias. Sizes turn a
+target coverage into the number of bases to sequence, allowing for duplicate reads
+and, for capture panels, reads that fall off target.
+"""
+import csv
+import io
+from functools import lru_cache
+from importlib import resources
+
+CATALOG_RESOURCE = "data/references.tsv"
+
+
+class Reference:
+    """
+    One catalog entry.
+
+    Parameters
+    ----------
+    name : str
+        Catalog name, e.g. "GRCh38".
+    kind : str
+        "genome" or "panel".
+    organism : str
+        Species name.
+    size_bp : int
+        Genome length or total capture target size in bases.
+    on_target_rate : float
+        Fraction of sequenced bases landing on the target; 1 for genomes.
+    aliases : tuple of str
+        Other names the entry is found under, e.g. "hg38".
+    description : str
+        Free-text description.
+    """
+
+    def __init__(self, name: str, kind: str, organism: str, size_bp: int, on_target_rate: float,
+                 aliases: tuple = (), description: str = ""):
+        self.name = name
+        self.kind = kind
+        self.organism = organism
+        self.size_bp = size_bp
+        self.on_target_rate = on_target_rate
+        self.aliases = aliases
+        self.description = description
+
+    def __repr__(self):
+        return f"Reference({self.name!r}, {self.kind}, {self.size_bp:,} bp)"
+
+
+@lru_cache(maxsize=1)
+def load_catalog() -> dict:
+    """
+    Catalog entries keyed by lower-cased name and alias, parsed once per process.
+    """
+    text = resources.files(__package__).joinpath(CATALOG_RESOURCE).read_text(encoding="utf-8")
+    index = {}
+    for row in csv.DictReader(io.StringIO(text), delimiter="\t"):
+        aliases = tuple(a for a in row["aliases"].split(";") if a)
+        reference = Reference(
+            name=row["name"],
+            kind=row["kind"],
+            organism=row["organism"],
+            size_bp=int(row["size_bp"]),
+            on_target_rate=float(row["on_target_rate"]),
+            aliases=aliases,
+            description=row["description"],
+        )
+        for key in (reference.name, *aliases):
+            index[key.lower()] = reference
+    return index
+
+
+def get_reference(name: str) -> Reference:
+    """
+    Look up a genome or panel by name or alias, ignoring case.
+    """
+    try:
+        return load_catalog()[name.lower()]
+    except KeyError:
+        raise KeyError(f"Unknown reference {name!r}; see list_references()") from None
+
+
+def list_references(kind: str = None) -> list:
+    """
+    Catalog entries in file order, optionally only "genome" or "panel" entries.
+    """
+    unique = list(dict.fromkeys(load_catalog().values()))
+    return [r for r in unique if kind is None or r.kind == kind]
+
+
+def target_size(reference):
+    """
+    Target size in bases for a catalog name, a size in bases, or an array of either.
+    """
+    import numpy as np
+
+    values = np.asarray(reference)
+    if values.dtype.kind in "USO":
+        return np.vectorize(lambda name: get_reference(str(name)).size_bp, otypes=[float])(values)
+    return values.astype(float)
+
+
+def coverage_to_bases(coverage, reference, duplicate_rate=0.0, on_target_rate=None):
+    """
+    Bases to sequence for a mean coverage of the target after deduplication.
+
+    Parameters
+    ----------
+    coverage : float or array-like of float
+        Mean deduplicated on-target depth, e.g. 30 for 30x WGS.
+    reference : str, float or array-like
+        Catalog name(s) or target size(s) in bases.
+    duplicate_rate : float or array-like of float, default=0.0
+        Fraction of reads that are PCR or optical duplicates.
+    on_target_rate : float or array-like of float, optional
+        Fraction of bases on target; defaults to the catalog value for named
+        references and 1 for plain sizes.
+
+    Returns
+    -------
+    numpy.ndarray
+        Sequenced bases, broadcast over the inputs.
+
+    Raises
+    ------
+    ValueError
+        If a coverage is negative, a duplicate rate is outside [0, 1) or an
+        on-target rate is outside (0, 1].
+    """
+    import numpy as np
+
+    coverage = np.asarray(coverage, dtype=float)
+    duplicate_rate = np.asarray(duplicate_rate, dtype=float)
+    if not np.all(coverage >= 0):
+        raise ValueError("coverage must not be negative")
+    if not np.all((duplicate_rate >= 0) & (duplicate_rate < 1)):
+        raise ValueError("duplicate_rate must be at least 0 and below 1")
+    if on_target_rate is None:
+        names = np.asarray(reference)
+        if names.dtype.kind in "USO":
+            on_target_rate = np.vectorize(lambda name: get_reference(str(name)).on_target_rate,
+                                          otypes=[float])(names)
+        else:
+            on_target_rate = 1.0
+    on_target_rate = np.asarray(on_target_rate, dtype=float)
+    if not np.all((on_target_rate > 0) & (on_target_rate <= 1)):
+        raise ValueError("on_target_rate must be above 0 and at most 1")
+    return coverage * target_size(reference) / ((1 - duplicate_rate) * on_target_rate)
@@ -0,0 +1,374 @@
+"""
+Scan a sequencing archive for BAM/CRAM/FASTQ.gz files and record their observed sizes.
+
+Each file is stat'ed and its read count taken from the cheapest available source:
+BAI index metadata for BAM, CRAM container headers for CRAM, and a streamed sample
+for anything else. Files are measured on a thread pool and stored in a FileIndex as
+they complete, so an interrupted scan resumes and re-runs skip unchanged files.
+"""
+import gzip
+import importlib.util
+import logging
+import os
+import struct
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from .calibration import read_cram_container_header, read_cram_file_definition, sample_file
+from .file_index import FileIndex, is_index_path
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_EXTENSIONS = (".bam", ".cram", ".fastq.gz", ".fq.gz")
+BAI_PSEUDO_BIN = 37450
+
+# failures confined to one file: unreadable, truncated or corrupt data
+MEASURE_ERRORS = (OSError, ValueError, EOFError, struct.error, zlib.error, gzip.BadGzipFile)
+
+def sample_name(path: str) -> str:
+    """
+    Sample name of a sequence file: its basename without sequence extensions.
+    """
+    name = os.path.basename(path)
+    for ext in SEQUENCE_EXTENSIONS:
+        if name.lower().endswith(ext):
+            return name[:-len(ext)]
+    return name
+
+
+def file_format(path: str) -> str:
+    """
+    File format ("BAM", "CRAM" or "FASTQ.gz") inferred from the extension.
+    """
+    name = path.lower()
+    if name.endswith(".bam"):
+        return "BAM"
+    if name.endswith(".cram"):
+        return "CRAM"
+    if name.endswith((".fastq.gz", ".fq.gz")):
+        return "FASTQ.gz"
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+def find_bai(path: str):
+    """
+    Return the BAI index for a BAM file (`x.bam.bai` or `x.bai`), or None.
+    """
+    for candidate in (path + ".bai", path[:-4] + ".bai"):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def read_bai_counts(bai_path: str) -> int:
+    """
+    Total number of records in a BAM file from its BAI index.
+
+    Sums the mapped and unmapped counts stored in each reference's pseudo-bin and
+    the trailing count of unplaced unmapped reads. Chunk and interval arrays are
+    skipped with seeks.
+
+    Parameters
+    ----------
+    bai_path : str
+        Path to a BAI index.
+
+    Returns
+    -------
+    int
+        Number of alignment records in the indexed BAM file.
+    """
+    total = 0
+    with open(bai_path, "rb") as handle:
+        if handle.read(4) != b"BAI\x01":
+            raise ValueError(f"{bai_path} is not a BAI index")
+        n_ref = struct.unpack("<i", handle.read(4))[0]
+        for _ in range(n_ref):
+            n_bin = struct.unpack("<i", handle.read(4))[0]
+            for _ in range(n_bin):
+                bin_id, n_chunk = struct.unpack("<Ii", handle.read(8))
+                if bin_id == BAI_PSEUDO_BIN and n_chunk == 2:
+                    _, _, n_mapped, n_unmapped = struct.unpack("<QQQQ", handle.read(32))
+                    total += n_mapped + n_unmapped
+                else:
+                    handle.seek(16 * n_chunk, os.SEEK_CUR)
+            n_intv = struct.unpack("<i", handle.read(4))[0]
+            handle.seek(8 * n_intv, os.SEEK_CUR)
+        n_no_coor = handle.read(8)
+        if len(n_no_coor) == 8:
+            total += struct.unpack("<Q", n_no_coor)[0]
+    return total
+
+
+def count_cram_records(path: str) -> int:
+    """
+    Exact number of records in a CRAM file by walking its container headers.
+
+    Container payloads are skipped with seeks, so only a few dozen bytes are read
+    per container.
+    """
+    total = 0
+    with open(path, "rb") as handle:
+        major_version, _ = read_cram_file_definition(handle)
+        while True:
+            header = read_cram_container_header(handle, major_version)
+            if header is None:
+                break
+            total += header["n_records"]
+            handle.seek(header["length"], os.SEEK_CUR)
+    return total
+
+
+def measure_file(path: str, n_records: int = 10_000) -> dict:
+    """
+    Stat a sequence file and get its read count without reading the whole file.
+
+    Parameters
+    ----------
+    path : str
+        Path to a BAM, CRAM or FASTQ.gz file.
+    n_records : int, default=10_000
+        Number of records to sample for the compression ratio and, when no index
+        is available, the read count.
+
+    Returns
+    -------
+    dict
+        One row of measurements, as stored in a FileIndex.
+    """
+    stat = os.stat(path)
+    row = {
+        "path": path,
+        "sample": sample_name(path),
+        "format": file_format(path),
+        "bytes": stat.st_size,
+        "mtime": stat.st_mtime,
+        "num_reads": None,
+        "read_count_method": None,
+        "compression_ratio": None,
+        "bytes_per_record_compressed": None,
+        "error": None,
+    }
+    try:
+        sample = sample_file(path, n_records=n_records)
+        row["compression_ratio"] = sample["compression_ratio"]
+        row["bytes_per_record_compressed"] = sample["bytes_per_record_compressed"]
+
+        bai = find_bai(path) if row["format"] == "BAM" else None
+        if bai is not None:
+            row["num_reads"] = read_bai_counts(bai)
+            row["read_count_method"] = "bai"
+        elif row["format"] == "CRAM":
+            row["num_reads"] = count_cram_records(path)
+            row["read_count_method"] = "cram_containers"
+        else:
+            row["num_reads"] = sample["estimated_n_reads"]
+            row["read_count_method"] = "complete" if sample["complete"] else "sampled"
+    except MEASURE_ERRORS as e:
+        logger.warning("Could not measure %s: %s", path, e)
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def iter_sequence_files(root: str):
+    """
+    Yield paths of BAM/CRAM/FASTQ.gz files under `root`, walking the tree lazily.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(SEQUENCE_EXTENSIONS):
+                        yield entry.path
+        except OSError as e:
+            logger.warning("Could not list %s: %s", directory, e)
+
+
+def _measure_if_changed(path: str, stamps: dict, n_records: int):
+    """
+    Measure `path` unless the index already holds it with the same size and mtime.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        logger.warning("Could not stat %s: %s", path, e)
+        return None
+    if stamps.get(path) == (stat.st_size, stat.st_mtime):
+        return None
+    try:
+        return measure_file(path, n_records=n_records)
+    except Exception as e:
+        # a parser bug on one odd file must not abort the scan and drop the buffered rows
+        logger.exception("Unexpected error measuring %s", path)
+        return {
+            "path": path,
+            "sample": sample_name(path),
+            "format": file_format(path),
+            "bytes": stat.st_size,
+            "mtime": stat.st_mtime,
+            "error": f"{type(e).__name__}: {e}",
+        }
+
+
+def _check_parquet(path: str):
+    """
+    Raise a clear error for a `.parquet` path when no Parquet engine is installed.
+    """
+    if path.endswith(".parquet") and importlib.util.find_spec("pyarrow") is None:
+        raise ValueError(f"{path}: Parquet needs pyarrow, which is not installed; use a .csv file instead")
+
+
+def load_observed_sizes(path: str) -> pd.DataFrame:
+    """
+    Load an observed-size dataset from a FileIndex database, CSV or Parquet file.
+    """
+    if is_index_path(path):
+        with FileIndex(path) as index:
+            return index.to_dataframe()
+    _check_parquet(path)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def write_observed_sizes(dataset: pd.DataFrame, output: str):
+    """
+    Write an observed-size dataset to CSV, or Parquet when `output` ends in `.parquet`.
+
+    Parquet needs the optional pyarrow package.
+    """
+    _check_parquet(output)
+    if output.endswith(".parquet"):
+        dataset.to_parquet(output, index=False)
+    else:
+        dataset.to_csv(output, index=False)
+
+
+def scan_directory(root: str,
+                   index,
+                   max_workers: int = 16,
+                   n_records: int = 10_000,
+                   commit_every: int = 1000,
+                   prune: bool = True) -> pd.DataFrame:
+    """
+    Measure every new or changed sequence file under `root` concurrently.
+
+    Measurements are stored in a FileIndex, committed every `commit_every` files,
+    so an interrupted scan resumes and nightly re-runs only measure files whose
+    size or mtime changed. Stat calls run on the worker threads too, since on
+    network storage they dominate the cost of unchanged files.
+
+    Parameters
+    ----------
+    root : str
+        Directory tree to scan.
+    index : FileIndex or str
+        Index to update, or the path of its SQLite database.
+    max_workers : int, default=16
+        Number of threads measuring files; most time is spent waiting on storage.
+    n_records : int, default=10_000
+        Records sampled per file, see `measure_file`.
+    commit_every : int, default=1000
+        Number of measured files buffered before writing them to the index.
+    prune : bool, default=True
+        Remove index entries under `root` for files that no longer exist.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed measurements for every file under `root`.
+    """
+    if isinstance(index, str):
+        with FileIndex(index) as opened:
+            return scan_directory(root, opened, max_workers, n_records, commit_every, prune)
+
+    stamps = index.stamps(prefix=root)
+    seen = set()
+    pending_rows = []
+
+    def collect(futures):
+        for future in futures:
+            row = future.result()
+            if row is not None:
+                pending_rows.append(row)
+        if len(pending_rows) >= commit_every:
+            index.upsert(pending_rows)
+            pending_rows.clear()
+
+    max_in_flight = max_workers * 4
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        for path in iter_sequence_files(root):
+            seen.add(path)
+            in_flight.add(executor.submit(_measure_if_changed, path, stamps, n_records))
+            if len(in_flight) >= max_in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(finished)
+        collect(in_flight)
+    if pending_rows:
+        index.upsert(pending_rows)
+
+    if prune:
+        index.remove(set(stamps) - seen)
+    return index.to_dataframe(prefix=root)
+
+
+def observed_bam_cram_records(dataset: pd.DataFrame) -> list:
+    """
+    Reshape an observed-size dataset into `bam_dragen`-style records.
+
+    Files are grouped by sample; each record has num_reads, bam_bytes and
+    cram_bytes (None when that format was not found for the sample).
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Output of `scan_directory`, `load_observed_sizes` or `FileIndex.to_dataframe`.
+
+    Returns
+    -------
+    List[Dict]
+        One record per sample with at least one BAM or CRAM file.
+    """
+    alignments = dataset[dataset["format"].isin(["BAM", "CRAM"]) & dataset["num_reads"].notna()]
+    records = []
+    for sample, group in alignments.groupby("sample", sort=True):
+        by_format = {fmt: rows.iloc[0] for fmt, rows in group.groupby("format")}
+        source = by_format.get("CRAM", by_format.get("BAM"))
+        records.append({
+            "sample": sample,
+            "num_reads": int(source["num_reads"]),
+            "bam_bytes": int(by_format["BAM"]["bytes"]) if "BAM" in by_format else None,
+            "cram_bytes": int(by_format["CRAM"]["bytes"]) if "CRAM" in by_format else None,
+        })
+    return records
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build an observed-size dataset from a sequencing archive.")
+    parser.add_argument("root", help="Directory tree to scan")
+    parser.add_argument("index", help="SQLite FileIndex to create or update")
+    parser.add_argument("--export", help="Also write the scanned rows to this .csv or .parquet (needs pyarrow) file")
+    parser.add_argument("--workers", type=int, default=16, help="Number of scanner threads")
+    parser.add_argument("--records", type=int, default=10_000, help="Records sampled per file")
+    args = parser.parse_args()
+    if args.export:
+        # fail before the scan, not after hours of it
+        try:
+            _check_parquet(args.export)
+        except ValueError as e:
+            parser.error(str(e))
+
+    logging.basicConfig(level=logging.INFO)
+    result = scan_directory(args.root, args.index, max_workers=args.workers, n_records=args.records)
+    if args.export:
+        write_observed_sizes(result, args.export)
+    logger.info("%d files indexed under %s", len(result), args.root)
@@ -0,0 +1,267 @@
+"""
+Scratch-space planning: how many samples fit on a scratch volume at once.
+
+Each sample's peak scratch footprint comes from the pipeline output model, which
+counts every intermediate alive at its busiest stage. Samples are then packed under
+a byte budget, either into waves that start together (worst-fit decreasing bin
+packing) or as a rolling queue that starts the next sample as soon as finishing
+samples free enough space. Both use a heap, so thousands of samples schedule in
+milliseconds.
+"""
+import argparse
+import heapq
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .cli import DEFAULTS, _column_mapping, _drop_invalid_rows, _param_column, row_problems
+from .pipeline_outputs import estimate_sample_outputs
+
+BYTES_PER_GB = 1024 ** 3
+
+DEFAULT_GBASES_PER_HOUR = 20.0
+DEFAULT_OVERHEAD_HOURS = 0.5
+
+
+def sample_footprints(samples: pd.DataFrame,
+                      defaults: dict = None,
+                      gbases_per_hour: float = DEFAULT_GBASES_PER_HOUR,
+                      overhead_hours: float = DEFAULT_OVERHEAD_HOURS,
+                      **pipeline_params) -> pd.DataFrame:
+    """
+    Peak scratch bytes, final stored bytes and runtime of each sample.
+
+    Parameters
+    ----------
+    samples : pd.DataFrame
+        Sample sheet; columns may use any header in `cli.COLUMN_ALIASES`.
+    defaults : dict, optional
+        Defaults for missing columns and empty cells, overriding `cli.DEFAULTS`.
+    gbases_per_hour : float, default=20.0
+        Pipeline throughput per sample, in gigabases per hour.
+    overhead_hours : float, default=0.5
+        Fixed runtime per sample (staging, QC, delivery).
+    **pipeline_params
+        Other `estimate_sample_outputs` parameters, e.g. `sort_spill_ratio`.
+
+    Returns
+    -------
+    pd.DataFrame
+        sample, n_reads, peak_scratch_bytes, peak_stage, stored_bytes and runtime_hours.
+
+    Raises
+    ------
+    ValueError
+        If a row has no valid read count or a non-numeric parameter (see
+        `cli.row_problems`); the message lists sheet line numbers.
+    """
+    defaults = {**DEFAULTS, **(defaults or {})}
+    sheet = samples.rename(columns=_column_mapping(samples.columns))
+    problems = row_problems(sheet, defaults).dropna()
+    if len(problems):
+        lines = "; ".join(f"line {i + 2}: {problem}" for i, problem in problems.iloc[:10].items())
+        raise ValueError(f"Sample sheet rows cannot be scheduled ({lines})")
+    for name, default in defaults.items():
+        sheet[name] = _param_column(sheet, name, default)
+    sheet["n_reads"] = pd.to_numeric(sheet["n_reads"])
+    sheet["pe"] = sheet["pe"].astype(str).str.lower().isin(["true", "1", "yes", "pe"])
+    sheet["output_format"] = sheet["output_format"].astype(str).str.upper()
+
+    footprints = pd.DataFrame({
+        "sample": sheet["sample"] if "sample" in sheet else sheet.index,
+        "n_reads": sheet["n_reads"].to_numpy(dtype=np.int64),
+    }, index=sheet.index)
+    # output format and pairing switch artifacts on or off, so each combination is one batch
+    for (output_format, pe), group in sheet.groupby(["output_format", "pe"]):
+        params = {name: group[name].to_numpy(dtype=float) for name in defaults if name not in ("output_format", "pe")}
+        params["n_reads"] = group["n_reads"].to_numpy(dtype=float)
+        outputs = estimate_sample_outputs({**pipeline_params, **params}, output_format=output_format, pe=pe)
+        footprints.loc[group.index, "peak_scratch_bytes"] = outputs["peak_scratch_bytes"]
+        footprints.loc[group.index, "peak_stage"] = outputs["peak_stage"]
+        footprints.loc[group.index, "stored_bytes"] = outputs["stored_bytes"]
+
+    bases = sheet["n_reads"].to_numpy(dtype=float) * sheet["read_len"].to_numpy(dtype=float) * np.where(sheet["pe"], 2, 1)
+    footprints["runtime_hours"] = overhead_hours + bases / (gbases_per_hour * 1e9)
+    return footprints
+
+
+def _check_fits(peak_bytes: np.ndarray, budget_bytes: float):
+    if not np.isfinite(peak_bytes).all():
+        raise ValueError("Every sample needs a finite peak scratch footprint")
+    if peak_bytes.size and peak_bytes.max() > budget_bytes:
+        raise ValueError(f"A sample needs {peak_bytes.max() / BYTES_PER_GB:,.1f} GB of scratch, "
+                         f"more than the {budget_bytes / BYTES_PER_GB:,.1f} GB budget")
+
+
+def pack_waves(peak_bytes, budget_bytes: float) -> np.ndarray:
+    """
+    Assign samples to waves that run together, keeping each wave under the budget.
+
+    Worst-fit decreasing: samples are placed largest first into the open wave with
+    the most free space, kept at the top of a max-heap, and a new wave is opened
+    when the largest free space is too small.
+
+    Parameters
+    ----------
+    peak_bytes : array-like of float
+        Peak scratch footprint of each sample.
+    budget_bytes : float
+        Scratch space available to one wave.
+
+    Returns
+    -------
+    numpy.ndarray
+        Wave number of each sample, in input order.
+    """
+    peak_bytes = np.asarray(peak_bytes, dtype=float)
+    _check_fits(peak_bytes, budget_bytes)
+    waves = np.empty(len(peak_bytes), dtype=np.int64)
+    free = []  # (-free bytes, wave)
+    for i in np.argsort(-peak_bytes, kind="stable"):
+        if free and -free[0][0] >= peak_bytes[i]:
+            neg_free, wave = heapq.heappop(free)
+            heapq.heappush(free, (neg_free + peak_bytes[i], wave))
+        else:
+            wave = len(free)
+            heapq.heappush(free, (peak_bytes[i] - budget_bytes, wave))
+        waves[i] = wave
+    return waves
+
+
+def rolling_schedule(peak_bytes, runtime_hours, budget_bytes: float):
+    """
+    Start samples largest first as soon as enough scratch is free.
+
+    Running samples sit in a min-heap by finish time; when the next sample does not
+    fit, the earliest finishers are retired until it does.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray]
+        Start and finish hour of each sample, in input order.
+    """
+    peak_bytes = np.asarray(peak_bytes, dtype=float)
+    runtime_hours = np.asarray(runtime_hours, dtype=float)
+    _check_fits(peak_bytes, budget_bytes)
+    start = np.empty(len(peak_bytes))
+    running = []  # (finish hour, peak bytes)
+    now = 0.0
+    free = budget_bytes
+    for i in np.argsort(-peak_bytes, kind="stable"):
+        while free < peak_bytes[i]:
+            now, released = heapq.heappop(running)
+            free = free + released if running else budget_bytes
+        start[i] = now
+        free -= peak_bytes[i]
+        heapq.heappush(running, (now + runtime_hours[i], peak_bytes[i]))
+    return start, start + runtime_hours
+
+
+def schedule_samples(footprints: pd.DataFrame, budget_bytes: float, mode: str = "waves") -> dict:
+    """
+    Schedule samples under a scratch budget and summarize throughput.
+
+    Parameters
+    ----------
+    footprints : pd.DataFrame
+        Output of `sample_footprints`.
+    budget_bytes : float
+        Scratch space available, in bytes.
+    mode : str, default="waves"
+        "waves" runs each wave to completion before the next (`pack_waves`);
+        "rolling" starts samples as space frees up (`rolling_schedule`).
+
+    Returns
+    -------
+    dict
+        schedule (footprints with wave, start_hour and finish_hour), samples,
+        waves, max_concurrent, makespan_hours, samples_per_day and
+        peak_scratch_bytes (largest total footprint at any time).
+    """
+    schedule = footprints.copy()
+    peak = schedule["peak_scratch_bytes"].to_numpy(dtype=float)
+    runtime = schedule["runtime_hours"].to_numpy(dtype=float)
+    if mode == "waves":
+        waves = pack_waves(peak, budget_bytes)
+        n_waves = int(waves.max()) + 1 if len(waves) else 0
+        wave_hours = np.zeros(n_waves)
+        np.maximum.at(wave_hours, waves, runtime)
+        wave_start = np.concatenate([[0.0], np.cumsum(wave_hours)[:-1]])
+        schedule["wave"] = waves
+        schedule["start_hour"] = wave_start[waves]
+        schedule["finish_hour"] = schedule["start_hour"] + runtime
+        max_concurrent = int(np.bincount(waves).max()) if len(waves) else 0
+        peak_total = float(np.bincount(waves, weights=peak).max()) if len(waves) else 0.0
+    elif mode == "rolling":
+        start, finish = rolling_schedule(peak, runtime, budget_bytes)
+        schedule["start_hour"] = start
+        schedule["finish_hour"] = finish
+        n_waves = None
+        # sweep start (+) and finish (-) events; finishes sort first at equal times
+        times = np.concatenate([finish, start])
+        deltas = np.concatenate([-np.ones(len(finish)), np.ones(len(start))])
+        weights = np.concatenate([-peak, peak])
+        order = np.lexsort((deltas, times))
+        max_concurrent = int(np.cumsum(deltas[order]).max()) if len(order) else 0
+        peak_total = float(np.cumsum(weights[order]).max()) if len(order) else 0.0
+    else:
+        raise ValueError(f"Unknown schedule mode {mode!r}; expected 'waves' or 'rolling'")
+
+    makespan = float(schedule["finish_hour"].max()) if len(schedule) else 0.0
+    return {
+        "schedule": schedule,
+        "samples": len(schedule),
+        "waves": n_waves,
+        "max_concurrent": max_concurrent,
+        "makespan_hours": makespan,
+        "samples_per_day": len(schedule) / makespan * 24 if makespan else 0.0,
+        "peak_scratch_bytes": peak_total,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="seqstoreestimator-schedule",
+        description="Pack a sample sheet into runs that fit a scratch space budget.",
+    )
+    parser.add_argument("sample_sheet", help="CSV/TSV with sample, reads, read_length, format, ... columns ('-' for stdin)")
+    parser.add_argument("--budget-gb", type=float, required=True, help="Scratch space available, in GB")
+    parser.add_argument("--mode", choices=["waves", "rolling"], default="waves",
+                        help="Run fixed waves, or start samples as space frees up")
+    parser.add_argument("-o", "--output", help="Write the per-sample schedule to this CSV ('-' for stdout)")
+    parser.add_argument("--sep", help="Sample sheet field separator (default: from extension)")
+    parser.add_argument("--gbases-per-hour", type=float, default=DEFAULT_GBASES_PER_HOUR,
+                        help="Pipeline throughput per sample, in gigabases per hour")
+    parser.add_argument("--overhead-hours", type=float, default=DEFAULT_OVERHEAD_HOURS,
+                        help="Fixed runtime per sample, in hours")
+    parser.add_argument("--sort-spill-ratio", type=float, default=1.0,
+                        help="Temporary sort files relative to the sorted BAM")
+    parser.add_argument("--delete-fastqz", action="store_true", help="Delete the input FASTQ.gz after alignment")
+    args = parser.parse_args(argv)
+
+    sep = args.sep
+    if sep is None:
+        sep = "\t" if args.sample_sheet.lower().endswith((".tsv", ".txt", ".tsv.gz")) else ","
+    samples = pd.read_csv(sys.stdin if args.sample_sheet == "-" else args.sample_sheet, sep=sep)
+    skipped = []
+    samples = next(_drop_invalid_rows([samples], skipped,
+                                      source="<stdin>" if args.sample_sheet == "-" else args.sample_sheet))
+    footprints = sample_footprints(samples,
+                                   gbases_per_hour=args.gbases_per_hour,
+                                   overhead_hours=args.overhead_hours,
+                                   sort_spill_ratio=args.sort_spill_ratio,
+                                   keep_fastqz=not args.delete_fastqz)
+    result = schedule_samples(footprints, args.budget_gb * BYTES_PER_GB, mode=args.mode)
+
+    if args.output:
+        result["schedule"].to_csv(sys.stdout if args.output == "-" else args.output, index=False)
+    for name, value in result.items():
+        if name != "schedule":
+            print(f"{name}\t{value}", file=sys.stderr)
+    if skipped:
+        sys.exit(f"seqstoreestimator-schedule: skipped {len(skipped)} invalid row(s)")
+
+
+if __name__ == "__main__":
+    main()
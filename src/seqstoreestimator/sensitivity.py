@@ -0,0 +1,242 @@
+"""
+Parameter sweeps and sensitivity indices for the BAM/CRAM and FASTQ.gz estimators.
+
+A sweep evaluates the size models on the full Cartesian grid of several parameters.
+Each parameter lives on its own array axis and the byte models broadcast over them,
+so intermediate arrays only span the axes they depend on and a 10^6-point grid
+costs a few array multiplications. Because the grid is full factorial, variance-based
+(Sobol) indices are exact grid averages, and one-at-a-time (tornado) swings are
+slices through the baseline point.
+"""
+import numpy as np
+
+from .core import DEFAULT_BAM_RECORD_MODEL, fastq_bytes_per_read
+
+DEFAULT_POINTS = 10
+DEFAULT_SPREAD = 0.5
+
+SWEEP_OUTPUTS = ("alignment_bytes", "fastqz_bytes", "total_bytes")
+
+# parameters the sweep understands, with bounds they are clipped to
+SWEEP_PARAMETERS = {
+    "read_len": (1, None),
+    "percent_mapped": (0.0, 1.0),
+    "supplementary_alignments": (0.0, 1.0),
+    "bam_compression_ratio": (0.0, 1.0),
+    "cram_compression_ratio": (0.0, 1.0),
+    "gzip_compression_ratio": (0.0, 1.0),
+}
+
+DEFAULT_BASELINE = {
+    "read_len": 150,
+    "percent_mapped": 0.9,
+    "supplementary_alignments": 0.1,
+    "bam_compression_ratio": 0.15,
+    "cram_compression_ratio": 0.3,
+    "gzip_compression_ratio": 0.25,
+}
+
+
+def parameter_grid(baseline: dict = None, spread: float = DEFAULT_SPREAD, points: int = DEFAULT_POINTS) -> dict:
+    """
+    Evenly spaced values from `(1 - spread)` to `(1 + spread)` times each baseline value.
+
+    Values are clipped to the bounds in `SWEEP_PARAMETERS` and read lengths are
+    rounded to whole bases. The (clipped) baseline value is always added to the
+    grid, so tornado slices pass through it; a parameter may therefore have one
+    more value than `points`, or fewer where clipping makes values coincide.
+
+    Returns
+    -------
+    dict
+        Parameter name to 1-D array of values, in `SWEEP_PARAMETERS` order.
+    """
+    baseline = {**DEFAULT_BASELINE, **(baseline or {})}
+    grid = {}
+    for name, (low, high) in SWEEP_PARAMETERS.items():
+        values = np.linspace(baseline[name] * (1 - spread), baseline[name] * (1 + spread), points)
+        values = np.clip(np.append(values, baseline[name]), low, high)
+        if name == "read_len":
+            values = np.rint(values)
+        grid[name] = np.unique(values)
+    return grid
+
+
+def sweep(grid: dict,
+          n_reads: float = 1_000_000_000,
+          output_format: str = "CRAM",
+          pe: bool = True,
+          include_fastqz: bool = True,
+          record_model=DEFAULT_BAM_RECORD_MODEL,
+          **fixed) -> dict:
+    """
+    Evaluate the size estimators on every combination of the grid values.
+
+    Parameters
+    ----------
+    grid : dict
+        Parameter name to 1-D array of values, e.g. from `parameter_grid`. Names
+        must be in `SWEEP_PARAMETERS`; `n_reads` may be swept as well.
+    n_reads : float, default=1_000_000_000
+        Number of reads, when not swept.
+    output_format : str, default="CRAM"
+        Alignment format ("BAM" or "CRAM").
+    pe : bool, default=True
+        Paired-end FASTQ.
+    include_fastqz : bool, default=True
+        Count the FASTQ.gz in total_bytes.
+    record_model : BamRecordModel, default=DEFAULT_BAM_RECORD_MODEL
+        Per-read byte model.
+    **fixed
+        Values for parameters not in `grid`; others take `DEFAULT_BASELINE`.
+
+    Returns
+    -------
+    dict
+        parameters (axis order), values (grid) and alignment_bytes, fastqz_bytes
+        and total_bytes, each broadcastable to the grid shape.
+    """
+    unknown = set(grid) - set(SWEEP_PARAMETERS) - {"n_reads"}
+    if unknown:
+        raise ValueError(f"Cannot sweep {sorted(unknown)}; expected names from {sorted(SWEEP_PARAMETERS)} or n_reads")
+    names = list(grid)
+    p = {**DEFAULT_BASELINE, "n_reads": n_reads, **fixed}
+    for axis, name in enumerate(names):
+        shape = [1] * len(names)
+        shape[axis] = -1
+        p[name] = np.asarray(grid[name], dtype=float).reshape(shape)
+
+    bytes_per_read = record_model.bytes_per_read_array(p["read_len"], p["percent_mapped"], p["supplementary_alignments"])
+    alignment_bytes = p["n_reads"] * bytes_per_read * p["bam_compression_ratio"]
+    if output_format.upper() == "CRAM":
+        alignment_bytes = alignment_bytes * p["cram_compression_ratio"]
+    fastqz_bytes = p["n_reads"] * fastq_bytes_per_read(p["read_len"], pe=pe) * p["gzip_compression_ratio"]
+    total_bytes = alignment_bytes + fastqz_bytes if include_fastqz else alignment_bytes
+
+    return {
+        "parameters": names,
+        "values": {name: np.asarray(grid[name], dtype=float) for name in names},
+        "alignment_bytes": alignment_bytes,
+        "fastqz_bytes": fastqz_bytes,
+        "total_bytes": total_bytes,
+    }
+
+
+def split_grid(grid: dict, n_chunks: int) -> list:
+    """
+    Split a grid into sub-grids along its first parameter, e.g. to sweep in parallel.
+    """
+    first = next(iter(grid))
+    return [{**grid, first: values} for values in np.array_split(np.asarray(grid[first]), n_chunks) if len(values)]
+
+
+def merge_sweeps(results: list) -> dict:
+    """
+    Join `sweep` results of the sub-grids from `split_grid`, in order.
+    """
+    names = results[0]["parameters"]
+    first = names[0]
+    merged = {
+        "parameters": names,
+        "values": {**results[0]["values"], first: np.concatenate([r["values"][first] for r in results])},
+    }
+    for output in SWEEP_OUTPUTS:
+        # outputs that do not depend on the first parameter have length 1 on its axis
+        merged[output] = np.concatenate([
+            np.broadcast_to(r[output], (len(r["values"][first]),) + np.shape(r[output])[1:]) for r in results
+        ])
+    return merged
+
+
+def _full(result: dict, output: str) -> np.ndarray:
+    if output not in SWEEP_OUTPUTS:
+        raise ValueError(f"Unknown sweep output {output!r}; expected one of {SWEEP_OUTPUTS}")
+    shape = tuple(len(result["values"][name]) for name in result["parameters"])
+    return np.broadcast_to(result[output], shape)
+
+
+def sobol_indices(result: dict, output: str = "total_bytes") -> dict:
+    """
+    First-order and total Sobol indices of each swept parameter.
+
+    Grid points are weighted equally, i.e. parameters are treated as uniform over
+    their grid values. The first-order index is Var(E[Y | X_i]) / Var(Y); the total
+    index is E[Var(Y | X_~i)] / Var(Y) and includes interactions.
+
+    Returns
+    -------
+    dict
+        Parameter name to {"first_order", "total"}.
+    """
+    y = _full(result, output)
+    variance = y.var()
+    indices = {}
+    for axis, name in enumerate(result["parameters"]):
+        if not variance:
+            indices[name] = {"first_order": 0.0, "total": 0.0}
+            continue
+        others = tuple(i for i in range(y.ndim) if i != axis)
+        indices[name] = {
+            "first_order": float(y.mean(axis=others).var() / variance),
+            "total": float(y.var(axis=axis).mean() / variance),
+        }
+    return indices
+
+
+def tornado(result: dict, output: str = "total_bytes", baseline: dict = None) -> list:
+    """
+    One-at-a-time swings: each parameter at its lowest and highest grid value, the
+    others at the grid point nearest `baseline` (default: the middle of each axis).
+
+    Returns
+    -------
+    List[dict]
+        parameter, low_value, high_value, low, high and swing (high - low output),
+        largest absolute swing first.
+    """
+    y = _full(result, output)
+    names = result["parameters"]
+    center = []
+    for name in names:
+        values = result["values"][name]
+        if baseline and name in baseline:
+            center.append(int(np.abs(values - baseline[name]).argmin()))
+        else:
+            center.append(len(values) // 2)
+
+    bars = []
+    for axis, name in enumerate(names):
+        index = list(center)
+        index[axis] = slice(None)
+        line = y[tuple(index)]
+        values = result["values"][name]
+        bars.append({
+            "parameter": name,
+            "low_value": float(values[0]),
+            "high_value": float(values[-1]),
+            "low": float(line[0]),
+            "high": float(line[-1]),
+            "swing": float(line[-1] - line[0]),
+        })
+    return sorted(bars, key=lambda bar: abs(bar["swing"]), reverse=True)
+
+
+def heatmap(result: dict, x: str, y: str, output: str = "total_bytes") -> tuple:
+    """
+    Output averaged over every parameter except `x` and `y`.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        x values, y values and the output with shape (len(y values), len(x values)).
+    """
+    if x == y:
+        raise ValueError("Heatmap needs two different parameters")
+    values = _full(result, output)
+    names = result["parameters"]
+    x_axis, y_axis = names.index(x), names.index(y)
+    others = tuple(i for i in range(values.ndim) if i not in (x_axis, y_axis))
+    z = values.mean(axis=others) if others else values
+    if y_axis > x_axis:
+        z = z.T
+    return result["values"][x], result["values"][y], z
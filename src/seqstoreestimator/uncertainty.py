@@ -0,0 +1,209 @@
+"""
+Monte Carlo prediction intervals for BAM/CRAM/FASTQ.gz sizes and storage cost.
+
+Uncertain inputs (compression ratios, mapped fraction, supplementary rate and the
+CIGAR mix) are drawn as whole NumPy arrays and pushed through the same per-read
+byte model as the batch estimators, so a million draws is a handful of vectorized
+array operations rather than a Python loop.
+"""
+import numpy as np
+
+from .core import CIGAR_MIX, DEFAULT_BAM_RECORD_MODEL, fastq_bytes_per_read
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+DEFAULT_SPREAD = 0.2
+DEFAULT_CIGAR_CONCENTRATION = 200.0
+BYTES_PER_GB = 1024 ** 3
+
+# fractions are bounded by 1; supplementary alignments per read are not
+_FRACTION_PARAMETERS = (
+    "bam_compression_ratio",
+    "cram_compression_ratio",
+    "gzip_compression_ratio",
+    "percent_mapped",
+)
+_RATE_PARAMETERS = (
+    "supplementary_alignments",
+)
+
+
+def default_distributions(bam_compression_ratio: float = 0.15,
+                          cram_compression_ratio: float = 0.3,
+                          gzip_compression_ratio: float = 0.25,
+                          supplementary_alignments: float = 0.1,
+                          percent_mapped: float = 0.9,
+                          spread: float = DEFAULT_SPREAD,
+                          cigar_concentration: float = DEFAULT_CIGAR_CONCENTRATION) -> dict:
+    """
+    Triangular distributions centred on point estimates, plus a Dirichlet CIGAR mix.
+
+    Each parameter ranges from `(1 - spread)` to `(1 + spread)` times its point
+    value, clipped at 0 and, for the ratios and `percent_mapped`, at 1. The CIGAR mix is drawn around `CIGAR_MIX`; a larger
+    `cigar_concentration` keeps draws closer to it.
+
+    Returns
+    -------
+    dict
+        Distribution specs accepted by `draw_parameters`.
+    """
+    values = {
+        "bam_compression_ratio": bam_compression_ratio,
+        "cram_compression_ratio": cram_compression_ratio,
+        "gzip_compression_ratio": gzip_compression_ratio,
+        "supplementary_alignments": supplementary_alignments,
+        "percent_mapped": percent_mapped,
+    }
+    distributions = {}
+    for name, v in values.items():
+        high = v * (1 + spread)
+        if name in _FRACTION_PARAMETERS:
+            high = min(high, 1.0)
+        distributions[name] = ("triangular", max(v * (1 - spread), 0.0), v, max(high, v))
+    distributions["cigar_mix"] = ("dirichlet", cigar_concentration)
+    return distributions
+
+
+def _draw(spec, n_draws: int, rng: np.random.Generator) -> np.ndarray:
+    kind, *params = spec
+    if kind == "fixed":
+        return np.full(n_draws, params[0], dtype=float)
+    if kind == "uniform":
+        return rng.uniform(params[0], params[1], n_draws)
+    if kind == "triangular":
+        low, mode, high = params
+        if low == high:
+            return np.full(n_draws, mode, dtype=float)
+        return rng.triangular(low, mode, high, n_draws)
+    if kind == "normal":
+        return rng.normal(params[0], params[1], n_draws)
+    if kind == "beta":
+        return rng.beta(params[0], params[1], n_draws)
+    raise ValueError(f"Unknown distribution: {kind}")
+
+
+def _draw_cigar_bytes(spec, n_draws: int, rng: np.random.Generator) -> np.ndarray:
+    percents = np.array([v["percent"] for v in CIGAR_MIX.values()])
+    op_bytes = np.array([v["bytes"] for v in CIGAR_MIX.values()], dtype=float)
+    kind, *params = spec
+    if kind == "fixed":
+        return np.full(n_draws, percents @ op_bytes)
+    if kind == "dirichlet":
+        return rng.dirichlet(percents * params[0], n_draws) @ op_bytes
+    raise ValueError(f"Unknown CIGAR mix distribution: {kind}")
+
+
+def draw_parameters(distributions: dict, n_draws: int, seed=None) -> dict:
+    """
+    Draw `n_draws` samples of every parameter.
+
+    Parameters
+    ----------
+    distributions : dict
+        Specs keyed by parameter name, e.g. `("triangular", low, mode, high)`,
+        `("uniform", low, high)`, `("normal", mean, sd)`, `("beta", a, b)` or
+        `("fixed", value)`. `cigar_mix` takes `("dirichlet", concentration)` or
+        `("fixed",)`.
+    n_draws : int
+        Number of draws.
+    seed : int or numpy.random.Generator, optional
+        Seed for reproducible draws.
+
+    Returns
+    -------
+    dict
+        Arrays of draws keyed by parameter name; the CIGAR mix is returned as
+        mean `cigar_bytes` per read. Ratios and fractions are clipped to [0, 1],
+        supplementary alignments per read at 0.
+    """
+    rng = np.random.default_rng(seed)
+    draws = {}
+    for name, spec in distributions.items():
+        if name == "cigar_mix":
+            draws["cigar_bytes"] = _draw_cigar_bytes(spec, n_draws, rng)
+        elif name in _FRACTION_PARAMETERS:
+            draws[name] = np.clip(_draw(spec, n_draws, rng), 0.0, 1.0)
+        elif name in _RATE_PARAMETERS:
+            draws[name] = np.maximum(_draw(spec, n_draws, rng), 0.0)
+        else:
+            raise ValueError(f"Unknown parameter: {name}")
+    return draws
+
+
+def _percentiles(values: np.ndarray, percentiles) -> dict:
+    return {f"p{p:g}": float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))}
+
+
+def simulate_sizes(n_reads: int,
+                   read_len: int = 150,
+                   output_format: str = "CRAM",
+                   distributions: dict = None,
+                   n_draws: int = 1_000_000,
+                   cost_per_month_per_gb: float = 0.0064,
+                   include_fastqz: bool = True,
+                   pe: bool = True,
+                   percentiles=DEFAULT_PERCENTILES,
+                   seed=None) -> dict:
+    """
+    Prediction intervals for file sizes and monthly storage cost.
+
+    Parameters
+    ----------
+    n_reads : int
+        Number of sequencing reads.
+    read_len : int, default=150
+        Read length in bases.
+    output_format : str, default="CRAM"
+        Output format ("BAM" or "CRAM").
+    distributions : dict, optional
+        Parameter distributions, see `draw_parameters`. Parameters left out keep
+        the point values of `default_distributions()`.
+    n_draws : int, default=1_000_000
+        Number of Monte Carlo draws.
+    cost_per_month_per_gb : float, default=0.0064
+        Storage price in dollars per GB per month.
+    include_fastqz : bool, default=True
+        Include the FASTQ.gz size in `total_bytes` and `monthly_cost`.
+    pe : bool, default=True
+        Paired-end FASTQ.
+    percentiles : sequence of float, default=(5, 50, 95)
+        Percentiles to report.
+    seed : int or numpy.random.Generator, optional
+        Seed for reproducible draws.
+
+    Returns
+    -------
+    dict
+        For each of bam_bytes, fastqz_bytes, total_bytes and monthly_cost, a dict
+        of percentiles keyed "p5", "p50", "p95", ... The bam_bytes entry is the
+        CRAM size when `output_format` is "CRAM".
+    """
+    if distributions is None:
+        distributions = default_distributions()
+    else:
+        distributions = {
+            **{name: ("fixed", spec[2]) if spec[0] == "triangular" else ("fixed",)
+               for name, spec in default_distributions().items()},
+            **distributions,
+        }
+    draws = draw_parameters(distributions, n_draws, seed=seed)
+
+    bytes_per_read = DEFAULT_BAM_RECORD_MODEL.bytes_per_read_array(
+        read_len=read_len,
+        percent_mapped=draws["percent_mapped"],
+        supplementary_alignments=draws["supplementary_alignments"],
+        cigar_bytes=draws["cigar_bytes"],
+    )
+    bam_bytes = n_reads * bytes_per_read * draws["bam_compression_ratio"]
+    if output_format.upper() == "CRAM":
+        bam_bytes *= draws["cram_compression_ratio"]
+
+    fastqz_bytes = n_reads * fastq_bytes_per_read(read_len, pe=pe) * draws["gzip_compression_ratio"]
+    total_bytes = bam_bytes + fastqz_bytes if include_fastqz else bam_bytes
+    monthly_cost = total_bytes * (cost_per_month_per_gb / BYTES_PER_GB)
+
+    return {
+        "bam_bytes": _percentiles(bam_bytes, percentiles),
+        "fastqz_bytes": _percentiles(fastqz_bytes, percentiles),
+        "total_bytes": _percentiles(total_bytes, percentiles),
+        "monthly_cost": _percentiles(monthly_cost, percentiles),
+    }
@@ -0,0 +1,159 @@
+"""
+Writers for small synthetic BAM, CRAM and FASTQ.gz files used as test fixtures.
+
+Only the structure the readers look at is filled in faithfully; CRC32 fields in
+CRAM are zero, since nothing here verifies them.
+"""
+import gzip
+import random
+import struct
+import zlib
+
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+
+def bgzf_block(data: bytes) -> bytes:
+    deflate = zlib.compressobj(6, zlib.DEFLATED, -15)
+    cdata = deflate.compress(data) + deflate.flush()
+    header = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00"
+    bsize = len(header) + 2 + len(cdata) + 8
+    return header + struct.pack("<H", bsize - 1) + cdata + struct.pack("<II", zlib.crc32(data), len(data))
+
+
+def bgzf(data: bytes, block_bytes: int = 65_280) -> bytes:
+    """
+    BGZF-compress `data` in blocks of `block_bytes` uncompressed bytes, with the EOF marker.
+    """
+    blocks = [bgzf_block(data[i:i + block_bytes]) for i in range(0, len(data), block_bytes)]
+    return b"".join(blocks) + BGZF_EOF
+
+
+def bam_header(text: str = "@HD\tVN:1.6\tSO:coordinate\n", refs=(("chr1", 248_956_422), ("chr2", 242_193_529))) -> bytes:
+    header = b"BAM\x01" + struct.pack("<i", len(text)) + text.encode() + struct.pack("<i", len(refs))
+    for name, length in refs:
+        header += struct.pack("<i", len(name) + 1) + name.encode() + b"\x00" + struct.pack("<i", length)
+    return header
+
+
+def bam_record(index: int, read_len: int = 100, rng=None, flag: int = 0, aux: bytes = b"") -> bytes:
+    """
+    One BAM record with its block_size prefix: a read of `read_len` matching bases.
+
+    `aux` is appended as the encoded aux tags, e.g. from `aux_tag`.
+    """
+    rng = rng or random.Random(index)
+    name = f"read{index}".encode() + b"\x00"
+    cigar = struct.pack("<I", read_len << 4)  # {read_len}M
+    seq = bytes(rng.choice((0x11, 0x22, 0x44, 0x88, 0x12, 0x48)) for _ in range((read_len + 1) // 2))
+    qual = bytes(rng.choice((2, 12, 23, 37)) for _ in range(read_len))
+    fixed = struct.pack("<iiBBHHHiiii", 0, 1000 + index, len(name), 60, 4680, 1, flag, read_len, -1, -1, 0)
+    body = fixed + name + cigar + seq + qual + aux
+    return struct.pack("<i", len(body)) + body
+
+
+# struct formats of the SAM aux value types
+AUX_STRUCT = {"A": "c", "c": "b", "C": "B", "s": "h", "S": "H", "i": "i", "I": "I", "f": "f"}
+
+
+def aux_tag(tag: str, value_type: str, value) -> bytes:
+    """
+    One encoded aux tag: integers and floats for single-letter types, str for Z,
+    and (subtype, values) for B arrays.
+    """
+    if value_type == "Z":
+        return tag.encode() + b"Z" + value.encode() + b"\x00"
+    if value_type == "B":
+        subtype, values = value
+        return tag.encode() + b"B" + subtype.encode() + struct.pack(f"<i{len(values)}{AUX_STRUCT[subtype]}", len(values), *values)
+    return tag.encode() + value_type.encode() + struct.pack(f"<{AUX_STRUCT[value_type]}", value)
+
+
+def write_bam(path, n_records: int = 500, read_len: int = 100, block_bytes: int = 65_280) -> list:
+    """
+    Write a BAM file and return its records (without block_size prefixes).
+    """
+    records = [bam_record(i, read_len) for i in range(n_records)]
+    with open(path, "wb") as handle:
+        handle.write(bgzf(bam_header() + b"".join(records), block_bytes))
+    return [record[4:] for record in records]
+
+
+def fastq_records(n_reads: int = 100, read_len: int = 50, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    return "".join(
+        f"@read{i}\n{''.join(rng.choices('ACGT', k=read_len))}\n+\n{''.join(rng.choices('#-5?I', k=read_len))}\n"
+        for i in range(n_reads)
+    ).encode()
+
+
+def write_fastqz(path, members: list) -> bytes:
+    """
+    Write each bytes object in `members` as its own gzip member; returns the file contents.
+    """
+    data = b"".join(gzip.compress(member, mtime=0) for member in members)
+    with open(path, "wb") as handle:
+        handle.write(data)
+    return data
+
+
+def itf8(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    if value < 0x80:
+        return bytes([value])
+    if value < 0x4000:
+        return bytes([0x80 | value >> 8, value & 0xFF])
+    if value < 0x200000:
+        return bytes([0xC0 | value >> 16, value >> 8 & 0xFF, value & 0xFF])
+    if value < 0x10000000:
+        return bytes([0xE0 | value >> 24, value >> 16 & 0xFF, value >> 8 & 0xFF, value & 0xFF])
+    return bytes([0xF0 | value >> 28, value >> 20 & 0xFF, value >> 12 & 0xFF, value >> 4 & 0xFF, value & 0x0F])
+
+
+def ltf8(value: int) -> bytes:
+    # n_extra leading one bits, then the value in the remaining bits of n_extra + 1 bytes
+    n_extra = next(n for n in range(9) if n == 8 or value < 1 << (8 * n + 7 - n))
+    data = value.to_bytes(n_extra + 1, "big") if n_extra < 8 else b"\x00" + value.to_bytes(8, "big")
+    return bytes([data[0] | (0xFF00 >> n_extra) & 0xFF]) + data[1:]
+
+
+def cram_block(data: bytes, content_type: int = 4, content_id: int = 1, method: int = 0) -> bytes:
+    payload = data if method == 0 else gzip.compress(data, mtime=0)
+    return (bytes([method, content_type]) + itf8(content_id) + itf8(len(payload)) + itf8(len(data))
+            + payload + b"\x00" * 4)
+
+
+def cram_container(blocks: list, n_records: int = 0, n_bases: int = 0, record_counter: int = 0) -> bytes:
+    body = b"".join(blocks)
+    header = (itf8(0) + itf8(1) + itf8(1000) + itf8(n_records) + ltf8(record_counter) + ltf8(n_bases)
+              + itf8(len(blocks)) + itf8(1) + itf8(0) + b"\x00" * 4)
+    return struct.pack("<i", len(body)) + header + body
+
+
+def cram_file(containers: list, major_version: int = 3) -> bytes:
+    definition = b"CRAM" + bytes([major_version, 0]) + b"synthetic".ljust(20, b"\x00")
+    header_container = cram_container([cram_block(struct.pack("<i", 10) + b"@HD\tVN:1.6", content_type=0, content_id=0)])
+    eof = cram_container([cram_block(b"", content_type=1, content_id=0)])
+    return definition + header_container + b"".join(containers) + eof
+
+
+def cram_encoding(codec: int, params: bytes = b"") -> bytes:
+    return itf8(codec) + itf8(len(params)) + params
+
+
+def external(content_id: int) -> bytes:
+    return cram_encoding(1, itf8(content_id))
+
+
+def compression_header(series: dict, tags: dict = None) -> bytes:
+    """
+    CRAM compression header with the given data series and tag encodings.
+
+    `series` maps two-letter series names and `tags` maps integer tag keys to
+    encodings from `cram_encoding`/`external`.
+    """
+    preservation = itf8(1) + b"RN" + b"\x01"
+    series_map = itf8(len(series)) + b"".join(name.encode() + encoding for name, encoding in series.items())
+    tags = tags or {}
+    tag_map = itf8(len(tags)) + b"".join(itf8(key) + encoding for key, encoding in tags.items())
+    return (itf8(len(preservation)) + preservation + itf8(len(series_map)) + series_map
+            + itf8(len(tag_map)) + tag_map)
@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks.estimators import accuracy
+
+# mean absolute percent error allowed against the benchmark datasets; tighten when the models improve
+MAX_MAPE_PCT = {
+    "mape_pct[bam_general,BAM,constant]": 34.0,
+    "mape_pct[bam_dragen,BAM,constant]": 7.5,
+    "mape_pct[bam_dragen,CRAM,constant]": 13.5,
+    "mape_pct[bam_dragen,CRAM,series_model]": 10.0,  # the CRAM model's target
+    "mape_pct[incremental_reads,BAM,constant]": 43.5,
+    "mape_pct[bam_general,BAM,fitted]": 24.0,
+    "mape_pct[bam_dragen,BAM,fitted]": 17.0,
+    "mape_pct[bam_dragen,CRAM,fitted]": 16.5,
+    "mape_pct[incremental_reads,BAM,fitted]": 6.5,
+}
+
+
+@pytest.fixture(scope="module")
+def errors():
+    return accuracy()
+
+
+def test_every_accuracy_metric_has_a_tolerance(errors):
+    assert set(errors) == set(MAX_MAPE_PCT)
+
+
+# targets the models do not meet yet; strict, so meeting one fails until it is removed here
+KNOWN_MISSES = {
+    "mape_pct[bam_dragen,CRAM,series_model]": "default CRAM series model is ~13% off on bam_dragen",
+}
+
+
+@pytest.mark.parametrize("metric", [
+    pytest.param(name, marks=pytest.mark.xfail(reason=KNOWN_MISSES[name], strict=True)) if name in KNOWN_MISSES
+    else name
+    for name in sorted(MAX_MAPE_PCT)
+])
+def test_accuracy_within_tolerance(errors, metric):
+    assert errors[metric] <= MAX_MAPE_PCT[metric]
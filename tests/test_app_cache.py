@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("shiny")
+
+from src.AppCache import normalize_params, round_sig, shared_cache  # noqa: E402
+
+
+def test_round_sig():
+    assert round_sig(0.1 + 0.2) == 0.3
+    assert round_sig(123456789.123, digits=3) == 123_000_000.0
+    assert round_sig("0.25") == 0.25
+
+
+def test_normalize_params_nested():
+    key = normalize_params({"b": [np.float64(0.1 + 0.2), np.int64(3)], "a": np.array([1.0, 2.0])})
+    assert key == (("a", (1.0, 2.0)), ("b", (0.3, 3)))
+    hash(key)
+
+
+def test_objects_are_keyed_by_themselves_not_id():
+    class Model:
+        pass
+
+    model = Model()
+    key = normalize_params(model)
+    assert key is model
+    assert normalize_params(Model()) != key
+
+
+def test_unhashable_objects_are_refused():
+    with pytest.raises(TypeError, match="unhashable set"):
+        normalize_params([set()])
+
+
+def test_shared_cache_reuses_results():
+    calls = []
+
+    @shared_cache(maxsize=2)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    square.cache_clear()
+    assert square(0.1 + 0.2) == square(0.3)
+    assert len(calls) == 1
@@ -0,0 +1,234 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from src.seqstoreestimator.calibration import (
+    _iter_bgzf_blocks,
+    _read_itf8,
+    _read_ltf8,
+    iter_bam_records,
+    read_cram_block,
+    read_cram_container_header,
+    read_cram_file_definition,
+    sample_bam,
+    sample_cram,
+    sample_fastqz,
+)
+from tests.synthetic import (
+    bam_header,
+    cram_block,
+    cram_container,
+    cram_file,
+    fastq_records,
+    itf8,
+    ltf8,
+    write_bam,
+    write_fastqz,
+)
+
+
+def test_bgzf_blocks_round_trip(tmp_path):
+    path = tmp_path / "x.bam"
+    records = write_bam(path, n_records=200, block_bytes=1000)
+    with open(path, "rb") as handle:
+        blocks = list(_iter_bgzf_blocks(handle))
+
+    assert sum(csize for csize, _ in blocks) == os.path.getsize(path)
+    assert blocks[-1] == (28, b"")  # EOF marker
+    data = b"".join(data for _, data in blocks)
+    assert data.startswith(bam_header())
+    assert len(data) == len(bam_header()) + sum(4 + len(r) for r in records)
+
+
+def test_bgzf_rejects_plain_gzip(tmp_path):
+    path = tmp_path / "x.bam"
+    path.write_bytes(gzip.compress(b"not bgzf"))
+    with open(path, "rb") as handle, pytest.raises(ValueError, match="BGZF"):
+        list(_iter_bgzf_blocks(handle))
+
+
+@pytest.mark.parametrize("block_bytes", [7, 1000, 65_280])
+def test_sample_bam_whole_file(tmp_path, block_bytes):
+    # tiny blocks split the header and records across many blocks
+    path = tmp_path / "x.bam"
+    records = write_bam(path, n_records=300, block_bytes=block_bytes)
+    sample = sample_bam(str(path), n_records=10_000)
+
+    assert sample["complete"]
+    assert sample["sampled_records"] == sample["estimated_n_reads"] == 300
+    assert sample["bytes_uncompressed"] == sum(4 + len(r) for r in records)
+    assert sample["compression_ratio"] > 0
+
+
+def test_sample_bam_extrapolates_read_count(tmp_path):
+    path = tmp_path / "x.bam"
+    write_bam(path, n_records=2000, block_bytes=4000)
+    sample = sample_bam(str(path), n_records=500)
+
+    assert not sample["complete"]
+    assert sample["sampled_records"] == 500
+    assert sample["estimated_n_reads"] == pytest.approx(2000, rel=0.05)
+
+
+def test_iter_bam_records_matches_written_records(tmp_path):
+    path = tmp_path / "x.bam"
+    records = write_bam(path, n_records=100, block_bytes=300)
+    assert list(iter_bam_records(str(path), n_records=1000)) == records
+    assert list(iter_bam_records(str(path), n_records=10)) == records[:10]
+
+
+def test_truncated_bam_raises(tmp_path):
+    path = tmp_path / "x.bam"
+    write_bam(path, n_records=500, block_bytes=4000)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    with pytest.raises(EOFError):
+        sample_bam(str(path))
+
+
+def test_not_a_bam_raises(tmp_path):
+    from tests.synthetic import bgzf
+
+    path = tmp_path / "x.bam"
+    path.write_bytes(bgzf(b"SAM text, not BAM records"))
+    with pytest.raises(ValueError, match="not a BAM"):
+        sample_bam(str(path))
+
+
+@pytest.mark.parametrize("encoded, value", [
+    (b"\x00", 0),
+    (b"\x7f", 127),
+    (b"\x80\xff", 255),
+    (b"\xc0\x40\x00", 0x4000),
+    (b"\xe0\x20\x00\x00", 0x200000),
+    (b"\xf1\x00\x00\x00\x00", 0x10000000),
+    (b"\xff\xff\xff\xff\x0f", -1),
+])
+def test_itf8(encoded, value):
+    assert _read_itf8(io.BytesIO(encoded)) == value
+    assert itf8(value) == encoded
+
+
+@pytest.mark.parametrize("encoded, value", [
+    (b"\x00", 0),
+    (b"\x80\xff", 255),
+    (b"\xc0\x40\x00", 0x4000),
+    (b"\xff" + (2 ** 63).to_bytes(8, "big"), 2 ** 63),
+])
+def test_ltf8(encoded, value):
+    assert _read_ltf8(io.BytesIO(encoded)) == value
+    assert ltf8(value) == encoded
+
+
+@pytest.mark.parametrize("value", [1, 300, 70_000, 3_000_000, 300_000_000, 2 ** 40, 2 ** 55])
+def test_ltf8_round_trip(value):
+    assert _read_ltf8(io.BytesIO(ltf8(value))) == value
+
+
+def test_truncated_itf8_raises():
+    with pytest.raises(EOFError):
+        _read_itf8(io.BytesIO(b"\xe0\x20"))
+
+
+def test_cram_container_and_blocks():
+    blocks = [cram_block(b"\x01" * 500, content_type=1, content_id=0, method=1),
+              cram_block(b"ACGT" * 100, content_id=3)]
+    handle = io.BytesIO(cram_file([cram_container(blocks, n_records=40, n_bases=6000, record_counter=7)]))
+
+    assert read_cram_file_definition(handle) == (3, 0)
+    sam_header = read_cram_container_header(handle)
+    assert sam_header["n_records"] == 0
+    handle.seek(sam_header["length"], os.SEEK_CUR)
+
+    header = read_cram_container_header(handle)
+    assert (header["n_records"], header["n_bases"], header["n_blocks"]) == (40, 6000, 2)
+    first = read_cram_block(handle, read_data=True)
+    assert (first["method"], first["content_type"], first["data"]) == (1, 1, b"\x01" * 500)
+    second = read_cram_block(handle)
+    assert (second["content_id"], second["raw_size"], second["data"]) == (3, 400, None)
+    assert first["block_bytes"] + second["block_bytes"] == header["length"]
+
+
+def test_not_a_cram_raises():
+    with pytest.raises(ValueError, match="CRAM magic"):
+        read_cram_file_definition(io.BytesIO(b"BAM\x01" + b"\x00" * 22))
+
+
+def test_sample_cram(tmp_path):
+    path = tmp_path / "x.cram"
+    containers = [cram_container([cram_block(b"\x00" * 1000, method=1), cram_block(b"ACGT" * 50, content_id=2)],
+                                 n_records=100) for _ in range(3)]
+    path.write_bytes(cram_file(containers))
+
+    sample = sample_cram(str(path), n_containers=20)
+    assert sample["complete"]
+    assert sample["sampled_records"] == sample["estimated_n_reads"] == 300
+    assert sample["bytes_uncompressed"] == 3 * 1200
+    assert sample["bytes_compressed"] == sum(len(c) for c in containers)
+
+    partial = sample_cram(str(path), n_containers=2)
+    assert not partial["complete"] and partial["sampled_records"] == 200
+
+
+def test_truncated_cram_raises(tmp_path):
+    path = tmp_path / "x.cram"
+    data = cram_file([cram_container([cram_block(b"\x00" * 100)], n_records=10)])
+    path.write_bytes(data[:40])
+    with pytest.raises(EOFError):
+        sample_cram(str(path))
+
+
+def test_sample_fastqz_whole_file(tmp_path):
+    path = tmp_path / "x.fastq.gz"
+    data = write_fastqz(path, [fastq_records(200)])
+    sample = sample_fastqz(str(path), n_records=1000)
+
+    assert sample["complete"]
+    assert sample["sampled_records"] == sample["estimated_n_reads"] == 200
+    assert sample["bytes_compressed"] == len(data)
+
+
+def test_sample_fastqz_counts_only_consumed_members(tmp_path):
+    # many small members fit in one read chunk; sampling stops inside the first one
+    member = fastq_records(100, seed=1)
+    path = tmp_path / "x.fastq.gz"
+    write_fastqz(path, [member] * 50)
+    sample = sample_fastqz(str(path), n_records=50)
+
+    member_ratio = len(gzip.compress(member, mtime=0)) / len(member)
+    assert sample["sampled_records"] == 50
+    assert sample["compression_ratio"] == pytest.approx(member_ratio, rel=0.05)
+    assert sample["estimated_n_reads"] == pytest.approx(5000, rel=0.05)
+
+
+def test_truncated_fastqz_raises(tmp_path):
+    path = tmp_path / "x.fastq.gz"
+    data = write_fastqz(path, [fastq_records(200)])
+    path.write_bytes(data[:-20])
+    with pytest.raises(EOFError):
+        sample_fastqz(str(path), n_records=1000)
+
+
+@pytest.mark.parametrize("block_size", [-4, -100, 0, 31])
+def test_corrupt_record_size_raises(tmp_path, block_size):
+    import struct
+
+    from tests.synthetic import bam_record, bgzf
+
+    path = tmp_path / "x.bam"
+    path.write_bytes(bgzf(bam_header() + bam_record(0) + struct.pack("<i", block_size) + b"\x00" * 64))
+    with pytest.raises(ValueError, match="corrupt BAM record"):
+        sample_bam(str(path))
+    with pytest.raises(ValueError, match="corrupt BAM record"):
+        list(iter_bam_records(str(path), None))
+
+
+def test_calibrated_gzip_ratio_uses_one_fastq_mate():
+    from src.seqstoreestimator.calibration import calibrate_compression_ratios
+    from src.seqstoreestimator.core import fastq_bytes_per_read
+
+    ratios = calibrate_compression_ratios(fastqz_sample={"sampled_records": 10, "bytes_per_record_compressed": 80.0},
+                                          read_len=100)
+    assert ratios["gzip_compression_ratio"] == pytest.approx(80.0 / fastq_bytes_per_read(100, pe=False))
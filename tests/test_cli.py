@@ -0,0 +1,77 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from src.seqstoreestimator.cli import estimate_chunk, main
+
+SHEET = """sample,reads,read_length,format,paired
+s1,1000000,150,BAM,true
+s2,,,CRAM,
+s3,5e6,100,,false
+s4,-5,100,CRAM,true
+"""
+
+
+def test_rows_without_read_count_are_skipped_and_reported(tmp_path, capsys):
+    sheet = tmp_path / "sheet.csv"
+    sheet.write_text(SHEET)
+    output = tmp_path / "estimates.csv"
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(sheet), "-o", str(output)])
+
+    assert exit_info.value.code
+    stderr = capsys.readouterr().err
+    assert f"{sheet}:3: skipped, n_reads is empty" in stderr
+    assert f"{sheet}:5: skipped" in stderr
+    estimates = pd.read_csv(output)
+    assert list(estimates["sample"]) == ["s1", "s3"]
+    assert list(estimates["n_reads"]) == [1_000_000, 5_000_000]
+
+
+def test_rows_with_non_numeric_parameters_are_skipped_and_reported(tmp_path, capsys):
+    sheet = tmp_path / "sheet.csv"
+    sheet.write_text("sample,reads,read_length,bam_compression_ratio\n"
+                     "s1,1000,150,0.15\n"
+                     "s2,1000,long,0.15\n"
+                     "s3,1000,,n/a?\n"
+                     "s4,2000,100,\n")
+    output = tmp_path / "estimates.csv"
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(sheet), "-o", str(output)])
+
+    assert exit_info.value.code
+    stderr = capsys.readouterr().err
+    assert f"{sheet}:3: skipped, read_len 'long' is not a number" in stderr
+    assert f"{sheet}:4: skipped, bam_compression_ratio 'n/a?' is not a number" in stderr
+    estimates = pd.read_csv(output)
+    assert list(estimates["sample"]) == ["s1", "s4"]
+    assert list(estimates["read_len"]) == [150, 100]
+
+
+def test_estimate_chunk_rejects_missing_read_count():
+    chunk = pd.DataFrame({"n_reads": [100.0, None]})
+    with pytest.raises(ValueError, match="line"):
+        estimate_chunk(chunk)
+
+
+def test_estimate_chunk_rejects_non_numeric_parameters():
+    chunk = pd.DataFrame({"n_reads": [100, 200], "read_len": ["150", "long"]})
+    with pytest.raises(ValueError, match="line 3: read_len 'long'"):
+        estimate_chunk(chunk)
+
+
+def test_estimate_chunk_fills_defaults_without_warnings():
+    chunk = pd.DataFrame({
+        "n_reads": [1000, 2000],
+        "read_len": [None, 100],
+        "pe": [True, None],
+        "format": ["BAM", None],
+    })
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        estimates = estimate_chunk(chunk)
+    assert list(estimates["read_len"]) == [150, 100]
+    assert list(estimates["output_format"]) == ["BAM", "CRAM"]
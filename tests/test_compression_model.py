@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from src.Functions import default_compression_ratio_model
+from src.seqstoreestimator.compression_model import CompressionRatioModel
+
+N_READS = np.logspace(0, 10, 41)
+
+
+def synthetic_observations(floor, amplitude, decay, read_len=150, fmt="BAM"):
+    return [{"n_reads": n, "read_len": read_len, "format": fmt, "compression_ratio": floor + amplitude * n ** -decay}
+            for n in N_READS]
+
+
+def test_fit_recovers_known_curve():
+    model = CompressionRatioModel.fit(synthetic_observations(0.15, 0.47, 0.3))
+    curve = model.curves[("BAM", 150)]
+    assert curve["floor"] == pytest.approx(0.15, abs=1e-3)
+    assert curve["amplitude"] == pytest.approx(0.47, abs=1e-2)
+    assert curve["decay"] == pytest.approx(0.3, abs=0.01)
+    assert curve["rmse"] < 1e-3
+    np.testing.assert_allclose(model.ratio(N_READS), 0.15 + 0.47 * N_READS ** -0.3, rtol=0.01)
+
+
+def test_fit_keeps_read_length_groups_apart():
+    model = CompressionRatioModel.fit(synthetic_observations(0.15, 0.47, 0.3, read_len=150)
+                                      + synthetic_observations(0.25, 0.3, 0.5, read_len=100))
+    assert model.ratio(1e9, 150) == pytest.approx(0.15, abs=1e-3)
+    assert model.ratio(1e9, 100) == pytest.approx(0.25, abs=1e-3)
+    # lengths without a curve use the nearest fitted one
+    assert model.ratio(1e9, 90) == model.ratio(1e9, 100)
+    np.testing.assert_allclose(model.ratio(1e9, [90, 140, 300]), [model.ratio(1e9, 100), model.ratio(1e9, 150),
+                                                                  model.ratio(1e9, 150)])
+
+
+def test_fewer_than_three_read_counts_fit_a_constant():
+    observations = [{"n_reads": n, "read_len": 150, "format": "CRAM", "compression_ratio": r}
+                    for n, r in [(1e6, 0.3), (1e6, 0.34), (1e8, 0.32)]]
+    curve = CompressionRatioModel.fit(observations).curves[("CRAM", 150)]
+    assert curve == {"floor": pytest.approx(0.32), "amplitude": 0.0, "decay": 0.0, "rmse": pytest.approx(np.std([0.3, 0.34, 0.32]))}
+
+
+@pytest.mark.parametrize("fmt", ["BAM", "CRAM"])
+def test_default_ratios_never_increase_with_read_count(fmt):
+    ratios = default_compression_ratio_model().ratio(np.logspace(0, 12, 1201), 150, fmt)
+    assert np.all(np.diff(ratios) <= 0)
+    assert np.all((0 <= ratios) & (ratios <= 1))
+
+
+def test_unfitted_format_raises():
+    model = CompressionRatioModel.fit(synthetic_observations(0.15, 0.47, 0.3))
+    with pytest.raises(ValueError, match="CRAM"):
+        model.ratio(1e6, 150, "CRAM")
@@ -0,0 +1,45 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.seqstoreestimator.core import DEFAULT_BAM_RECORD_MODEL, BamRecordModel
+
+
+def inline_bytes_per_read(read_len, percent_mapped, supplementary_alignments):
+    """The per-read arithmetic estimate_bam_size_from_nreads used to inline."""
+    fixed = 4 + 4 + 4 + 1 + 1 + 2 + 2 + 2 + 4 + 4 + 4 + 4
+    cigar = 0.6 * 4 + 0.35 * 8 + 0.04 * 16 + 0.01 * 32
+    aux_tags = 7 * 4 * percent_mapped + (7 * 6 + 16 * 4)
+    variable = cigar + 35 + aux_tags + 120 * supplementary_alignments
+    return fixed + variable + read_len + (read_len + 1) // 2
+
+
+GRID = list(itertools.product([1, 50, 100, 150, 151, 250, 10_000], [0.0, 0.5, 0.9, 1.0], [0.0, 0.1, 1.2]))
+
+
+@pytest.mark.parametrize("read_len, percent_mapped, supplementary_alignments", GRID)
+def test_bytes_per_read_matches_inline_arithmetic(read_len, percent_mapped, supplementary_alignments):
+    expected = inline_bytes_per_read(read_len, percent_mapped, supplementary_alignments)
+    assert DEFAULT_BAM_RECORD_MODEL.bytes_per_read(read_len, percent_mapped, supplementary_alignments) == pytest.approx(expected)
+
+
+def test_array_version_matches_scalar():
+    read_len, percent_mapped, supplementary_alignments = (np.array(v) for v in zip(*GRID))
+    scalar = [DEFAULT_BAM_RECORD_MODEL.bytes_per_read(*row) for row in GRID]
+    np.testing.assert_allclose(
+        DEFAULT_BAM_RECORD_MODEL.bytes_per_read_array(read_len, percent_mapped, supplementary_alignments), scalar)
+
+
+def test_bytes_per_read_is_memoized():
+    model = BamRecordModel(cache_size=2)
+    model.bytes_per_read(150, 0.9, 0.1)
+    model.bytes_per_read(150, 0.9, 0.1)
+    info = model.bytes_per_read.cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (1, 1, 2)
+
+
+def test_estimate_applies_compression_ratios():
+    per_read = inline_bytes_per_read(150, 0.9, 0.1)
+    assert DEFAULT_BAM_RECORD_MODEL.estimate(1e6, output_format="BAM") == pytest.approx(1e6 * per_read * 0.15)
+    assert DEFAULT_BAM_RECORD_MODEL.estimate(1e6, output_format="cram") == pytest.approx(1e6 * per_read * 0.15 * 0.3)
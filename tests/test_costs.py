@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from src.seqstoreestimator.costs import (
+    BYTES_PER_GB,
+    STORAGE_TIERS,
+    PriceTable,
+    candidate_policies,
+    cheapest_policy,
+    cost_per_gb,
+    evaluate_policies,
+)
+
+FILE_BYTES = {"fastqz": 500 * BYTES_PER_GB, "alignment": 200 * BYTES_PER_GB}
+
+
+def test_cold_data_goes_to_archive():
+    result = cheapest_policy(FILE_BYTES, horizon_months=60)
+    for file_class in FILE_BYTES:
+        assert result[f"{file_class}_archive_months"] == 60
+    assert result["total"] == pytest.approx(700 * 60 * STORAGE_TIERS["archive"]["storage_per_gb_month"])
+    assert result["total"] < result["hot_only_total"]
+
+
+def test_frequently_read_data_stays_hot():
+    result = cheapest_policy(FILE_BYTES, horizon_months=24, access_per_month={"alignment": 0.5}, egress_fraction=0.0)
+    assert result["alignment_hot_months"] == 24
+    assert result["fastqz_archive_months"] == 24
+
+
+def test_short_horizon_avoids_early_deletion_fees():
+    # archive would be cheapest per month but bills its 6 month minimum
+    result = cheapest_policy({"alignment": BYTES_PER_GB}, horizon_months=2)
+    assert result["alignment_archive_months"] == 0
+    assert result["early_deletion"] == 0.0
+    hot_only = cost_per_gb(2, 0, 2)["total"]
+    archive_only = cost_per_gb(0, 0, 2)["total"]
+    assert archive_only == pytest.approx(6 * STORAGE_TIERS["archive"]["storage_per_gb_month"])
+    assert result["total"] <= min(hot_only, archive_only)
+
+
+def test_cheapest_matches_exhaustive_search():
+    prices = PriceTable(egress_per_gb=0.05)
+    access = {"fastqz": 0.01, "alignment": 0.1}
+    result = cheapest_policy(FILE_BYTES, horizon_months=12, access_per_month=access, prices=prices)
+    policies = candidate_policies(12)
+    totals = evaluate_policies(FILE_BYTES, policies, 12, access, prices=prices)["total"]
+    assert result["total"] == pytest.approx(totals.min())
+    best = int(np.argmin(totals))
+    for file_class in FILE_BYTES:
+        assert result[f"{file_class}_hot_months"] == policies[f"{file_class}_hot_months"][best]
+        assert result[f"{file_class}_cool_months"] == policies[f"{file_class}_cool_months"][best]
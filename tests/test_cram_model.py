@@ -0,0 +1,122 @@
+import pytest
+
+from src.seqstoreestimator.cram_model import (
+    DEFAULT_CRAM_SIZE_MODEL,
+    CramSizeModel,
+    calibrate_cram_model,
+    parse_compression_header,
+    sample_cram_series,
+)
+from tests.synthetic import compression_header, cram_block, cram_container, cram_encoding, cram_file, external, itf8
+
+HEADER = compression_header(
+    series={
+        "BF": cram_encoding(3, b"\x01\x00\x01\x00"),  # Huffman: bit-packed in the core block
+        "RN": cram_encoding(5, b"\x00" + itf8(11)),  # byte array stop
+        "QS": external(12),
+        "BA": external(13),
+        "FN": external(13),
+        "RL": external(14),
+        "XX": external(15),
+    },
+    tags={
+        (ord("N") << 16) | (ord("M") << 8) | ord("i"): cram_encoding(4, external(16) + external(17)),
+    },
+)
+
+
+def test_parse_compression_header():
+    assert parse_compression_header(HEADER) == {
+        11: "read_names",
+        12: "quality",
+        13: "features",
+        14: "record",
+        15: "other",
+        16: "tags",
+        17: "tags",
+    }
+
+
+def data_container(n_records=100, read_len=150):
+    blocks = [
+        cram_block(HEADER, content_type=1, content_id=0, method=1),
+        cram_block(b"slice header", content_type=2, content_id=0),
+        cram_block(b"\x00" * 50, content_type=5, content_id=0),
+        cram_block(b"\x01" * 300, content_id=11),
+        cram_block(b"\x02" * 1500, content_id=12),
+        cram_block(b"\x03" * 120, content_id=13),
+        cram_block(b"\x04" * 80, content_id=16),
+    ]
+    return cram_container(blocks, n_records=n_records, n_bases=n_records * read_len), blocks
+
+
+def test_sample_cram_series(tmp_path):
+    container, blocks = data_container()
+    path = tmp_path / "x.cram"
+    path.write_bytes(cram_file([container, container]))
+
+    series = sample_cram_series(str(path))
+    assert (series["n_records"], series["n_bases"]) == (200, 30_000)
+    assert series["component_bytes"] == {
+        "record": 2 * len(blocks[2]),
+        "read_names": 2 * len(blocks[3]),
+        "quality": 2 * len(blocks[4]),
+        "features": 2 * len(blocks[5]),
+        "tags": 2 * len(blocks[6]),
+    }
+    # container headers plus the compression and slice header blocks
+    container_header_bytes = len(container) - sum(len(block) for block in blocks)
+    assert series["overhead_bytes"] == 2 * (container_header_bytes + len(blocks[0]) + len(blocks[1]))
+
+
+def test_sample_cram_series_without_records_raises(tmp_path):
+    path = tmp_path / "x.cram"
+    path.write_bytes(cram_file([]))
+    with pytest.raises(ValueError, match="no alignment records"):
+        sample_cram_series(str(path))
+
+
+def test_calibrated_model_reproduces_sample_size(tmp_path):
+    container, _ = data_container()
+    path = tmp_path / "x.cram"
+    path.write_bytes(cram_file([container]))
+
+    model = calibrate_cram_model(str(path))
+    assert model.estimate(100, read_len=150) == pytest.approx(len(container))
+
+
+def test_calibrated_model_rejects_quality_scheme():
+    model = CramSizeModel(quality_bytes_per_base=0.1)
+    with pytest.raises(ValueError, match="calibrated"):
+        model.estimate(1000, quality="lossless")
+
+
+def test_default_model_quality_schemes():
+    binned = DEFAULT_CRAM_SIZE_MODEL.estimate(1000)
+    assert binned == DEFAULT_CRAM_SIZE_MODEL.estimate(1000, quality="binned")
+    assert DEFAULT_CRAM_SIZE_MODEL.estimate(1000, quality="lossless") > binned
+    with pytest.raises(ValueError, match="Unknown quality scheme"):
+        DEFAULT_CRAM_SIZE_MODEL.estimate(1000, quality="hiseq")
+
+
+def test_features_scale_with_read_length_and_mismatch_rate():
+    model = CramSizeModel(feature_bytes=1.0, mismatch_rate=0.01, clips_per_read=0.5)
+    assert model.features_per_read(100) == pytest.approx(1.5)
+    assert model.features_per_read(250) == pytest.approx(3.0)
+    assert model.features_per_read(100, mismatch_rate=0.03) == pytest.approx(3.5)
+
+    short, long = (model.bytes_per_read(n, quality="none")["features"] for n in (100, 250))
+    assert long - short == pytest.approx(1.5)
+    # a distant reference costs more per read at the same length
+    assert model.estimate(1000, 150, mismatch_rate=0.05) > model.estimate(1000, 150)
+
+
+def test_calibration_derives_feature_cost_from_read_length(tmp_path):
+    container, blocks = data_container(n_records=100, read_len=150)
+    path = tmp_path / "x.cram"
+    path.write_bytes(cram_file([container]))
+
+    model = calibrate_cram_model(str(path), mismatch_rate=0.01, clips_per_read=0.5)
+    # 150 bases * 0.01 + 0.5 features per read share the features block
+    assert model.feature_bytes == pytest.approx(len(blocks[5]) / 100 / 2.0)
+    assert model.estimate(100, read_len=150) == pytest.approx(len(container))
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.Functions import (
+    default_compression_ratio_model,
+    estimate_bam_size_from_nreads,
+    estimate_bam_size_from_nreads_batch,
+    estimate_fastqz_size_from_nreads,
+    estimate_fastqz_size_from_nreads_batch,
+    estimate_sizes_batch,
+)
+
+MANIFEST = pd.DataFrame({
+    "n_reads": [1, 1_000, 2_500_000, 400_000_000, 1_200_000_000],
+    "read_len": [150, 100, 151, 250, 75],
+    "bam_compression_ratio": [0.15, 0.2, 0.12, 0.15, 0.3],
+    "cram_compression_ratio": [0.3, 0.25, 0.3, 0.4, 0.5],
+    "gzip_compression_ratio": [0.25, 0.22, 0.28, 0.25, 0.3],
+    "output_format": ["CRAM", "BAM", "cram", "BAM", "CRAM"],
+    "supplementary_alignments": [0.1, 0.0, 0.05, 1.2, 0.1],
+    "percent_mapped": [0.9, 1.0, 0.5, 0.97, 0.0],
+    "pe": [True, False, True, True, False],
+}, index=["a", "b", "c", "d", "e"])
+
+
+@pytest.mark.parametrize("fitted", [False, True])
+def test_batch_bam_estimates_match_scalar(fitted):
+    model = default_compression_ratio_model() if fitted else None
+    columns = ["n_reads", "read_len", "bam_compression_ratio", "cram_compression_ratio", "output_format",
+               "supplementary_alignments", "percent_mapped"]
+    batch = estimate_bam_size_from_nreads_batch(**{c: MANIFEST[c] for c in columns}, compression_model=model)
+    scalar = [estimate_bam_size_from_nreads(**row, compression_model=model)
+              for row in MANIFEST[columns].to_dict("records")]
+    np.testing.assert_allclose(batch, scalar, rtol=1e-12)
+
+
+def test_batch_fastqz_estimates_match_scalar():
+    columns = ["n_reads", "read_len", "gzip_compression_ratio", "pe"]
+    batch = estimate_fastqz_size_from_nreads_batch(**{c: MANIFEST[c] for c in columns})
+    scalar = [estimate_fastqz_size_from_nreads(**row) for row in MANIFEST[columns].to_dict("records")]
+    np.testing.assert_allclose(batch, scalar, rtol=1e-12)
+
+
+def test_estimate_sizes_batch_matches_scalar_and_keeps_index():
+    columns = ["read_len", "bam_compression_ratio", "cram_compression_ratio", "gzip_compression_ratio",
+               "supplementary_alignments", "percent_mapped", "pe"]
+    sizes = estimate_sizes_batch(MANIFEST["n_reads"], **{c: MANIFEST[c].to_numpy() for c in columns})
+    assert list(sizes.index) == list(MANIFEST.index)
+    for name, row in MANIFEST.iterrows():
+        bam_params = {c: row[c] for c in ("n_reads", "read_len", "bam_compression_ratio", "cram_compression_ratio",
+                                          "supplementary_alignments", "percent_mapped")}
+        assert sizes.loc[name, "bam_bytes"] == pytest.approx(estimate_bam_size_from_nreads(**bam_params, output_format="BAM"))
+        assert sizes.loc[name, "cram_bytes"] == pytest.approx(estimate_bam_size_from_nreads(**bam_params, output_format="CRAM"))
+        assert sizes.loc[name, "fastqz_bytes"] == pytest.approx(
+            estimate_fastqz_size_from_nreads(row["n_reads"], row["read_len"], row["gzip_compression_ratio"], row["pe"]))
+
+
+def test_batch_broadcasts_scalars():
+    sizes = estimate_bam_size_from_nreads_batch([1e6, 2e6], output_format="BAM")
+    assert sizes[1] == pytest.approx(2 * sizes[0])
+    assert sizes[0] == pytest.approx(estimate_bam_size_from_nreads(1e6, output_format="BAM"))
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from src.Functions import default_compression_ratio_model
+from src.seqstoreestimator.core import estimate_bam_size, estimate_fastqz_size
+from src.seqstoreestimator.inverse import BYTES_PER_GB, max_reads_for_budget
+
+PARAMS = {"read_len": 150, "bam_compression_ratio": 0.15, "cram_compression_ratio": 0.3,
+          "gzip_compression_ratio": 0.25, "supplementary_alignments": 0.1, "percent_mapped": 0.9}
+
+
+def forward_bytes(n_reads, model=None, output_format="CRAM"):
+    """Alignment plus FASTQ.gz bytes per sample from the forward estimators."""
+    params = {k: v for k, v in PARAMS.items() if k != "gzip_compression_ratio"}
+    if model is not None:
+        params["bam_compression_ratio"] = model.ratio(n_reads, 150, "BAM")
+        params["cram_compression_ratio"] = model.ratio(n_reads, 150, "CRAM")
+    alignment = estimate_bam_size(n_reads, output_format=output_format, **params)
+    return alignment + estimate_fastqz_size(n_reads, 150, PARAMS["gzip_compression_ratio"])
+
+
+@pytest.mark.parametrize("output_format", ["BAM", "CRAM"])
+def test_closed_form_fills_byte_budget(output_format):
+    budget = 500 * BYTES_PER_GB
+    solved = max_reads_for_budget(budget_bytes=budget, n_samples=4, output_format=output_format, **PARAMS)
+    n_reads = float(solved["n_reads"])
+    assert 4 * forward_bytes(n_reads, output_format=output_format) <= budget
+    assert 4 * forward_bytes(n_reads + 1, output_format=output_format) > budget
+    assert np.isclose(solved["total_bytes"], 4 * forward_bytes(n_reads, output_format=output_format))
+
+
+def test_closed_form_fills_dollar_budget():
+    solved = max_reads_for_budget(budget_dollars=1000, n_samples=10, retention_months=24,
+                                  tier_prices=((0, 0.01),), **PARAMS)
+    cost = 10 * forward_bytes(float(solved["n_reads"])) / BYTES_PER_GB * 0.01 * 24
+    assert np.isclose(solved["total_cost"], cost)
+    assert 1000 * 0.999999 < cost <= 1000
+
+
+def test_bisection_fills_budget_with_fitted_ratios():
+    model = default_compression_ratio_model()
+    budgets = np.array([0.001, 1.0, 100.0]) * BYTES_PER_GB
+    solved = max_reads_for_budget(budget_bytes=budgets, compression_model=model, **PARAMS)
+    for budget, n_reads in zip(budgets, solved["n_reads"]):
+        assert forward_bytes(n_reads, model) <= budget
+        assert forward_bytes(n_reads + 1, model) > budget
+    assert np.allclose(solved["bytes_per_sample"], [forward_bytes(n, model) for n in solved["n_reads"]])
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"budget_dollars": 0, "tier_prices": ((0, 0.0),)},
+    {"budget_dollars": 1000, "tier_prices": ((0, 0.0),)},
+    {"budget_dollars": 1000, "retention_months": 0},
+    {"budget_bytes": BYTES_PER_GB, "bam_compression_ratio": 0.0, "include_fastqz": False},
+])
+def test_zero_spend_per_read_raises(kwargs):
+    with pytest.raises(ValueError, match="none of the budget"):
+        max_reads_for_budget(**kwargs)
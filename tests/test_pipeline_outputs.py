@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.seqstoreestimator.core import estimate_bam_size, estimate_fastqz_size
+from src.seqstoreestimator.pipeline_outputs import DEFAULT_SAMPLE_PARAMS, estimate_sample_outputs, register_artifact
+
+N_READS = 800_000_000
+BAM = estimate_bam_size(N_READS, output_format="BAM")
+FASTQZ = estimate_fastqz_size(N_READS)
+CALLS = 3.1e9 * (0.6 + 0.0016 * 40) * 1.001  # gVCF, VCF and their indexes
+QC = 50 * 1024 ** 2
+
+
+@pytest.mark.parametrize("output_format", ["BAM", "CRAM"])
+def test_stored_bytes_keep_only_final_outputs(output_format):
+    outputs = estimate_sample_outputs(output_format=output_format)
+    if output_format == "CRAM":
+        alignment = BAM * 0.3 * (1 + 7e-5)  # CRAM and CRAI; the BAM and BAI are deleted after conversion
+    else:
+        alignment = BAM * (1 + 8.5e-5)  # markdup BAM and BAI
+    assert outputs["stored_bytes"] == pytest.approx(FASTQZ + alignment + CALLS + QC)
+    assert outputs["artifacts"]["markdup_bam"] == pytest.approx(BAM)
+
+
+@pytest.mark.parametrize("output_format", ["BAM", "CRAM"])
+def test_peak_is_the_sort_stage(output_format):
+    outputs = estimate_sample_outputs(output_format=output_format)
+    # unsorted aligner output, sort spill and sorted BAM all exist while sorting
+    assert outputs["peak_stage"] == "sort"
+    assert outputs["peak_scratch_bytes"] == pytest.approx(FASTQZ + BAM * (1.3 + 1.0 + 1.0))
+    assert outputs["stage_bytes"]["sort"] == outputs["peak_scratch_bytes"]
+
+
+def test_peak_moves_to_markdup_without_sort_spill():
+    outputs = estimate_sample_outputs(output_format="CRAM", keep_fastqz=False, sort_spill_ratio=0.0,
+                                      aligner_output_ratio=0.5, gzip_compression_ratio=0.05)
+    # with a small, deleted FASTQ.gz and no spill files, sorted + markdup BAM is the peak
+    assert outputs["peak_stage"] == "markdup"
+    assert outputs["peak_scratch_bytes"] == pytest.approx(BAM * (2 + 8.5e-5))
+    assert outputs["stage_bytes"]["convert"] == pytest.approx(BAM * (1 + 8.5e-5 + 0.3 * (1 + 7e-5)))
+    assert outputs["stored_bytes"] == pytest.approx(BAM * 0.3 * (1 + 7e-5) + CALLS + QC)
+
+
+def test_batches_of_samples_broadcast():
+    n_reads = np.array([1e8, 8e8, 2e9])
+    outputs = estimate_sample_outputs(n_reads=n_reads, output_format="BAM")
+    for i, n in enumerate(n_reads):
+        single = estimate_sample_outputs(n_reads=n, output_format="BAM")
+        assert outputs["stored_bytes"][i] == pytest.approx(single["stored_bytes"])
+        assert outputs["peak_scratch_bytes"][i] == pytest.approx(single["peak_scratch_bytes"])
+    assert outputs["artifacts"]["qc"].shape == n_reads.shape
+
+
+def test_custom_registry():
+    registry = {}
+
+    @register_artifact("reads", stage="input", delete_after="align", registry=registry)
+    def reads(p, sizes):
+        return p["n_reads"] * 10
+
+    @register_artifact("result", stage="call", registry=registry)
+    def result(p, sizes):
+        return sizes["reads"] / 2
+
+    outputs = estimate_sample_outputs(registry=registry, n_reads=100)
+    assert outputs["stored_bytes"] == 500
+    assert outputs["peak_scratch_bytes"] == 1000
+    assert outputs["peak_stage"] == "input"
+    assert DEFAULT_SAMPLE_PARAMS["n_reads"] == N_READS
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.seqstoreestimator.core import estimate_bam_size, estimate_fastqz_size
+from src.seqstoreestimator.projection import BYTES_PER_GB, intake_cohorts, project_storage
+
+SCHEDULE = [10, 0, 5, 0, 0, 20]
+
+
+def test_cohorts_match_the_scalar_estimators():
+    cohorts = intake_cohorts(SCHEDULE, n_reads=4e8)
+    assert list(cohorts["start_month"]) == [0, 2, 5]
+    assert list(cohorts["n_samples"]) == [10, 5, 20]
+    np.testing.assert_allclose(cohorts["bam_bytes"], estimate_bam_size(4e8, output_format="BAM"))
+    np.testing.assert_allclose(cohorts["cram_bytes"], estimate_bam_size(4e8, output_format="CRAM"))
+    np.testing.assert_allclose(cohorts["fastqz_bytes"], estimate_fastqz_size(4e8))
+
+
+def test_totals_accumulate_with_intake():
+    cohorts = intake_cohorts(SCHEDULE, n_reads=4e8)
+    projection = project_storage(cohorts, years=1)
+    per_sample = cohorts["cram_bytes"][0] + cohorts["fastqz_bytes"][0]
+    samples_stored = np.cumsum(SCHEDULE + [0] * 6)
+    np.testing.assert_allclose(projection["stored_bytes"], samples_stored * per_sample)
+    np.testing.assert_allclose(projection["stored_bytes"], projection["fastqz_bytes"] + projection["alignment_bytes"])
+    np.testing.assert_allclose(projection["monthly_cost"], projection["stored_bytes"] / BYTES_PER_GB * 0.0064)
+    assert projection["cumulative_cost"][-1] == pytest.approx(projection["monthly_cost"].sum())
+    assert list(projection["month"]) == list(range(1, 13))
+
+
+def test_retention_and_conversion_policies():
+    cohorts = intake_cohorts([1], n_reads=4e8)
+    projection = project_storage(cohorts, years=1, alignment_format="BAM", fastqz_retention_months=3,
+                                 convert_to_cram_after_months=6)
+    assert np.all(projection["fastqz_bytes"][:3] == cohorts["fastqz_bytes"][0])
+    assert np.all(projection["fastqz_bytes"][3:] == 0)
+    np.testing.assert_allclose(projection["alignment_bytes"][:6], cohorts["bam_bytes"][0])
+    np.testing.assert_allclose(projection["alignment_bytes"][6:], cohorts["cram_bytes"][0])
+
+
+def test_tiered_prices_follow_data_age():
+    cohorts = intake_cohorts([1, 1], n_reads=4e8)
+    projection = project_storage(cohorts, years=2, tier_prices=((12, 0.001), (0, 0.01)))
+    gb = (cohorts["cram_bytes"][0] + cohorts["fastqz_bytes"][0]) / BYTES_PER_GB
+    assert projection["monthly_cost"][0] == pytest.approx(gb * 0.01)
+    assert projection["monthly_cost"][11] == pytest.approx(2 * gb * 0.01)
+    # the first cohort turns 12 months old in month 13, the second a month later
+    assert projection["monthly_cost"][12] == pytest.approx(gb * (0.001 + 0.01))
+    assert projection["monthly_cost"][13] == pytest.approx(2 * gb * 0.001)
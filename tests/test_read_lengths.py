@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from src.seqstoreestimator.core import estimate_bam_size, estimate_fastqz_size
+from src.seqstoreestimator.read_lengths import (
+    ReadLengthDistribution,
+    estimate_bam_size_from_distribution,
+    estimate_fastqz_size_from_distribution,
+)
+
+
+@pytest.mark.parametrize("n50, mean", [(1_000, 999), (15_000, 8_000), (20_000, 12_000), (45_000, 20_000)])
+def test_from_n50_recovers_n50_and_mean(n50, mean):
+    distribution = ReadLengthDistribution.from_n50(n50, mean)
+    assert distribution.mean == pytest.approx(mean, rel=1e-3)
+    # the N50 is read off log-spaced bins about 2.5% wide at the widest
+    assert distribution.n50 == pytest.approx(n50, rel=0.015)
+    assert distribution.weights.sum() == pytest.approx(1.0)
+
+
+def test_from_n50_rejects_n50_below_mean():
+    with pytest.raises(ValueError, match="N50"):
+        ReadLengthDistribution.from_n50(8_000, 10_000)
+
+
+def test_from_lengths_preserves_total_bases_when_binned():
+    rng = np.random.default_rng(0)
+    lengths = rng.lognormal(9, 0.8, 50_000).astype(np.int64) + 1
+    distribution = ReadLengthDistribution.from_lengths(lengths, n_bins=64)
+    assert len(distribution.lengths) <= 64
+    assert distribution.mean == pytest.approx(lengths.mean(), rel=1e-4)
+
+
+def test_single_length_matches_fixed_length_estimators():
+    distribution = ReadLengthDistribution([150], [1])
+    assert estimate_bam_size_from_distribution(1e6, distribution) == pytest.approx(estimate_bam_size(1e6))
+    assert estimate_fastqz_size_from_distribution(1e6, distribution, pe=True) == pytest.approx(estimate_fastqz_size(1e6))
@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.seqstoreestimator.record_profile import BamRecordProfile
+
+from tests.synthetic import aux_tag, bam_header, bam_record, bgzf
+
+READ_LEN = 100
+SA_TAG = aux_tag("SA", "Z", "chr2,5000,+,60M40S,60,1;")
+
+
+def tagged_record(index: int, read_len: int = READ_LEN) -> bytes:
+    aux = (aux_tag("NM", "C", index % 3)
+           + aux_tag("RG", "Z", "lane1")
+           + aux_tag("ZB", "B", ("s", list(range(read_len)))))
+    if index % 4 == 0:
+        aux += SA_TAG
+    return bam_record(index, read_len, random.Random(index), flag=0x4 if index % 10 == 9 else 0, aux=aux)
+
+
+@pytest.fixture
+def records():
+    return [tagged_record(i) for i in range(200)]
+
+
+@pytest.fixture
+def profile(tmp_path, records):
+    path = tmp_path / "tagged.bam"
+    path.write_bytes(bgzf(bam_header() + b"".join(records), 4096))
+    return BamRecordProfile.from_bam(str(path))
+
+
+def test_profile_counts_tags(profile):
+    summary = profile.tag_summary()
+    assert set(summary) == {"NM", "RG", "SA", "ZB"}
+    assert summary["NM"] == {"records": 200, "fixed_bytes_per_record": 4.0, "array_bytes_per_record": 0.0}
+    assert summary["RG"]["fixed_bytes_per_record"] == len(aux_tag("RG", "Z", "lane1"))
+    # tag, type, subtype and count are fixed; the int16 elements scale with the read
+    assert summary["ZB"]["fixed_bytes_per_record"] == 8.0
+    assert summary["ZB"]["array_bytes_per_record"] == 2 * READ_LEN
+    assert profile.sa_fraction == 0.25
+    assert profile.mapped_fraction == 0.9
+    assert profile.mean_read_len == READ_LEN
+
+
+def test_record_model_reproduces_record_sizes(profile, records):
+    model = profile.to_record_model()
+    mean_record_bytes = np.mean([len(record) for record in records])
+    # percent_mapped no longer matters: the observed tags are already averaged over all reads
+    for percent_mapped in (0.0, 0.9, 1.0):
+        assert model.bytes_per_read(READ_LEN, percent_mapped, profile.sa_fraction) == pytest.approx(mean_record_bytes)
+
+
+def test_record_model_scales_array_tags_with_read_length(profile):
+    model = profile.to_record_model()
+    longer = [tagged_record(i, read_len=2 * READ_LEN) for i in range(200)]
+    assert model.bytes_per_read(2 * READ_LEN, 0.9, profile.sa_fraction) == pytest.approx(
+        np.mean([len(record) for record in longer]))
+
+
+def test_record_model_is_cached_and_profiles_merge(profile):
+    assert profile.to_record_model() is profile.to_record_model()
+    merged = profile.merge(profile)
+    assert merged.n_records == 2 * profile.n_records
+    assert merged.to_record_model().bytes_per_read(READ_LEN, 0.9, 0.25) == pytest.approx(
+        profile.to_record_model().bytes_per_read(READ_LEN, 0.9, 0.25))
+
+
+def test_empty_profile_raises():
+    with pytest.raises(ValueError, match="empty"):
+        BamRecordProfile().to_record_model()
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from src.seqstoreestimator.references import coverage_to_bases, get_reference
+
+
+def test_coverage_to_bases_allows_for_duplicates_and_off_target_reads():
+    size = get_reference("GRCh38").size_bp
+    assert coverage_to_bases(30, "hg38") == pytest.approx(30 * size)
+    assert coverage_to_bases(30, 1e6, duplicate_rate=0.2, on_target_rate=0.5) == pytest.approx(30 * 1e6 / 0.4)
+    assert coverage_to_bases([10, 20], 1e6).tolist() == [1e7, 2e7]
+
+
+@pytest.mark.parametrize("duplicate_rate", [-0.1, 1.0, 1.5, np.nan, [0.1, 1.0]])
+def test_duplicate_rate_must_be_below_one(duplicate_rate):
+    with pytest.raises(ValueError, match="duplicate_rate"):
+        coverage_to_bases(30, "GRCh38", duplicate_rate=duplicate_rate)
+
+
+@pytest.mark.parametrize("on_target_rate", [0.0, -0.5, 1.2])
+def test_on_target_rate_must_be_a_fraction(on_target_rate):
+    with pytest.raises(ValueError, match="on_target_rate"):
+        coverage_to_bases(30, 1e6, on_target_rate=on_target_rate)
+
+
+def test_negative_coverage_is_rejected():
+    with pytest.raises(ValueError, match="coverage"):
+        coverage_to_bases(-1, "GRCh38")
@@ -0,0 +1,80 @@
+import gzip
+import importlib.util
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from src.seqstoreestimator.file_index import FileIndex
+from src.seqstoreestimator.scanner import scan_directory, write_observed_sizes
+
+
+def fastq_text(n_reads=100, read_len=50, seed=0):
+    rng = random.Random(seed)
+    return "".join(
+        f"@read{i}\n{''.join(rng.choices('ACGT', k=read_len))}\n+\n{''.join(rng.choices('#-5?I', k=read_len))}\n"
+        for i in range(n_reads)
+    ).encode()
+
+
+def test_corrupt_gzip_is_recorded_not_raised(tmp_path):
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    (archive / "good.fastq.gz").write_bytes(gzip.compress(fastq_text()))
+    data = bytearray(gzip.compress(fastq_text(n_reads=1000)))
+    data[len(data) // 2:len(data) // 2 + 64] = b"\xff" * 64
+    (archive / "corrupt.fastq.gz").write_bytes(bytes(data))
+    (archive / "notgzip.fq.gz").write_bytes(b"plain text, not gzip\n")
+
+    with FileIndex(str(tmp_path / "index.sqlite")) as index:
+        result = scan_directory(str(archive), index, max_workers=2).set_index("sample")
+
+    assert len(result) == 3
+    assert result.loc["good", "num_reads"] == 100
+    assert pd.isna(result.loc["good", "error"])
+    assert "Error" in result.loc["corrupt", "error"]
+    assert "Error" in result.loc["notgzip", "error"]
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is not None, reason="pyarrow is installed")
+def test_parquet_without_pyarrow_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="pyarrow"):
+        write_observed_sizes(pd.DataFrame({"path": ["a"]}), str(tmp_path / "out.parquet"))
+
+
+def test_rescan_leaves_sibling_directory_with_shared_prefix(tmp_path):
+    for name in ("a", "ab"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f"{name}.fastq.gz").write_bytes(gzip.compress(fastq_text()))
+
+    with FileIndex(str(tmp_path / "index.sqlite")) as index:
+        scan_directory(str(tmp_path / "ab"), index)
+        scanned = scan_directory(str(tmp_path / "a"), index)
+        assert list(scanned["sample"]) == ["a"]
+        # pruning "a" must not drop files under "ab"
+        assert sorted(index.to_dataframe()["sample"]) == ["a", "ab"]
+        assert list(index.stamps(prefix=str(tmp_path / "ab") + "/")) == [str(tmp_path / "ab" / "ab.fastq.gz")]
+
+
+def test_failed_files_are_retried_on_the_next_scan(tmp_path):
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    path = archive / "flaky.fastq.gz"
+    good = gzip.compress(fastq_text(n_reads=1000))
+    bad = bytearray(good)
+    bad[len(bad) // 2:len(bad) // 2 + 64] = b"\xff" * 64
+    path.write_bytes(bytes(bad))
+    stat = path.stat()
+
+    with FileIndex(str(tmp_path / "index.sqlite")) as index:
+        first = scan_directory(str(archive), index)
+        assert first.loc[0, "error"]
+        assert index.stamps(prefix=str(archive)) == {str(path): (None, None)}
+
+        # same size and mtime, now readable: a transient failure must not stick
+        path.write_bytes(good)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        second = scan_directory(str(archive), index)
+        assert pd.isna(second.loc[0, "error"])
+        assert second.loc[0, "num_reads"] == 1000
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from src.seqstoreestimator.scheduler import main, rolling_schedule, sample_footprints
+
+SHEET = """sample,reads,read_length,format
+s1,30000000,150,BAM
+s2,,150,CRAM
+s3,20000000,abc,CRAM
+s4,10000000,,CRAM
+"""
+
+
+@pytest.mark.parametrize("mode", ["waves", "rolling"])
+def test_invalid_rows_are_skipped_and_reported(tmp_path, capsys, mode):
+    sheet = tmp_path / "sheet.csv"
+    sheet.write_text(SHEET)
+    output = tmp_path / "schedule.csv"
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(sheet), "--budget-gb", "100", "--mode", mode, "-o", str(output)])
+
+    assert exit_info.value.code
+    stderr = capsys.readouterr().err
+    assert f"{sheet}:3: skipped, n_reads is empty" in stderr
+    assert f"{sheet}:4: skipped, read_len 'abc' is not a number" in stderr
+    schedule = pd.read_csv(output)
+    assert list(schedule["sample"]) == ["s1", "s4"]
+    assert schedule["peak_scratch_bytes"].notna().all()
+
+
+def test_sample_footprints_rejects_invalid_rows():
+    samples = pd.DataFrame({"n_reads": [1e6, None]})
+    with pytest.raises(ValueError, match="line 3: n_reads is empty"):
+        sample_footprints(samples)
+
+
+def test_rolling_schedule_rejects_non_finite_footprints():
+    with pytest.raises(ValueError, match="finite"):
+        rolling_schedule([1e9, float("nan"), 5e9], [1.0, 1.0, 1.0], 2e9)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from src.seqstoreestimator.sensitivity import heatmap, parameter_grid, sweep, tornado
+
+BASELINE = {
+    "read_len": 151,
+    "percent_mapped": 0.97,
+    "supplementary_alignments": 0.1,
+    "bam_compression_ratio": 0.15,
+    "cram_compression_ratio": 0.3,
+    "gzip_compression_ratio": 0.25,
+}
+
+
+@pytest.mark.parametrize("points", [4, 5, 10])
+def test_baseline_is_on_the_grid(points):
+    # percent_mapped * 1.5 is clipped to 1.0 and read lengths are rounded
+    grid = parameter_grid(BASELINE, spread=0.5, points=points)
+    for name, value in BASELINE.items():
+        assert value in grid[name]
+        assert np.all(np.diff(grid[name]) > 0)
+
+
+def test_tornado_slices_through_baseline():
+    grid = parameter_grid(BASELINE, spread=0.5, points=4)
+    result = sweep(grid, n_reads=1e9)
+    at_baseline = sweep({name: [value] for name, value in BASELINE.items()}, n_reads=1e9)
+    expected = float(np.ravel(at_baseline["total_bytes"])[0])
+    center = tuple(int(np.flatnonzero(result["values"][name] == BASELINE[name])[0]) for name in result["parameters"])
+    shape = tuple(len(result["values"][name]) for name in result["parameters"])
+    assert np.broadcast_to(result["total_bytes"], shape)[center] == pytest.approx(expected)
+
+    for bar in tornado(result, baseline=BASELINE):
+        values = result["values"][bar["parameter"]]
+        line = [bar["low"], bar["high"]]
+        # the baseline lies between the extremes of each monotone slice
+        assert min(line) <= expected <= max(line)
+        assert values[0] == bar["low_value"] and values[-1] == bar["high_value"]
+
+
+def test_heatmap_needs_two_parameters():
+    result = sweep(parameter_grid(BASELINE, points=3), n_reads=1e9)
+    with pytest.raises(ValueError):
+        heatmap(result, "read_len", "read_len")
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.seqstoreestimator.core import estimate_bam_size, estimate_fastqz_size
+from src.seqstoreestimator.uncertainty import default_distributions, draw_parameters, simulate_sizes
+
+
+def test_fixed_parameters_reproduce_point_estimates():
+    result = simulate_sizes(1e8, distributions={}, n_draws=1000, seed=0)
+    cram = estimate_bam_size(1e8)
+    fastqz = estimate_fastqz_size(1e8)
+    for p in ("p5", "p50", "p95"):
+        assert result["bam_bytes"][p] == pytest.approx(cram)
+        assert result["total_bytes"][p] == pytest.approx(cram + fastqz)
+
+
+def test_percentiles_bracket_the_point_estimate():
+    result = simulate_sizes(1e8, output_format="BAM", n_draws=100_000, seed=0)
+    bam = result["bam_bytes"]
+    assert bam["p5"] < bam["p50"] < bam["p95"]
+    assert bam["p50"] == pytest.approx(estimate_bam_size(1e8, output_format="BAM"), rel=0.02)
+
+
+def test_supplementary_rate_above_one_is_not_capped():
+    distributions = default_distributions(supplementary_alignments=1.2)
+    assert distributions["supplementary_alignments"] == ("triangular", pytest.approx(0.96), 1.2, pytest.approx(1.44))
+    assert distributions["percent_mapped"][3] == 1.0
+
+    draws = draw_parameters(distributions, 10_000, seed=0)
+    assert draws["supplementary_alignments"].max() > 1.2
+    result = simulate_sizes(1e8, distributions=distributions, n_draws=10_000, seed=0)
+    point = estimate_bam_size(1e8, supplementary_alignments=1.2)
+    assert result["bam_bytes"]["p5"] < point < result["bam_bytes"]["p95"]
+
+
+def test_point_value_at_the_cap_gives_a_valid_triangle():
+    low, mode, high = default_distributions(percent_mapped=1.0)["percent_mapped"][1:]
+    assert low <= mode <= high == 1.0
+    assert np.all(draw_parameters({"percent_mapped": ("triangular", low, mode, high)}, 100, seed=0)["percent_mapped"] <= 1.0)